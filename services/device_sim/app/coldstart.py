@@ -0,0 +1,44 @@
+"""
+Cold-start benchmark for the simulator: module import time plus time until
+the first UDP response, measured in a fresh interpreter.
+
+    python -m services.device_sim.app.coldstart      # prints one JSON object
+"""
+from __future__ import annotations
+import json
+import sys
+import time
+
+
+def measure() -> dict:
+    t0 = time.perf_counter()
+    import services.device_sim.app.main  # noqa: F401
+    t_import = time.perf_counter()
+
+    from services.device_sim.app.embedded import EmbeddedSimulator
+    from qaharness.transport.udp import UdpClient, UdpEndpoint
+    from qaharness.transport import msgtypes as mt
+
+    # sampled before start(): what a headless instance drags in at import
+    heavy = sorted(m for m in ("jinja2", "fastapi.templating", "fastapi.staticfiles") if m in sys.modules)
+
+    sim = EmbeddedSimulator()
+    try:
+        ep = sim.start()
+        t_ready = time.perf_counter()
+        rtype, _ = UdpClient(UdpEndpoint(ep.udp_host, ep.udp_port), timeout_s=2.0).request_once(mt.REQ_PING)
+        t_first = time.perf_counter()
+    finally:
+        sim.stop()
+
+    return {
+        "import_ms": (t_import - t0) * 1000.0,
+        "start_ms": (t_ready - t_import) * 1000.0,
+        "first_udp_response_ms": (t_first - t0) * 1000.0,
+        "first_response_ok": rtype == mt.RESP_OK,
+        "heavy_modules_at_import": heavy,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(measure()))
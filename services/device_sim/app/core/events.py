@@ -0,0 +1,143 @@
+from __future__ import annotations
+import asyncio
+from typing import Any, Callable
+
+
+class _Subscriber:
+    """
+    latest-value mailbox: a slow consumer only ever sees the newest event of
+    each kind, so nothing queues up behind a stalled dashboard
+    """
+    def __init__(self) -> None:
+        self.pending: dict[str, Any] = {}
+        self.ready = asyncio.Event()
+
+    def offer(self, kind: str, data: Any) -> None:
+        self.pending[kind] = data
+        self.ready.set()
+
+    async def get(self) -> list[tuple[str, Any]]:
+        await self.ready.wait()
+        self.ready.clear()
+        items = list(self.pending.items())
+        self.pending.clear()
+        return items
+
+
+class EventHub:
+    """
+    Fan-out of simulator state/fault changes and aggregated metrics.
+
+    Publishers only call notify(), which is safe from any thread. A single
+    producer task builds each payload once (not once per subscriber), pushes
+    at most `max_hz` state updates per second, and emits a metrics event every
+    `metrics_interval_s`. With no subscribers the producer does no work.
+    """
+    def __init__(
+        self,
+        state_fn: Callable[[], dict],
+        metrics_fn: Callable[[], dict],
+        *,
+        max_hz: float = 10.0,
+        metrics_interval_s: float = 1.0,
+    ):
+        if max_hz <= 0:
+            raise ValueError("max_hz must be > 0")
+        if metrics_interval_s <= 0:
+            raise ValueError("metrics_interval_s must be > 0")
+        self._state_fn = state_fn
+        self._metrics_fn = metrics_fn
+        self._min_interval_s = 1.0 / max_hz
+        self._metrics_interval_s = metrics_interval_s
+        self._subs: set[_Subscriber] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._changed: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._last_state: dict | None = None
+        self._last_total: int | None = None
+        self._last_metrics_at = 0.0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subs)
+
+    def start(self) -> None:
+        # must be called from the event loop that serves the endpoints
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self) -> None:
+        loop, changed = self._loop, self._changed
+        if loop is None or changed is None or not self._subs:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            changed.set()
+        else:
+            # sync FastAPI handlers run in the threadpool
+            loop.call_soon_threadsafe(changed.set)
+
+    def subscribe(self) -> _Subscriber:
+        sub = _Subscriber()
+        self._subs.add(sub)
+        # new subscribers get the current state right away
+        sub.offer("state", self._state_fn())
+        return sub
+
+    def unsubscribe(self, sub: _Subscriber) -> None:
+        self._subs.discard(sub)
+
+    def _broadcast(self, kind: str, data: Any) -> None:
+        for sub in self._subs:
+            sub.offer(kind, data)
+
+    def _aggregate_metrics(self, now: float) -> dict:
+        data = self._metrics_fn()
+        total = data.get("requests_total", 0)
+        if self._last_total is not None and now > self._last_metrics_at:
+            data["requests_per_s"] = max(0, total - self._last_total) / (now - self._last_metrics_at)
+        else:
+            data["requests_per_s"] = None
+        self._last_total = total
+        self._last_metrics_at = now
+        return data
+
+    async def _run(self) -> None:
+        assert self._loop is not None and self._changed is not None
+        loop, changed = self._loop, self._changed
+        next_metrics = loop.time()
+
+        while True:
+            timeout = max(0.0, next_metrics - loop.time())
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            changed.clear()
+
+            now = loop.time()
+            if self._subs:
+                state = self._state_fn()
+                if state != self._last_state:
+                    self._last_state = state
+                    self._broadcast("state", state)
+                if now >= next_metrics:
+                    self._broadcast("metrics", self._aggregate_metrics(now))
+            if now >= next_metrics:
+                next_metrics = now + self._metrics_interval_s
+
+            # coalescing window: changes landing here merge into the next push
+            await asyncio.sleep(self._min_interval_s)
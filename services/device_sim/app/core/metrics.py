@@ -0,0 +1,164 @@
+from __future__ import annotations
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+from qaharness.transport import msgtypes as mt
+
+# outcome labels used by the UDP/TCP handlers
+OK = "ok"
+BAD_STATE = "bad_state"
+UNKNOWN_REQ = "unknown_req"
+DROPPED = "dropped"
+CORRUPTED = "corrupted"
+FRAME_ERROR = "frame_error"
+
+OUTCOMES = (OK, BAD_STATE, UNKNOWN_REQ, DROPPED, CORRUPTED, FRAME_ERROR)
+
+# service-time bucket upper bounds (seconds); tuned for sub-millisecond handlers
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+# "REQ_PING" style labels keep prometheus series readable; unknown types fall back to the number
+_MSG_NAMES = {v: k for k, v in vars(mt).items() if k.startswith("REQ_") and isinstance(v, int)}
+
+# label for frames we could not parse a type from
+UNKNOWN = "unknown"
+
+
+def msg_type_label(msg_type: int | None) -> str:
+    if msg_type is None:
+        return UNKNOWN
+    return _MSG_NAMES.get(msg_type) or str(msg_type)
+
+
+@dataclass
+class Histogram:
+    """
+    Fixed-bucket cumulative histogram (prometheus semantics).
+    observe() is a bisect + two adds, cheap enough for the datagram path.
+    """
+    bounds: tuple[float, ...] = DEFAULT_BUCKETS
+    counts: list[int] = field(default_factory=list)
+    total: float = 0.0
+    count: int = 0
+
+    def __post_init__(self) -> None:
+        if not self.counts:
+            # one extra slot for +Inf
+            self.counts = [0] * (len(self.bounds) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        out = []
+        running = 0
+        for bound, c in zip(self.bounds, self.counts):
+            running += c
+            out.append((repr(bound), running))
+        out.append(("+Inf", running + self.counts[-1]))
+        return out
+
+
+class SimMetrics:
+    """
+    In-process counters for the simulator data plane.
+
+    All mutation happens on the event loop thread (protocol callbacks and
+    the TCP handler), so no locking is needed; readers should also run on
+    the loop (async endpoints) to get a consistent snapshot.
+    """
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self._buckets = buckets
+        # gauges track live objects, so reset() leaves them alone
+        self.tcp_active_connections = 0
+        self.pending_delayed_sends = 0
+        self.reset()
+
+    def reset(self) -> None:
+        # (transport, msg_type label, outcome) -> count
+        self.requests: dict[tuple[str, str, str], int] = {}
+        # (transport, msg_type label) -> service time histogram
+        self.service_time: dict[tuple[str, str], Histogram] = {}
+
+    def observe(self, transport: str, msg_type: str, outcome: str, service_s: float | None = None) -> None:
+        key = (transport, msg_type, outcome)
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+        if service_s is not None:
+            hkey = (transport, msg_type)
+            h = self.service_time.get(hkey)
+            if h is None:
+                h = self.service_time[hkey] = Histogram(self._buckets)
+            h.observe(service_s)
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": [
+                {"transport": t, "msg_type": m, "outcome": o, "count": c}
+                for (t, m, o), c in sorted(self.requests.items())
+            ],
+            "service_time_s": [
+                {
+                    "transport": t,
+                    "msg_type": m,
+                    "count": h.count,
+                    "sum": h.total,
+                    "buckets": dict(h.cumulative()),
+                }
+                for (t, m), h in sorted(self.service_time.items())
+            ],
+            "tcp_active_connections": self.tcp_active_connections,
+            "pending_delayed_sends": self.pending_delayed_sends,
+        }
+
+    def totals(self) -> dict:
+        """
+        small aggregate for live views (event stream), cheaper than snapshot()
+        """
+        by_outcome: dict[str, int] = {}
+        for (_, _, o), c in self.requests.items():
+            by_outcome[o] = by_outcome.get(o, 0) + c
+        count = sum(h.count for h in self.service_time.values())
+        total_s = sum(h.total for h in self.service_time.values())
+        return {
+            "requests_total": sum(by_outcome.values()),
+            "by_outcome": by_outcome,
+            "service_time_mean_s": (total_s / count) if count else None,
+            "tcp_active_connections": self.tcp_active_connections,
+            "pending_delayed_sends": self.pending_delayed_sends,
+        }
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP sim_requests_total Data-plane requests by transport, message type and outcome.",
+            "# TYPE sim_requests_total counter",
+        ]
+        for (t, m, o), c in sorted(self.requests.items()):
+            lines.append(f'sim_requests_total{{transport="{t}",msg_type="{m}",outcome="{o}"}} {c}')
+
+        lines += [
+            "# HELP sim_service_time_seconds Handler service time, excluding injected delay.",
+            "# TYPE sim_service_time_seconds histogram",
+        ]
+        for (t, m), h in sorted(self.service_time.items()):
+            labels = f'transport="{t}",msg_type="{m}"'
+            for le, c in h.cumulative():
+                lines.append(f'sim_service_time_seconds_bucket{{{labels},le="{le}"}} {c}')
+            lines.append(f"sim_service_time_seconds_sum{{{labels}}} {h.total!r}")
+            lines.append(f"sim_service_time_seconds_count{{{labels}}} {h.count}")
+
+        lines += [
+            "# HELP sim_tcp_active_connections Currently open TCP client connections.",
+            "# TYPE sim_tcp_active_connections gauge",
+            f"sim_tcp_active_connections {self.tcp_active_connections}",
+            "# HELP sim_pending_delayed_sends Responses waiting on an injected delay.",
+            "# TYPE sim_pending_delayed_sends gauge",
+            f"sim_pending_delayed_sends {self.pending_delayed_sends}",
+        ]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,199 @@
+from __future__ import annotations
+import asyncio
+from dataclasses import dataclass, field
+from typing import Callable
+
+from .protocol import SimModel
+
+FAULT_FIELDS = ("delay_ms", "drop_rate", "corrupt_rate")
+ACTIONS = ("reset", "configure", "start_stream", "stop_stream")
+
+
+@dataclass(frozen=True)
+class ScheduleStep:
+    """
+    at_ms:   offset from schedule start (per iteration when looping)
+    ramp_ms: 0 = step change; >0 = linear ramp to `faults` over this window
+    faults:  subset of FAULT_FIELDS to change
+    action:  optional state transition fired once at `at_ms`
+    """
+    at_ms: int
+    ramp_ms: int = 0
+    faults: dict[str, float] = field(default_factory=dict)
+    action: str | None = None
+
+    def __post_init__(self) -> None:
+        if self.at_ms < 0 or self.ramp_ms < 0:
+            raise ValueError("at_ms and ramp_ms must be >= 0")
+        unknown = set(self.faults) - set(FAULT_FIELDS)
+        if unknown:
+            raise ValueError(f"unknown fault fields: {sorted(unknown)}")
+        if self.action is not None and self.action not in ACTIONS:
+            raise ValueError(f"unknown action: {self.action}")
+        if self.ramp_ms and not self.faults:
+            raise ValueError("ramp_ms requires faults")
+
+
+@dataclass(frozen=True)
+class Schedule:
+    steps: tuple[ScheduleStep, ...]
+    name: str | None = None
+    loop: bool = False
+    tick_ms: int = 50
+    duration_ms: int | None = None
+
+    def __post_init__(self) -> None:
+        if not self.steps:
+            raise ValueError("schedule needs at least one step")
+        if self.tick_ms <= 0:
+            raise ValueError("tick_ms must be > 0")
+        # stable sort: steps sharing at_ms apply in upload order
+        object.__setattr__(self, "steps", tuple(sorted(self.steps, key=lambda s: s.at_ms)))
+        if self.loop and self.length_ms <= 0:
+            raise ValueError("looping schedule needs a positive duration")
+
+    @property
+    def length_ms(self) -> int:
+        if self.duration_ms is not None:
+            return self.duration_ms
+        return max(s.at_ms + s.ramp_ms for s in self.steps)
+
+    def faults_at(self, t_ms: float, base: dict[str, float]) -> dict[str, float]:
+        """
+        Fault values at t_ms into an iteration. A pure function of time and the
+        faults in effect when the schedule started, so a given schedule always
+        produces the same curve regardless of tick jitter.
+        """
+        vals = dict(base)
+        for step in self.steps:
+            if step.at_ms > t_ms:
+                break
+            for k, target in step.faults.items():
+                if step.ramp_ms and t_ms < step.at_ms + step.ramp_ms:
+                    frac = (t_ms - step.at_ms) / step.ramp_ms
+                    vals[k] = vals[k] + (target - vals[k]) * frac
+                else:
+                    vals[k] = target
+        return vals
+
+    def ramp_active(self, t_ms: float) -> bool:
+        return any(s.ramp_ms and s.at_ms <= t_ms < s.at_ms + s.ramp_ms for s in self.steps)
+
+    def next_step_at(self, t_ms: float) -> int | None:
+        for s in self.steps:
+            if s.at_ms > t_ms:
+                return s.at_ms
+        return None
+
+
+class ScheduleRunner:
+    """
+    Drives a Schedule against the model from a task on the simulator loop.
+
+    Between breakpoints it sleeps until the next step; only while a ramp is
+    active does it wake every tick_ms. Iteration boundaries are computed from
+    the original start time, so looping schedules don't drift.
+    """
+    _MAX_ERRORS = 20
+
+    def __init__(self, schedule: Schedule, model: SimModel, on_change: Callable[[], None] | None = None):
+        self.schedule = schedule
+        self._model = model
+        self._on_change = on_change or (lambda: None)
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._t_start = 0.0
+        self.iteration = 0
+        self.steps_fired = 0
+        self.finished = False
+        self.errors: list[str] = []
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._task = self._loop.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    def progress(self) -> dict:
+        elapsed_ms = None
+        if self._loop is not None and self.running:
+            elapsed_ms = round((self._loop.time() - self._t_start) * 1000.0, 1)
+        return {
+            "name": self.schedule.name,
+            "running": self.running,
+            "finished": self.finished,
+            "loop": self.schedule.loop,
+            "iteration": self.iteration,
+            "elapsed_ms": elapsed_ms,
+            "duration_ms": self.schedule.length_ms,
+            "steps_fired": self.steps_fired,
+            "steps_total": len(self.schedule.steps),
+            "errors": list(self.errors),
+        }
+
+    def _current_faults(self) -> dict[str, float]:
+        f = self._model.faults
+        return {"delay_ms": f.delay_ms, "drop_rate": f.drop_rate, "corrupt_rate": f.corrupt_rate}
+
+    def _apply_faults(self, vals: dict[str, float]) -> bool:
+        f = self._model.faults
+        delay_ms = int(round(vals["delay_ms"]))
+        changed = (f.delay_ms, f.drop_rate, f.corrupt_rate) != (delay_ms, vals["drop_rate"], vals["corrupt_rate"])
+        f.delay_ms = delay_ms
+        f.drop_rate = vals["drop_rate"]
+        f.corrupt_rate = vals["corrupt_rate"]
+        return changed
+
+    def _fire(self, step: ScheduleStep) -> None:
+        if step.action is None:
+            return
+        try:
+            getattr(self._model, step.action)()
+        except ValueError as e:
+            # keep running: a soak test shouldn't stop on one rejected transition
+            if len(self.errors) < self._MAX_ERRORS:
+                self.errors.append(f"iteration {self.iteration} step@{step.at_ms}ms {step.action}: {e}")
+
+    async def _run(self) -> None:
+        assert self._loop is not None
+        loop, sched = self._loop, self.schedule
+        base = self._current_faults()
+        length = sched.length_ms
+        self._t_start = loop.time()
+
+        while True:
+            fired = 0
+            self.steps_fired = 0
+            while True:
+                t_ms = (loop.time() - self._t_start) * 1000.0
+                changed = False
+                while fired < len(sched.steps) and sched.steps[fired].at_ms <= t_ms:
+                    self._fire(sched.steps[fired])
+                    changed = changed or sched.steps[fired].action is not None
+                    fired += 1
+                self.steps_fired = fired
+                changed = self._apply_faults(sched.faults_at(min(t_ms, length), base)) or changed
+                if changed:
+                    self._on_change()
+                if t_ms >= length:
+                    break
+
+                if sched.ramp_active(t_ms):
+                    wake_ms = t_ms + sched.tick_ms
+                else:
+                    nxt = sched.next_step_at(t_ms)
+                    wake_ms = length if nxt is None else nxt
+                await asyncio.sleep(max(0.0, (min(wake_ms, length) - t_ms) / 1000.0))
+
+            if not sched.loop:
+                self.finished = True
+                self._on_change()
+                return
+            self.iteration += 1
+            self._t_start += length / 1000.0
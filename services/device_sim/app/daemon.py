@@ -0,0 +1,278 @@
+"""
+Long-lived simulator daemon for local edit/run loops.
+
+    SIM_MODE=daemon pytest tests/system/test_x.py      # first run starts it, later runs reuse it
+    python -m services.device_sim.app.daemon status     # registered daemons
+    python -m services.device_sim.app.daemon stop       # stop them
+
+The daemon is `serve --daemon-file <registry>`. Once bound it writes its pid
+(and, where the OS exposes it, the process start time), endpoints and a
+fingerprint of the simulator sources to the registry file (atomically),
+removes the file on exit, and exits by itself after `--idle-ttl-s` seconds
+without control- or data-plane traffic.
+
+ensure() reuses a registered daemon when its pid is alive, its sources are
+unchanged and /health answers; otherwise it starts a new one. A registry left
+behind by a killed daemon may name a pid the OS has since given to another
+process: it is only signalled if it is still the daemon (see owns_pid). A lock file
+next to the registry keeps two sessions from starting two daemons at once.
+This module only uses the standard library so discovery stays cheap.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent
+REPO_ROOT = APP_DIR.parents[2]
+
+DEFAULT_DIR = Path("artifacts") / ".simd"
+DEFAULT_TTL_S = 900.0
+
+# a lock older than this belongs to a session that died while starting a daemon
+_STALE_LOCK_S = 30.0
+
+
+def registry_path(name: str = "main", directory: str | Path | None = None) -> Path:
+    """
+    one registry per name (e.g. per xdist worker), under SIM_DAEMON_DIR or artifacts/.simd
+    """
+    directory = Path(directory or os.getenv("SIM_DAEMON_DIR") or DEFAULT_DIR)
+    return (directory / f"sim-{name}.json").resolve()
+
+
+def source_fingerprint() -> str:
+    """
+    changes whenever a simulator source file does, so a daemon running old code is replaced
+    """
+    h = hashlib.sha1()
+    for p in sorted(APP_DIR.rglob("*.py")):
+        st = p.stat()
+        h.update(f"{p.relative_to(APP_DIR)}:{st.st_mtime_ns}:{st.st_size};".encode())
+    return h.hexdigest()[:16]
+
+
+def read_registry(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def write_registry(path: Path, info: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(info), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def remove_registry(path: Path, pid: int) -> None:
+    # only the daemon that wrote the file may remove it
+    info = read_registry(path)
+    if info is not None and info.get("pid") == pid:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill(pid, 0) terminates the process on Windows; the health check decides there
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def process_start_time(pid: int) -> int | None:
+    """
+    start time of `pid` in clock ticks since boot (Linux /proc), None where unavailable
+    """
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return None
+    # comm (field 2) may contain spaces and parens; starttime is field 22
+    try:
+        return int(stat.rsplit(")", 1)[1].split()[19])
+    except (IndexError, ValueError):
+        return None
+
+
+def healthy(http: str, timeout_s: float = 0.5) -> bool:
+    try:
+        with urllib.request.urlopen(f"{http}/health", timeout=timeout_s) as r:
+            return r.status == 200
+    except (OSError, ValueError):
+        return False
+
+
+def owns_pid(info: dict) -> bool:
+    """
+    the registered pid still belongs to the daemon that wrote `info`, not to a
+    process that was given the pid after the daemon died without cleaning up
+    """
+    if not pid_alive(info["pid"]):
+        return False
+    recorded = info.get("proc_start")
+    current = process_start_time(info["pid"])
+    if recorded is not None and current is not None:
+        return recorded == current
+    # nothing to compare (no /proc, or an older registry): the daemon answers on its port
+    return healthy(info["http"])
+
+
+def discover(path: Path) -> dict | None:
+    """
+    registered, live, current and healthy daemon -> its registry entry, else None
+    """
+    info = read_registry(path)
+    if info is None:
+        return None
+    if not owns_pid(info):
+        remove_registry(path, info["pid"])
+        return None
+    if info.get("fingerprint") != source_fingerprint():
+        stop(path)
+        return None
+    if not healthy(info["http"]):
+        return None
+    return info
+
+
+def _acquire_lock(lock: Path) -> bool:
+    try:
+        fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            if time.time() - lock.stat().st_mtime > _STALE_LOCK_S:
+                lock.unlink()
+        except OSError:
+            pass
+        return False
+    os.write(fd, str(os.getpid()).encode())
+    os.close(fd)
+    return True
+
+
+def _wait_registered(path: Path, timeout_s: float, proc: subprocess.Popen | None = None) -> dict | None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        info = read_registry(path)
+        if info is not None and (proc is None or info.get("pid") == proc.pid):
+            return info
+        if proc is not None and proc.poll() is not None:
+            return None
+        time.sleep(0.02)
+    return None
+
+
+def spawn(path: Path, *, ttl_s: float = DEFAULT_TTL_S, timeout_s: float = 15.0) -> dict:
+    """
+    start a detached daemon registered at `path` and wait until it is bound
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock = path.with_suffix(".lock")
+    deadline = time.monotonic() + timeout_s
+    while not _acquire_lock(lock):
+        # another session is starting one; use it once registered
+        info = _wait_registered(path, 0.2)
+        if info is not None and healthy(info["http"]):
+            return info
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"timed out waiting for another session to start the simulator daemon ({lock})")
+
+    log = path.with_suffix(".log")
+    popen_kwargs: dict = {}
+    if os.name == "nt":
+        popen_kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS
+    else:
+        # own session: the daemon outlives the pytest process that started it
+        popen_kwargs["start_new_session"] = True
+    try:
+        with open(log, "ab") as out:
+            proc = subprocess.Popen(
+                [
+                    sys.executable, "-m", "services.device_sim.app.serve",
+                    "--daemon-file", str(path),
+                    "--idle-ttl-s", str(ttl_s),
+                ],
+                cwd=str(REPO_ROOT),
+                stdin=subprocess.DEVNULL,
+                stdout=out,
+                stderr=subprocess.STDOUT,
+                **popen_kwargs,
+            )
+        info = _wait_registered(path, timeout_s, proc)
+    finally:
+        try:
+            lock.unlink()
+        except OSError:
+            pass
+    if info is None:
+        proc.kill()
+        tail = log.read_text(encoding="utf-8", errors="replace")[-4000:] if log.exists() else ""
+        raise RuntimeError(f"simulator daemon did not register within {timeout_s}s.\n--- {log} ---\n{tail}")
+    return info
+
+
+def ensure(path: Path, *, ttl_s: float = DEFAULT_TTL_S) -> dict:
+    """
+    reuse the daemon registered at `path`, or start one
+    """
+    return discover(path) or spawn(path, ttl_s=ttl_s)
+
+
+def stop(path: Path, timeout_s: float = 5.0) -> bool:
+    info = read_registry(path)
+    if info is None:
+        return False
+    if not owns_pid(info):
+        remove_registry(path, info["pid"])
+        return False
+    try:
+        os.kill(info["pid"], signal.SIGTERM)
+    except OSError:
+        remove_registry(path, info["pid"])
+        return False
+    deadline = time.monotonic() + timeout_s
+    while path.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return True
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(prog="python -m services.device_sim.app.daemon")
+    ap.add_argument("action", choices=["status", "stop"])
+    ap.add_argument("--dir", default=None, help="registry directory (default: SIM_DAEMON_DIR or artifacts/.simd)")
+    args = ap.parse_args(argv)
+
+    paths = sorted(registry_path("*", args.dir).parent.glob("sim-*.json"))
+    for path in paths:
+        info = read_registry(path)
+        if info is None:
+            continue
+        if args.action == "stop":
+            stopped = stop(path)
+            print(f"{path.name}: pid {info['pid']} {'stopped' if stopped else 'not running'}")
+        else:
+            live = pid_alive(info["pid"]) and healthy(info["http"])
+            print(json.dumps({**info, "registry": str(path), "healthy": live}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
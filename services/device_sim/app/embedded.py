@@ -0,0 +1,137 @@
+from __future__ import annotations
+import asyncio
+import socket
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+import uvicorn
+
+
+@dataclass(frozen=True)
+class SimEndpoints:
+    http: str
+    udp_host: str
+    udp_port: int
+    tcp_host: str
+    tcp_port: int
+
+
+class _ReadyServer(uvicorn.Server):
+    """
+    uvicorn server that resolves a future once lifespan startup (UDP/TCP
+    endpoints bound) and the HTTP listener are both up -- no polling
+    """
+    def __init__(self, config: uvicorn.Config, ready: Future):
+        super().__init__(config)
+        self._ready = ready
+
+    async def startup(self, sockets: list[socket.socket] | None = None) -> None:
+        await super().startup(sockets=sockets)
+        if self._ready.done():
+            return
+        if not self.started:
+            self._ready.set_exception(RuntimeError("simulator startup failed"))
+            return
+
+        state = self.config.app.state
+        udp_host, udp_port = state.udp_transport.get_extra_info("sockname")[:2]
+        tcp_host, tcp_port = state.tcp_server.sockets[0].getsockname()[:2]
+        http_host, http_port = sockets[0].getsockname()[:2] if sockets else (self.config.host, self.config.port)
+        self._ready.set_result(SimEndpoints(
+            http=f"http://{http_host}:{http_port}",
+            udp_host=udp_host,
+            udp_port=udp_port,
+            tcp_host=tcp_host,
+            tcp_port=tcp_port,
+        ))
+
+
+class EmbeddedSimulator:
+    """
+    Runs the simulator (FastAPI control plane + UDP endpoint + TCP server) on a
+    background event-loop thread inside the current process.
+
+    Ports default to 0 (ephemeral); the bound endpoints are returned by start().
+    The simulator's module-level state (MODEL, METRICS, ...) is shared with the
+    host process, so only one embedded instance per process.
+    """
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        *,
+        http_port: int = 0,
+        udp_port: int = 0,
+        tcp_port: int = 0,
+        log_level: str = "warning",
+    ):
+        self._host = host
+        self._http_port = http_port
+        self._udp_port = udp_port
+        self._tcp_port = tcp_port
+        self._log_level = log_level
+        self._thread: threading.Thread | None = None
+        self._server: _ReadyServer | None = None
+        self.endpoints: SimEndpoints | None = None
+
+    def start(self, timeout_s: float = 10.0) -> SimEndpoints:
+        if self._thread is not None:
+            raise RuntimeError("embedded simulator already started")
+
+        from services.device_sim.app import main
+
+        # startup handlers read these at startup time
+        main.UDP_HOST, main.UDP_PORT = self._host, self._udp_port
+        main.TCP_HOST, main.TCP_PORT = self._host, self._tcp_port
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self._host, self._http_port))
+
+        config = uvicorn.Config(
+            main.app,
+            host=self._host,
+            port=sock.getsockname()[1],
+            loop="asyncio",
+            lifespan="on",
+            log_level=self._log_level,
+            timeout_graceful_shutdown=1,
+        )
+        ready: Future = Future()
+        self._server = _ReadyServer(config, ready)
+
+        def _run() -> None:
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(self._server.serve(sockets=[sock]))
+            except BaseException as e:
+                if not ready.done():
+                    ready.set_exception(e)
+            finally:
+                if not ready.done():
+                    ready.set_exception(RuntimeError("simulator exited before becoming ready"))
+                loop.close()
+                sock.close()
+
+        self._thread = threading.Thread(target=_run, name="embedded-simulator", daemon=True)
+        self._thread.start()
+        try:
+            self.endpoints = ready.result(timeout=timeout_s)
+        except BaseException:
+            self.stop()
+            raise
+        return self.endpoints
+
+    def stop(self, timeout_s: float = 5.0) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_s)
+        self._thread = None
+        self._server = None
+
+    def __enter__(self) -> SimEndpoints:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -1,17 +1,26 @@
 import asyncio
+import json
 import os
+import random
 import struct
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+import time
+from dataclasses import replace
+from typing import Literal
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pathlib import Path
 from pydantic import BaseModel, Field
 
 from services.device_sim.app.core.protocol import SimModel
 from services.device_sim.app.core.state import DeviceState
-from qaharness.transport.framing import encode_frame, decode_frame, FrameError
+from services.device_sim.app.core import metrics as sm
+from services.device_sim.app.core.events import EventHub
+from services.device_sim.app.core.schedule import Schedule, ScheduleRunner, ScheduleStep
+from services.device_sim.app.ui import LazyConsole
+from qaharness.transport.framing import encode_frame, decode_frame, trailer_size, FrameError, Timestamps
 from qaharness.transport import msgtypes as mt
+from qaharness.transport import capture as cap
+from qaharness.utils import profiling
 
 HTTP_HOST = os.getenv("SIM_HTTP_HOST", "127.0.0.1")
 HTTP_PORT = int(os.getenv("SIM_HTTP_PORT", "8000"))
@@ -22,17 +31,33 @@ UDP_PORT = int(os.getenv("SIM_UDP_PORT", "9000"))
 TCP_HOST = os.getenv("SIM_TCP_HOST", "127.0.0.1")
 TCP_PORT = int(os.getenv("SIM_TCP_PORT", "9100"))
 
-app = FastAPI(title="Device Simulator", version="0.2.0")
-BASE_DIR = Path(__file__).resolve().parent
-templates = Jinja2Templates(directory=str(BASE_DIR / "ui" / "templates"))
+# optional: capture all data-plane frames from startup
+CAPTURE_PATH = os.getenv("SIM_CAPTURE_PATH")
+
+# live event stream: max state pushes per second / aggregated metrics period
+EVENTS_MAX_HZ = float(os.getenv("SIM_EVENTS_MAX_HZ", "10"))
+EVENTS_METRICS_INTERVAL_S = float(os.getenv("SIM_EVENTS_METRICS_INTERVAL_S", "1.0"))
 
-app.mount("/ui/static", StaticFiles(directory=str(BASE_DIR / "ui" / "static")), name="ui-static")
+app = FastAPI(title="Device Simulator", version="0.2.0")
 
-@app.get("/ui", response_class=HTMLResponse)
-def ui_home(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+# console (templates + static) is built on first /ui request; headless runs never import Jinja2
+app.mount("/ui", LazyConsole(), name="ui")
 
 MODEL = SimModel()
+METRICS = sm.SimMetrics()
+EVENTS = EventHub(
+    # status() is defined below; resolved at call time
+    lambda: status(),
+    METRICS.totals,
+    max_hz=EVENTS_MAX_HZ,
+    metrics_interval_s=EVENTS_METRICS_INTERVAL_S,
+)
+
+# active frame capture (None = off); only touched on the event loop
+CAPTURE: cap.CaptureWriter | None = None
+
+# active/last fault schedule (None = never uploaded); only touched on the event loop
+SCHEDULE: ScheduleRunner | None = None
 
 class FaultsIn(BaseModel):
     delay_ms: int = Field(0, ge=0, le=5000)
@@ -53,17 +78,20 @@ def status():
             "drop_rate": MODEL.faults.drop_rate,
             "corrupt_rate": MODEL.faults.corrupt_rate,
         },
+        "schedule": SCHEDULE.progress() if SCHEDULE is not None else None,
     }
 
 @app.post("/control/reset")
 def reset():
     MODEL.reset()
+    EVENTS.notify()
     return {"status": "reset", "reset_count": MODEL.reset_count, "state": MODEL.state.value}
 
 @app.post("/control/configure")
 def configure():
     try:
         MODEL.configure()
+        EVENTS.notify()
         return {"status": "configured", "state": MODEL.state.value}
     except ValueError as e:
         raise HTTPException(status_code=409, detail=str(e))
@@ -72,6 +100,7 @@ def configure():
 def start_stream():
     try:
         MODEL.start_stream()
+        EVENTS.notify()
         return {"status": "streaming", "state": MODEL.state.value}
     except ValueError as e:
         raise HTTPException(status_code=409, detail=str(e))
@@ -80,6 +109,7 @@ def start_stream():
 def stop_stream():
     try:
         MODEL.stop_stream()
+        EVENTS.notify()
         return {"status": "stopped", "state": MODEL.state.value}
     except ValueError as e:
         raise HTTPException(status_code=409, detail=str(e))
@@ -89,20 +119,132 @@ def set_faults(f: FaultsIn):
     MODEL.faults.delay_ms = f.delay_ms
     MODEL.faults.drop_rate = f.drop_rate
     MODEL.faults.corrupt_rate = f.corrupt_rate
+    EVENTS.notify()
     return {"status": "faults_updated", "faults": f.model_dump()}
 
+class BatchOp(BaseModel):
+    op: Literal[
+        "reset", "configure", "start_stream", "stop_stream",
+        "set_faults", "reset_metrics", "stop_schedule",
+    ]
+    # only used by set_faults
+    faults: FaultsIn | None = None
+
+class BatchIn(BaseModel):
+    ops: list[BatchOp] = Field(..., min_length=1, max_length=64)
+
+def _apply_op(o: BatchOp) -> None:
+    if o.op == "reset":
+        MODEL.reset()
+    elif o.op == "configure":
+        MODEL.configure()
+    elif o.op == "start_stream":
+        MODEL.start_stream()
+    elif o.op == "stop_stream":
+        MODEL.stop_stream()
+    elif o.op == "set_faults":
+        f = o.faults or FaultsIn()
+        MODEL.faults.delay_ms = f.delay_ms
+        MODEL.faults.drop_rate = f.drop_rate
+        MODEL.faults.corrupt_rate = f.corrupt_rate
+
+# async: runs on the event loop, so UDP/TCP handlers never observe a half-applied batch
+@app.post("/control/batch")
+async def control_batch(b: BatchIn):
+    """
+    apply an ordered list of control ops in one request; all-or-nothing:
+    if any op fails, state/faults are rolled back and 409 names the failing op
+    """
+    saved_state, saved_resets, saved_faults = MODEL.state, MODEL.reset_count, replace(MODEL.faults)
+    reset_metrics = stop_sched = False
+    for i, o in enumerate(b.ops):
+        # deferred so a failed batch leaves counters/schedule untouched; nothing else
+        # runs on the loop mid-batch, so applying them last is equivalent to in-order
+        if o.op == "reset_metrics":
+            reset_metrics = True
+            continue
+        if o.op == "stop_schedule":
+            stop_sched = True
+            continue
+        try:
+            _apply_op(o)
+        except ValueError as e:
+            MODEL.state, MODEL.reset_count, MODEL.faults = saved_state, saved_resets, saved_faults
+            raise HTTPException(status_code=409, detail={"index": i, "op": o.op, "error": str(e)})
+    if reset_metrics:
+        METRICS.reset()
+    if stop_sched and SCHEDULE is not None:
+        SCHEDULE.stop()
+        await asyncio.sleep(0)
+    EVENTS.notify()
+    return {"status": "batch_applied", "applied": len(b.ops), **status()}
+
+def _dispatch(msg_type: int) -> tuple[int, bytes, str]:
+    """
+    shared UDP/TCP request handling: returns (resp_type, payload, metrics outcome)
+    state mutation happens AFTER the response is decided
+    """
+    if msg_type == mt.REQ_PING:
+        return mt.RESP_OK, b"PONG", sm.OK
+    if msg_type == mt.REQ_STATUS:
+        return mt.RESP_STATE, f"{MODEL.state.value}".encode(), sm.OK
+    if msg_type == mt.REQ_START:
+        if MODEL.state != DeviceState.CONFIGURED:
+            return mt.RESP_ERR, b"BAD_STATE", sm.BAD_STATE
+        MODEL.start_stream()
+        EVENTS.notify()
+        return mt.RESP_OK, b"STREAMING", sm.OK
+    if msg_type == mt.REQ_STOP:
+        if MODEL.state != DeviceState.STREAMING:
+            return mt.RESP_ERR, b"BAD_STATE", sm.BAD_STATE
+        MODEL.stop_stream()
+        EVENTS.notify()
+        return mt.RESP_OK, b"STOPPED", sm.OK
+    return mt.RESP_ERR, b"UNKNOWN_REQ", sm.UNKNOWN_REQ
+
+def _corrupt_roll() -> bool:
+    return MODEL.faults.corrupt_rate > 0 and random.random() < MODEL.faults.corrupt_rate
+
+def _response_packet(resp_type: int, payload: bytes, stamps: tuple[int, int] | None, corrupt: bool) -> bytes:
+    """
+    encode the response at send time: timed requests (stamps = recv/dispatch ns)
+    get a send stamp taken now; corruption is applied AFTER ENCODING (forces CRC mismatch)
+    """
+    ts = None if stamps is None else Timestamps(stamps[0], stamps[1], time.perf_counter_ns())
+    resp_pkt = encode_frame(resp_type, payload, ts)
+    if corrupt and len(resp_pkt) > 10:
+        b = bytearray(resp_pkt)
+        b[8] ^= 0xFF
+        return bytes(b)
+    return resp_pkt
+
 class UdpProto(asyncio.DatagramProtocol):
     def connection_made(self, transport):
         # required: stored transport for later tosend()
         self.transport = transport
 
+    def _send_delayed(self, resp: tuple, addr, capture: cap.CaptureWriter | None, rid: int, flags: int) -> None:
+        METRICS.pending_delayed_sends -= 1
+        resp_pkt = _response_packet(*resp)
+        self.transport.sendto(resp_pkt, addr)
+        if capture is not None:
+            capture.record(cap.RESPONSE, cap.UDP, addr, resp_pkt, rid, flags)
+
+    @profiling.hook("sim.udp.datagram_received")
     def datagram_received(self, data: bytes, addr):
+        recv_ns = time.perf_counter_ns()
+        t0 = recv_ns / 1e9
         loop = asyncio.get_running_loop()
 
-        # drop packet
+        capture, rid = CAPTURE, 0
+        if capture is not None:
+            rid = capture.next_id()
+            capture.record(cap.REQUEST, cap.UDP, addr, data, rid)
+
+        # drop packet (type byte peeked from the raw header for the counter)
         if MODEL.faults.drop_rate > 0:
-            import random
             if random.random() < MODEL.faults.drop_rate:
+                METRICS.observe("udp", sm.msg_type_label(data[3] if len(data) > 3 else None), sm.DROPPED)
                 return
 
         # decode request frame
@@ -110,53 +252,41 @@ class UdpProto(asyncio.DatagramProtocol):
             req = decode_frame(data)
         except FrameError:
             # if request is unframed/corrupt, ignore (device would drop)
+            METRICS.observe("udp", sm.UNKNOWN, sm.FRAME_ERROR)
             return
 
         # determine response
-        if req.msg_type == mt.REQ_PING:
-            resp_type, payload = mt.RESP_OK, b"PONG"
-        elif req.msg_type == mt.REQ_STATUS:
-            resp_type, payload = mt.RESP_STATE, f"{MODEL.state.value}".encode()
-        elif req.msg_type == mt.REQ_START:
-            if MODEL.state != DeviceState.CONFIGURED:
-                resp_type, payload = mt.RESP_ERR, b"BAD_STATE"
-            else:
-                # prepare response FIRST
-                resp_type, payload = mt.RESP_OK, b"STREAMING"
-                # mutate state AFTER response is decided
-                MODEL.start_stream()
-        elif req.msg_type == mt.REQ_STOP:
-            if MODEL.state != DeviceState.STREAMING:
-                resp_type, payload = mt.RESP_ERR, b"BAD_STATE"
-            else:
-                resp_type, payload = mt.RESP_OK, b"STOPPED"
-                MODEL.stop_stream()
-        else:
-            resp_type, payload = mt.RESP_ERR, b"UNKNOWN_REQ"
-
-        resp_pkt = encode_frame(resp_type, payload)
-
-        # corrupt response AFTER ENCODING (forces CRC mismatch)
-        if MODEL.faults.corrupt_rate > 0:
-            import random
-            if random.random() < MODEL.faults.corrupt_rate and len(resp_pkt) > 10:
-                b = bytearray(resp_pkt)
-                b[8] ^= 0xFF
-                resp_pkt = bytes(b)
+        resp_type, payload, outcome = _dispatch(req.msg_type)
+        stamps = (recv_ns, time.perf_counter_ns()) if req.timestamps is not None else None
+
+        flags = 0
+        corrupt = _corrupt_roll()
+        if corrupt:
+            outcome = sm.CORRUPTED
+            flags |= cap.FLAG_CORRUPTED
+        resp = (resp_type, payload, stamps, corrupt)
             
         # schedule send (with optional delay)
         delay = MODEL.faults.delay_ms / 1000.0
         if delay > 0:
-            loop.call_later(delay, self.transport.sendto, resp_pkt, addr)
+            METRICS.pending_delayed_sends += 1
+            loop.call_later(delay, self._send_delayed, resp, addr, capture, rid, flags | cap.FLAG_DELAYED)
         else:
+            resp_pkt = _response_packet(*resp)
             self.transport.sendto(resp_pkt, addr)
+            if capture is not None:
+                capture.record(cap.RESPONSE, cap.UDP, addr, resp_pkt, rid, flags)
+
+        METRICS.observe("udp", sm.msg_type_label(req.msg_type), outcome, time.perf_counter() - t0)
 
 
 _HDR_FMT = "!2sBBH"
 _HDR_SIZE = struct.calcsize(_HDR_FMT)
 _CRC_SIZE = 4 # framing.py uses '!I' -> 4 bytes
 
+@profiling.hook("sim.tcp.handle_client")
 async def _handle_tcp_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    METRICS.tcp_active_connections += 1
     try:
         # read fixed header
         hdr = await reader.readexactly(_HDR_SIZE)
@@ -164,14 +294,22 @@ async def _handle_tcp_client(reader: asyncio.StreamReader, writer: asyncio.Strea
         # parse to know how much more to read
         magic, ver, msg_type, length = struct.unpack(_HDR_FMT, hdr)
 
-        # read payload + CRC (TCP has no datagram boundaries)
-        rest = await reader.readexactly(length + _CRC_SIZE)
+        # read payload (+ timestamp trailer) + CRC (TCP has no datagram boundaries)
+        rest = await reader.readexactly(length + trailer_size(ver) + _CRC_SIZE)
         packet = hdr + rest
+        recv_ns = time.perf_counter_ns()
+        t0 = recv_ns / 1e9
+
+        capture, rid = CAPTURE, 0
+        if capture is not None:
+            peer = writer.get_extra_info("peername")
+            rid = capture.next_id()
+            capture.record(cap.REQUEST, cap.TCP, peer, packet, rid)
 
         # drop fault: simualte "no response" by closing immediately
         if MODEL.faults.drop_rate > 0:
-            import random
             if random.random() < MODEL.faults.drop_rate:
+                METRICS.observe("tcp", sm.msg_type_label(msg_type), sm.DROPPED)
                 writer.close()
                 await writer.wait_closed()
                 return
@@ -180,50 +318,49 @@ async def _handle_tcp_client(reader: asyncio.StreamReader, writer: asyncio.Strea
         try:
             req = decode_frame(packet)
         except FrameError:
+            METRICS.observe("tcp", sm.UNKNOWN, sm.FRAME_ERROR)
             writer.close()
             await writer.wait_closed()
             return
+
         # determine response (same logic as UDP)
-        if req.msg_type == mt.REQ_PING:
-            resp_type, payload = mt.RESP_OK, b"PONG"
-        elif req.msg_type == mt.REQ_STATUS:
-            resp_type, payload = mt.RESP_STATE, f"{MODEL.state.value}".encode()
-        elif req.msg_type == mt.REQ_START:
-            if MODEL.state != DeviceState.CONFIGURED:
-                resp_type, payload = mt.RESP_ERR, b"BAD_STATE"
-            else:
-                resp_type, payload = mt.RESP_OK, b"STREAMING"
-                MODEL.start_stream()
-        elif req.msg_type == mt.REQ_STOP:
-            if MODEL.state != DeviceState.STREAMING:
-                resp_type, payload = mt.RESP_ERR, b"BAD_STATE"
-            else:
-                resp_type, payload = mt.RESP_OK, b"STOPPED"
-                MODEL.stop_stream()
-        else:
-            resp_type, payload = mt.RESP_ERR, b"UKNOWN_REQ"
-        resp_pkt = encode_frame(resp_type, payload)
+        resp_type, payload, outcome = _dispatch(req.msg_type)
+        if outcome == sm.UNKNOWN_REQ:
+            # the TCP listener has always answered with this spelling; clients match on it
+            payload = b"UKNOWN_REQ"
+        stamps = (recv_ns, time.perf_counter_ns()) if req.timestamps is not None else None
 
-        # corrupt respojnse after encoding (forces CRC mismatch)
-        if MODEL.faults.corrupt_rate > 0:
-            import random
-            if random.random() < MODEL.faults.corrupt_rate and len(resp_pkt) > 10:
-                b = bytearray(resp_pkt)
-                b[8] ^= 0xFF
-                resp_pkt = bytes(b)
+        flags = 0
+        corrupt = _corrupt_roll()
+        if corrupt:
+            outcome = sm.CORRUPTED
+            flags |= cap.FLAG_CORRUPTED
+
+        # service time excludes the injected delay so server cost stays visible under faults
+        service_s = time.perf_counter() - t0
 
         # delay without blocking event loop
         delay = MODEL.faults.delay_ms / 1000.0
         if delay > 0:
-            await asyncio.sleep(delay)
-
+            flags |= cap.FLAG_DELAYED
+            METRICS.pending_delayed_sends += 1
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                METRICS.pending_delayed_sends -= 1
+
+        resp_pkt = _response_packet(resp_type, payload, stamps, corrupt)
         writer.write(resp_pkt)
         await writer.drain()
+        if capture is not None:
+            capture.record(cap.RESPONSE, cap.TCP, peer, resp_pkt, rid, flags)
+        METRICS.observe("tcp", sm.msg_type_label(req.msg_type), outcome, service_s)
 
     except asyncio.IncompleteReadError:
         # client disocnnected early
         pass
     finally:
+        METRICS.tcp_active_connections -= 1
         writer.close()
         try:
             await writer.wait_closed()
@@ -251,6 +388,215 @@ def get_faults():
         "corrupt_rate": MODEL.faults.corrupt_rate,
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_prometheus():
+    # async on purpose: runs on the loop that mutates METRICS, so the snapshot is consistent
+    return PlainTextResponse(METRICS.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/json")
+async def metrics_json():
+    return METRICS.snapshot()
+
+@app.get("/events")
+async def events():
+    """
+    server-sent events: `state` on state/fault changes (coalesced to
+    SIM_EVENTS_MAX_HZ) and `metrics` aggregates every SIM_EVENTS_METRICS_INTERVAL_S
+    """
+    sub = EVENTS.subscribe()
+
+    async def stream():
+        try:
+            while True:
+                for kind, data in await sub.get():
+                    yield f"event: {kind}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            EVENTS.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+@app.post("/control/metrics/reset")
+async def reset_metrics():
+    METRICS.reset()
+    return {"status": "metrics_reset"}
+
+class FaultsPatchIn(BaseModel):
+    delay_ms: int | None = Field(None, ge=0, le=5000)
+    drop_rate: float | None = Field(None, ge=0.0, le=1.0)
+    corrupt_rate: float | None = Field(None, ge=0.0, le=1.0)
+
+class ScheduleStepIn(BaseModel):
+    at_ms: int = Field(..., ge=0)
+    ramp_ms: int = Field(0, ge=0)
+    faults: FaultsPatchIn | None = None
+    action: Literal["reset", "configure", "start_stream", "stop_stream"] | None = None
+
+class ScheduleIn(BaseModel):
+    name: str | None = None
+    steps: list[ScheduleStepIn] = Field(..., min_length=1, max_length=1000)
+    loop: bool = False
+    tick_ms: int = Field(50, ge=5, le=10000)
+    duration_ms: int | None = Field(None, ge=1)
+
+# schedule endpoints are async: the runner task lives on the loop that serves UDP/TCP
+@app.post("/control/schedule")
+async def set_schedule(body: ScheduleIn):
+    """
+    upload a timeline of fault/state changes that the simulator runs itself;
+    replaces (and stops) any running schedule
+    """
+    global SCHEDULE
+    try:
+        sched = Schedule(
+            steps=tuple(
+                ScheduleStep(
+                    at_ms=st.at_ms,
+                    ramp_ms=st.ramp_ms,
+                    faults=st.faults.model_dump(exclude_none=True) if st.faults else {},
+                    action=st.action,
+                )
+                for st in body.steps
+            ),
+            name=body.name,
+            loop=body.loop,
+            tick_ms=body.tick_ms,
+            duration_ms=body.duration_ms,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if SCHEDULE is not None:
+        SCHEDULE.stop()
+    SCHEDULE = ScheduleRunner(sched, MODEL, on_change=EVENTS.notify)
+    SCHEDULE.start()
+    return {"status": "schedule_started", "schedule": SCHEDULE.progress()}
+
+@app.post("/control/schedule/stop")
+async def stop_schedule():
+    # faults keep whatever value the schedule last applied
+    if SCHEDULE is None or not SCHEDULE.running:
+        raise HTTPException(status_code=409, detail="no schedule running")
+    SCHEDULE.stop()
+    await asyncio.sleep(0)
+    EVENTS.notify()
+    return {"status": "schedule_stopped", "schedule": SCHEDULE.progress()}
+
+@app.get("/control/schedule")
+async def get_schedule():
+    return {"schedule": SCHEDULE.progress() if SCHEDULE is not None else None}
+
+class CaptureIn(BaseModel):
+    path: str | None = None
+
+def _default_capture_path() -> Path:
+    return Path("artifacts") / "capture" / f"sim-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.qacap"
+
+def _start_capture(path: str | Path) -> None:
+    global CAPTURE
+    if CAPTURE is not None:
+        CAPTURE.close()
+    CAPTURE = cap.CaptureWriter(path)
+
+def _stop_capture() -> dict | None:
+    global CAPTURE
+    c, CAPTURE = CAPTURE, None
+    if c is None:
+        return None
+    c.close()
+    return c.stats()
+
+# capture endpoints are async so they swap CAPTURE on the loop thread (no races with handlers)
+@app.post("/control/capture/start")
+async def start_capture(c: CaptureIn | None = None):
+    path = (c.path if c and c.path else None) or _default_capture_path()
+    _start_capture(path)
+    return {"status": "capturing", "path": str(path)}
+
+@app.post("/control/capture/stop")
+async def stop_capture():
+    stats = _stop_capture()
+    if stats is None:
+        raise HTTPException(status_code=409, detail="capture not active")
+    return {"status": "stopped", **stats}
+
+@app.get("/control/capture")
+async def capture_status():
+    if CAPTURE is None:
+        return {"active": False}
+    return {"active": True, **CAPTURE.stats()}
+
+class ProfileIn(BaseModel):
+    mode: Literal["sample", "deterministic"] = "sample"
+    interval_ms: float = Field(default=1.0, gt=0)
+    # where stop writes the collapsed stacks
+    path: str | None = None
+
+def _default_profile_path() -> Path:
+    return Path("artifacts") / "profiles" / f"sim-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.folded"
+
+# profiling covers the UDP/TCP handlers and framing (see qaharness.utils.profiling)
+PROFILE_PATH: Path | None = None
+
+@app.post("/control/profile/start")
+async def start_profile(p: ProfileIn | None = None):
+    global PROFILE_PATH
+    p = p or ProfileIn()
+    try:
+        profiling.start(p.mode, interval_s=p.interval_ms / 1000.0)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    PROFILE_PATH = Path(p.path) if p.path else _default_profile_path()
+    return {"status": "profiling", "mode": p.mode, "path": str(PROFILE_PATH)}
+
+@app.post("/control/profile/stop")
+async def stop_profile():
+    global PROFILE_PATH
+    path, PROFILE_PATH = PROFILE_PATH, None
+    summary = profiling.stop(path)
+    if summary is None:
+        raise HTTPException(status_code=409, detail="profiling not active")
+    return {"status": "stopped", **summary}
+
+@app.get("/control/profile")
+async def profile_status():
+    p = profiling.active()
+    if p is None:
+        return {"active": False}
+    return {"active": True, "path": str(PROFILE_PATH) if PROFILE_PATH else None, **p.summary()}
+
+@app.on_event("shutdown")
+async def stop_profile_on_shutdown():
+    global PROFILE_PATH
+    if PROFILE_PATH is not None:
+        profiling.stop(PROFILE_PATH)
+        PROFILE_PATH = None
+
+@app.on_event("startup")
+async def start_capture_from_env():
+    if CAPTURE_PATH:
+        _start_capture(CAPTURE_PATH)
+
+@app.on_event("shutdown")
+async def stop_capture_on_shutdown():
+    _stop_capture()
+
+@app.on_event("shutdown")
+async def stop_schedule_on_shutdown():
+    if SCHEDULE is not None:
+        SCHEDULE.stop()
+
+@app.on_event("startup")
+async def start_events():
+    EVENTS.start()
+
+@app.on_event("shutdown")
+async def stop_events():
+    await EVENTS.stop()
+
 @app.on_event("startup")
 async def start_udp():
     loop = asyncio.get_running_loop()
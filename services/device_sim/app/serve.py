@@ -0,0 +1,116 @@
+"""
+Run the simulator as a standalone process and report where it is listening.
+
+    python -m services.device_sim.app.serve [--host H] [--http-port N] [--udp-port N] [--tcp-port N]
+                                            [--daemon-file PATH] [--idle-ttl-s S]
+
+Ports default to 0 (ephemeral). Once HTTP, UDP and TCP are all bound, one
+JSON line with the endpoints is printed to stdout; the process then runs
+until SIGTERM/SIGINT. Fixtures read that line instead of picking "free"
+ports up front, so parallel pytest-xdist workers can never race for a port.
+
+--daemon-file also registers the endpoints there (see daemon.py) and
+--idle-ttl-s exits after that many seconds without HTTP or UDP/TCP traffic.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import signal
+import threading
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from services.device_sim.app import daemon
+from services.device_sim.app.embedded import EmbeddedSimulator
+
+
+class _Activity:
+    """
+    last time the simulator saw traffic: HTTP requests stamp it directly (ASGI
+    middleware), data-plane traffic is noticed as a change in the request counters
+    """
+    def __init__(self, metrics):
+        self._metrics = metrics
+        self._last = time.monotonic()
+        self._seen = -1
+
+    def touch(self) -> None:
+        self._last = time.monotonic()
+
+    def idle_s(self) -> float:
+        try:
+            seen = sum(list(self._metrics.requests.values()))
+        except RuntimeError:
+            # counters changed size under us: that is traffic too
+            seen = self._seen + 1
+        if seen != self._seen:
+            self._seen = seen
+            self.touch()
+        return time.monotonic() - self._last
+
+    def middleware(self, app):
+        async def _app(scope, receive, send):
+            if scope["type"] == "http":
+                self.touch()
+            await app(scope, receive, send)
+        return _app
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m services.device_sim.app.serve")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--http-port", type=int, default=0)
+    ap.add_argument("--udp-port", type=int, default=0)
+    ap.add_argument("--tcp-port", type=int, default=0)
+    ap.add_argument("--log-level", default="warning")
+    ap.add_argument("--daemon-file", type=Path, default=None, help="register endpoints here (daemon mode)")
+    ap.add_argument("--idle-ttl-s", type=float, default=0.0, help="exit after this long without traffic; 0 = never")
+    args = ap.parse_args(argv)
+
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+    activity = None
+    if args.idle_ttl_s > 0:
+        from services.device_sim.app import main as sim_main
+
+        activity = _Activity(sim_main.METRICS)
+        sim_main.app.add_middleware(activity.middleware)
+
+    sim = EmbeddedSimulator(
+        args.host,
+        http_port=args.http_port,
+        udp_port=args.udp_port,
+        tcp_port=args.tcp_port,
+        log_level=args.log_level,
+    )
+    ep = sim.start()
+    try:
+        if args.daemon_file is not None:
+            daemon.write_registry(args.daemon_file, {
+                "pid": os.getpid(),
+                "proc_start": daemon.process_start_time(os.getpid()),
+                **asdict(ep),
+                "fingerprint": daemon.source_fingerprint(),
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "idle_ttl_s": args.idle_ttl_s,
+            })
+        print(json.dumps(asdict(ep)), flush=True)
+        # short waits keep the main thread responsive to signals on every platform
+        while not stop.wait(0.5):
+            if activity is not None and activity.idle_s() > args.idle_ttl_s:
+                print(f"idle for {args.idle_ttl_s:g}s, exiting", flush=True)
+                break
+    finally:
+        if args.daemon_file is not None:
+            daemon.remove_registry(args.daemon_file, os.getpid())
+        sim.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+
+class LazyConsole:
+    """
+    ASGI shim mounted at /ui: the console sub-application (Jinja2 templates,
+    StaticFiles) is imported and built on the first /ui request, so headless
+    simulator instances never pay for it
+    """
+    def __init__(self) -> None:
+        self._app = None
+
+    async def __call__(self, scope, receive, send) -> None:
+        if self._app is None:
+            from services.device_sim.app.ui.console import create_console_app
+            self._app = create_console_app()
+        await self._app(scope, receive, send)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse
+from fastapi.staticfiles import StaticFiles
+from fastapi.templating import Jinja2Templates
+
+UI_DIR = Path(__file__).resolve().parent
+
+
+def create_console_app() -> FastAPI:
+    """
+    control console sub-application; mounted under /ui by the simulator
+    """
+    console = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+    templates = Jinja2Templates(directory=str(UI_DIR / "templates"))
+
+    console.mount("/static", StaticFiles(directory=str(UI_DIR / "static")), name="ui-static")
+
+    @console.get("/", response_class=HTMLResponse)
+    def ui_home(request: Request):
+        return templates.TemplateResponse(request, "index.html")
+
+    return console
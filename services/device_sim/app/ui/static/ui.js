@@ -11,25 +11,35 @@ async function api(method, path, body) {
   return { ok: res.ok, status: res.status, text, json };
 }
 
+function renderState(data) {
+  document.getElementById("state").textContent = data?.state ?? "(unknown)";
+  document.getElementById("rawStatus").textContent = JSON.stringify(data, null, 2);
+  document.getElementById("faultsView").textContent = JSON.stringify(data?.faults ?? {}, null, 2);
+}
+
+function renderMetrics(data) {
+  document.getElementById("metricsView").textContent = JSON.stringify(data, null, 2);
+}
+
 async function refreshStatus() {
-  const r = await api("GET", "/health");
-  const state = r.json?.state ?? "(unknown)";
-  document.getElementById("state").textContent = state;
-  document.getElementById("rawStatus").textContent = r.text;
+  // manual one-shot refresh; live updates arrive over /events
+  const r = await api("GET", "/status");
+  if (r.ok) renderState(r.json);
 }
 
 async function showControlResult(label, r) {
+  // no follow-up polling: the resulting state/fault change is pushed over /events
   const out = `${label}: HTTP ${r.status}\n${r.text}`;
   document.getElementById("controlResult").textContent = out;
-  await refreshStatus();
-  await refreshFaults(); // optional: if status includes faults or separate endpoint
 }
 
-async function refreshFaults() {
-  // If you have GET /control/faults or embed in /health, adjust accordingly.
-  // If not available, you can keep UI "optimistic" and show last applied values.
-  const r = await api("GET", "/control/faults");
-  document.getElementById("faultsView").textContent = r.ok ? r.text : "(no /control/faults GET endpoint)";
+function connectEvents() {
+  // one long-lived connection replaces GET /health + GET /control/faults after each action.
+  // EventSource reconnects on its own; the server re-sends current state on (re)connect.
+  const es = new EventSource("/events");
+  es.addEventListener("state", (e) => renderState(JSON.parse(e.data)));
+  es.addEventListener("metrics", (e) => renderMetrics(JSON.parse(e.data)));
+  return es;
 }
 
 function readFaultInputs() {
@@ -63,6 +73,5 @@ window.addEventListener("DOMContentLoaded", async () => {
   document.getElementById("clearFaults").onclick = async () =>
     showControlResult("faults(clear)", await api("POST", "/control/faults", { drop_rate: 0, delay_ms: 0, corrupt_rate: 0 }));
 
-  await refreshStatus();
-  await refreshFaults();
+  connectEvents();
 });
@@ -0,0 +1,5 @@
+import sys
+
+from qaharness.cli import main
+
+sys.exit(main())
@@ -1,6 +1,54 @@
 from __future__ import annotations
+import json
+from typing import Iterator
+
 import httpx
 
+class ControlBatch:
+    """
+    builder for POST /control/batch: ops are applied in order, atomically, in one round-trip
+
+        sim_api.batch().set_faults(drop_rate=0.2).reset().send()
+    """
+    def __init__(self, client: SimApiClient):
+        self._client = client
+        self._ops: list[dict] = []
+
+    def __len__(self) -> int:
+        return len(self._ops)
+
+    def _add(self, op: str, **fields) -> ControlBatch:
+        self._ops.append({"op": op, **fields})
+        return self
+
+    def reset(self) -> ControlBatch:
+        return self._add("reset")
+
+    def configure(self) -> ControlBatch:
+        return self._add("configure")
+
+    def start_stream(self) -> ControlBatch:
+        return self._add("start_stream")
+
+    def stop_stream(self) -> ControlBatch:
+        return self._add("stop_stream")
+
+    def set_faults(self, *, delay_ms: int = 0, drop_rate: float = 0.0, corrupt_rate: float = 0.0) -> ControlBatch:
+        return self._add("set_faults", faults={
+            "delay_ms": delay_ms,
+            "drop_rate": drop_rate,
+            "corrupt_rate": corrupt_rate,
+        })
+
+    def reset_metrics(self) -> ControlBatch:
+        return self._add("reset_metrics")
+
+    def stop_schedule(self) -> ControlBatch:
+        return self._add("stop_schedule")
+
+    def send(self) -> dict:
+        return self._client.send_batch(self._ops)
+
 class SimApiClient:
     def __init__(self, base_url: str, timeout_s: float = 2.0):
         self._client = httpx.Client(base_url=base_url, timeout=timeout_s)
@@ -46,6 +94,110 @@ class SimApiClient:
         })
         r.raise_for_status()
         return r.json()
+
+    def batch(self) -> ControlBatch:
+        return ControlBatch(self)
+
+    def send_batch(self, ops: list[dict]) -> dict:
+        r = self._client.post("/control/batch", json={"ops": ops})
+        r.raise_for_status()
+        return r.json()
+
+    def metrics(self) -> dict:
+        r = self._client.get("/metrics/json")
+        r.raise_for_status()
+        return r.json()
+
+    def metrics_text(self) -> str:
+        r = self._client.get("/metrics")
+        r.raise_for_status()
+        return r.text
+
+    def set_schedule(
+        self,
+        steps: list[dict],
+        *,
+        loop: bool = False,
+        tick_ms: int = 50,
+        duration_ms: int | None = None,
+        name: str | None = None,
+    ) -> dict:
+        """
+        steps: [{"at_ms": 0, "ramp_ms": 0, "faults": {...}, "action": "configure"}, ...]
+        """
+        r = self._client.post("/control/schedule", json={
+            "name": name,
+            "steps": steps,
+            "loop": loop,
+            "tick_ms": tick_ms,
+            "duration_ms": duration_ms,
+        })
+        r.raise_for_status()
+        return r.json()
+
+    def stop_schedule(self) -> dict:
+        r = self._client.post("/control/schedule/stop")
+        r.raise_for_status()
+        return r.json()
+
+    def schedule_status(self) -> dict | None:
+        r = self._client.get("/control/schedule")
+        r.raise_for_status()
+        return r.json()["schedule"]
+
+    def start_capture(self, path: str | None = None) -> dict:
+        r = self._client.post("/control/capture/start", json={"path": path})
+        r.raise_for_status()
+        return r.json()
+
+    def stop_capture(self) -> dict:
+        r = self._client.post("/control/capture/stop")
+        r.raise_for_status()
+        return r.json()
+
+    def capture_status(self) -> dict:
+        r = self._client.get("/control/capture")
+        r.raise_for_status()
+        return r.json()
+
+    def start_profile(self, mode: str = "sample", *, interval_ms: float = 1.0, path: str | None = None) -> dict:
+        """
+        mode: "sample" or "deterministic"; path: where stop_profile() writes the collapsed stacks
+        """
+        r = self._client.post("/control/profile/start", json={"mode": mode, "interval_ms": interval_ms, "path": path})
+        r.raise_for_status()
+        return r.json()
+
+    def stop_profile(self) -> dict:
+        r = self._client.post("/control/profile/stop")
+        r.raise_for_status()
+        return r.json()
+
+    def profile_status(self) -> dict:
+        r = self._client.get("/control/profile")
+        r.raise_for_status()
+        return r.json()
+
+    def iter_events(self) -> Iterator[tuple[str, dict]]:
+        """
+        yield (event, data) pairs from the simulator's server-sent event stream
+        """
+        with self._client.stream("GET", "/events", timeout=httpx.Timeout(self._client.timeout.connect, read=None)) as r:
+            r.raise_for_status()
+            kind, data = None, []
+            for line in r.iter_lines():
+                if line.startswith("event:"):
+                    kind = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    data.append(line[len("data:"):].strip())
+                elif not line and kind is not None:
+                    yield kind, json.loads("\n".join(data))
+                    kind, data = None, []
+
+    def reset_metrics(self) -> dict:
+        r = self._client.post("/control/metrics/reset")
+        r.raise_for_status()
+        return r.json()
     
     
 
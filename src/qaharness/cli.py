@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from qaharness.config.settings import get_settings
+
+
+def _host_port(value: str) -> tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    if not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"expected HOST:PORT, got {value!r}")
+    return host, int(port)
+
+
+def _speed(value: str) -> float:
+    # "max" -> 0 (no pacing); "10x" and "10" both mean 10x real time
+    if value.lower() == "max":
+        return 0.0
+    return float(value.lower().rstrip("x"))
+
+
+def _cmd_replay(args: argparse.Namespace) -> int:
+    from qaharness.transport.replay import replay_capture
+
+    s = get_settings()
+    udp_addr = None if args.no_udp else (args.udp or (s.sim_udp_host, s.sim_udp_port))
+    tcp_addr = None if args.no_tcp else (args.tcp or (s.sim_tcp_host, s.sim_tcp_port))
+
+    report = replay_capture(
+        args.capture,
+        udp_addr=udp_addr,
+        tcp_addr=tcp_addr,
+        speed=args.speed,
+        window=args.window,
+        timeout_s=args.timeout_s,
+        check=not args.no_check,
+    )
+    out = report.as_dict()
+    out["mismatches"] = report.mismatches
+    print(json.dumps(out, indent=2))
+    return 0 if report.ok or args.no_check else 1
+
+
+def _open_store(db: str | None):
+    from qaharness.reporting import ShardedResults, SqlStoreConfig
+
+    # spans the monthly shards too, so history reads work whether or not sharding is on
+    try:
+        return ShardedResults(db or SqlStoreConfig().db_path)
+    except FileNotFoundError as e:
+        raise SystemExit(str(e))
+
+
+def _cmd_trend(args: argparse.Namespace) -> int:
+    from qaharness.reporting.trends import rolling_baseline
+
+    store = _open_store(args.db)
+    try:
+        series = store.metric_series(args.metric, nodeid=args.nodeid, last=args.last)
+    finally:
+        store.close()
+
+    out = {}
+    for nodeid, points in series.items():
+        baselines = rolling_baseline([p["value"] for p in points], args.window)
+        for p, b in zip(points, baselines):
+            p["baseline_median"] = b.median if b else None
+            p["baseline_mad"] = b.mad if b else None
+        out[nodeid] = points
+    print(json.dumps({"metric": args.metric, "window": args.window, "series": out}, indent=2))
+    return 0
+
+
+def _cmd_regress(args: argparse.Namespace) -> int:
+    from qaharness.reporting.trends import DEFAULT_METRICS, detect_regressions
+
+    store = _open_store(args.db)
+    try:
+        run_id = args.run_id or store.latest_run_id()
+        flags = detect_regressions(
+            store,
+            run_id,
+            metrics=args.metric or DEFAULT_METRICS,
+            window=args.window,
+            k=args.k,
+            min_history=args.min_history,
+            min_rel_change=args.min_rel_change,
+        )
+    finally:
+        store.close()
+
+    print(json.dumps({
+        "run_id": run_id,
+        "regressions": [f.as_dict() for f in flags],
+    }, indent=2))
+    return 1 if flags else 0
+
+
+def _cmd_retention(args: argparse.Namespace) -> int:
+    from qaharness.reporting import RetentionPolicy
+
+    policy = RetentionPolicy(
+        raw_days=args.raw_days,
+        run_rollup_days=args.run_rollup_days,
+        vacuum_pages=args.vacuum_pages,
+    )
+    results = _open_store(args.db)
+    try:
+        if args.enable_incremental_vacuum:
+            results.enable_incremental_vacuum()
+        out = results.apply_retention(policy)
+    finally:
+        results.close()
+    print(json.dumps(out, indent=2))
+    return 0
+
+
+def _cmd_load(args: argparse.Namespace) -> int:
+    from qaharness.load import LoadConfig, run_load, run_load_multiprocess, store_report
+    from qaharness.reporting import SqlStore, SqlStoreConfig
+
+    s = get_settings()
+    if args.transport == "udp":
+        addr = args.udp or (s.sim_udp_host, s.sim_udp_port)
+    else:
+        addr = args.tcp or (s.sim_tcp_host, s.sim_tcp_port)
+    try:
+        cfg = LoadConfig(
+            transport=args.transport,
+            addr=addr,
+            msg=args.msg,
+            payload=bytes.fromhex(args.payload_hex),
+            rate=args.rate,
+            duration_s=args.duration_s,
+            timeout_s=args.timeout_s,
+            max_in_flight=args.max_in_flight,
+        )
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    if args.workers == 1:
+        report = run_load(cfg)
+    else:
+        report = run_load_multiprocess(cfg, args.workers or None, pin_cpus=not args.no_pin)
+    out = report.as_dict()
+    if not args.no_store:
+        store = SqlStore(SqlStoreConfig(db_path=Path(args.db)) if args.db else None)
+        try:
+            out["run_id"] = store_report(store, report)
+        finally:
+            store.close()
+    print(json.dumps(out, indent=2))
+    return 0 if report.success_rate >= args.min_success_rate else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="qaharness", description="QA harness tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("replay", help="re-send a simulator capture log and check responses")
+    p.add_argument("capture", help="path to a .qacap capture file")
+    p.add_argument("--udp", type=_host_port, help="UDP target HOST:PORT (default: settings)")
+    p.add_argument("--tcp", type=_host_port, help="TCP target HOST:PORT (default: settings)")
+    p.add_argument("--no-udp", action="store_true", help="skip UDP records")
+    p.add_argument("--no-tcp", action="store_true", help="skip TCP records")
+    p.add_argument("--speed", type=_speed, default=1.0, help="1, Nx, or 'max' (default: 1)")
+    p.add_argument("--window", type=int, default=1, help="requests in flight (1 = strict order)")
+    p.add_argument("--timeout-s", type=float, default=0.5, help="per-request response timeout")
+    p.add_argument("--no-check", action="store_true", help="only send; don't compare responses")
+    p.set_defaults(func=_cmd_replay)
+
+    p = sub.add_parser("trend", help="a metric's per-test series across runs, with rolling baseline")
+    p.add_argument("metric", help="perf_metrics name, e.g. latency.p95")
+    p.add_argument("--nodeid", help="only this test")
+    p.add_argument("--last", type=int, help="newest N runs per test")
+    p.add_argument("--window", type=int, default=20, help="rolling baseline window (runs)")
+    p.add_argument("--db", help="results database (default: QA_RESULTS_DB or artifacts/results.db)")
+    p.set_defaults(func=_cmd_trend)
+
+    p = sub.add_parser("regress", help="flag metrics that drifted past k*MAD of their baseline")
+    p.add_argument("--run-id", help="run to check (default: latest finished run)")
+    p.add_argument("--metric", action="append", help="metric to check; repeatable "
+                   "(default: latency.p95, results.success_rate)")
+    p.add_argument("--window", type=int, default=20, help="baseline runs before the checked run")
+    p.add_argument("--k", type=float, default=3.0, help="allowed drift in scaled MADs")
+    p.add_argument("--min-history", type=int, default=5, help="skip tests with fewer baseline runs")
+    p.add_argument("--min-rel-change", type=float, default=0.05,
+                   help="never flag drift below this fraction of the baseline median")
+    p.add_argument("--db", help="results database (default: QA_RESULTS_DB or artifacts/results.db)")
+    p.set_defaults(func=_cmd_regress)
+
+    p = sub.add_parser("retention", help="downsample old raw telemetry and vacuum the results db")
+    p.add_argument("--raw-days", type=int, default=30, help="keep raw rows this many days")
+    p.add_argument("--run-rollup-days", type=int, help="keep per-run rollups this many days (default: forever)")
+    p.add_argument("--vacuum-pages", type=int, default=0, help="free pages to release (0 = all)")
+    p.add_argument("--enable-incremental-vacuum", action="store_true",
+                   help="one-off full VACUUM converting older files to incremental auto-vacuum")
+    p.add_argument("--db", help="results database (default: QA_RESULTS_DB or artifacts/results.db)")
+    p.set_defaults(func=_cmd_retention)
+
+    p = sub.add_parser("load", help="open-loop constant-rate load against the simulator")
+    p.add_argument("--transport", choices=("udp", "tcp"), default="udp")
+    p.add_argument("--msg", default="REQ_PING", help="request type from msgtypes, e.g. REQ_STATUS or ping")
+    p.add_argument("--payload-hex", default="", help="request payload as hex")
+    p.add_argument("--rate", type=float, default=100.0, help="target requests per second")
+    p.add_argument("--duration-s", type=float, default=10.0, help="schedule length in seconds")
+    p.add_argument("--timeout-s", type=float, default=1.0, help="per-request response timeout")
+    p.add_argument("--max-in-flight", type=int, default=1024,
+                   help="outstanding requests; later ones queue and the wait counts as latency")
+    p.add_argument("--udp", type=_host_port, help="UDP target HOST:PORT (default: settings)")
+    p.add_argument("--tcp", type=_host_port, help="TCP target HOST:PORT (default: settings)")
+    p.add_argument("--workers", type=int, default=1,
+                   help="processes sharing the schedule, one per core (0 = one per available CPU)")
+    p.add_argument("--no-pin", action="store_true", help="don't pin worker processes to CPUs")
+    p.add_argument("--min-success-rate", type=float, default=0.0,
+                   help="exit 1 if fewer requests than this fraction succeed")
+    p.add_argument("--no-store", action="store_true", help="print the report only; don't write results.db")
+    p.add_argument("--db", help="results database (default: QA_RESULTS_DB or artifacts/results.db)")
+    p.set_defaults(func=_cmd_load)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
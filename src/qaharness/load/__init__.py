@@ -0,0 +1,13 @@
+from .multiproc import available_cpus, run_load_multiprocess
+from .openloop import LoadConfig, LoadReport, parse_msg_type, run_load, run_load_async, store_report
+
+__all__ = [
+    "LoadConfig",
+    "LoadReport",
+    "available_cpus",
+    "parse_msg_type",
+    "run_load",
+    "run_load_async",
+    "run_load_multiprocess",
+    "store_report",
+]
@@ -0,0 +1,158 @@
+"""
+Multi-process load driver: one open-loop scheduler per core.
+
+Worker k of n sends requests i with i % n == k from a shared start time,
+so together the workers follow the exact single-process schedule at the
+full rate. Each worker is pinned to one CPU (where the OS supports it) and
+streams cumulative report snapshots to the parent over a queue; the parent
+keeps the newest snapshot per worker and merges them, exactly, into the
+run-level report (histograms add counter by counter).
+
+queue messages: ("ready", k) | ("progress", k, wire) | ("done", k, wire) |
+                ("error", k, message)
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing as mp
+import os
+import queue
+import time
+from typing import Any, Callable
+
+from .openloop import LoadConfig, LoadReport, run_load_async
+
+_START_GRACE_S = 0.05
+
+
+def available_cpus() -> list[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _pin(cpu: int | None) -> None:
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, {cpu})
+        except OSError:
+            pass
+
+
+def _worker(
+    k: int,
+    n: int,
+    cfg: LoadConfig,
+    cpu: int | None,
+    out: Any,
+    go: Any,
+    start_at: Any,
+    progress_interval_s: float,
+) -> None:
+    try:
+        _pin(cpu)
+        out.put(("ready", k))
+        go.wait()
+        report = asyncio.run(run_load_async(
+            cfg,
+            shard=(k, n),
+            start_at=start_at.value,
+            on_progress=lambda r: out.put(("progress", k, r.to_wire())),
+            progress_interval_s=progress_interval_s,
+        ))
+        out.put(("done", k, report.to_wire()))
+    except BaseException as e:
+        out.put(("error", k, f"{type(e).__name__}: {e}"))
+
+
+def run_load_multiprocess(
+    cfg: LoadConfig,
+    workers: int | None = None,
+    *,
+    pin_cpus: bool = True,
+    progress_interval_s: float = 1.0,
+    on_progress: Callable[[LoadReport], None] | None = None,
+    startup_timeout_s: float = 30.0,
+) -> LoadReport:
+    """
+    workers: processes to start (default: one per available CPU)
+    on_progress: called in the parent with the merged live report each time
+        a worker snapshot arrives
+    """
+    cpus = available_cpus()
+    n = workers or len(cpus)
+    if n < 1:
+        raise ValueError("workers must be >= 1")
+
+    # spawn: a forked child would inherit the parent's event loop and threads
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    go = ctx.Event()
+    start_at = ctx.Value("d", 0.0)
+    procs = [
+        ctx.Process(
+            target=_worker,
+            args=(k, n, cfg, cpus[k % len(cpus)] if pin_cpus else None, out, go, start_at, progress_interval_s),
+            name=f"qaharness-load-{k}",
+            daemon=True,
+        )
+        for k in range(n)
+    ]
+    for p in procs:
+        p.start()
+
+    snapshots: dict[int, dict[str, Any]] = {}
+    done: set[int] = set()
+
+    def _merged() -> LoadReport:
+        report = LoadReport(config=cfg, workers=n)
+        for wire in snapshots.values():
+            report.merge(LoadReport.from_wire(cfg, wire))
+        return report
+
+    def _next(deadline: float | None) -> tuple:
+        while True:
+            try:
+                return out.get(timeout=0.2)
+            except queue.Empty:
+                dead = [p.name for i, p in enumerate(procs) if i not in done and not p.is_alive()]
+                if dead:
+                    # it may have exited right after its last put
+                    try:
+                        return out.get(timeout=1.0)
+                    except queue.Empty:
+                        pass
+                    raise RuntimeError(f"load worker exited without a report: {', '.join(dead)}")
+                if deadline is not None and time.monotonic() > deadline:
+                    raise RuntimeError("load workers did not become ready")
+
+    try:
+        # start the clock only once every worker has imported and pinned
+        ready = 0
+        deadline = time.monotonic() + startup_timeout_s
+        while ready < n:
+            msg = _next(deadline)
+            if msg[0] == "error":
+                raise RuntimeError(f"load worker {msg[1]} failed: {msg[2]}")
+            ready += msg[0] == "ready"
+        start_at.value = time.time() + _START_GRACE_S
+        go.set()
+
+        while len(done) < n:
+            msg = _next(None)
+            kind, k = msg[0], msg[1]
+            if kind == "error":
+                raise RuntimeError(f"load worker {k} failed: {msg[2]}")
+            snapshots[k] = msg[2]
+            if kind == "done":
+                done.add(k)
+            if on_progress is not None:
+                on_progress(_merged())
+    finally:
+        for k, p in enumerate(procs):
+            if k not in done and p.is_alive():
+                p.terminate()
+        for p in procs:
+            p.join(timeout=5.0)
+
+    return _merged()
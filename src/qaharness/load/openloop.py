@@ -0,0 +1,416 @@
+"""
+Open-loop constant-rate load generator.
+
+Request i is due at t0 + i / rate whatever happened to the requests before
+it. Latency is measured from that intended send time, so a stalled server
+(or a client that could not send on time because max_in_flight requests
+were already outstanding) shows up as queueing delay in the histogram
+instead of silently lowering the offered rate -- the coordinated-omission
+correction. `service` latency is measured from the actual send and shows
+what a closed-loop client would have reported.
+
+Only successful responses are recorded in the histograms; timeouts, bad
+frames and RESP_ERR replies are counted in `errors`.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import platform
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from qaharness.stats import LatencyHistogram
+from qaharness.transport import msgtypes as mt
+from qaharness.transport.aio import tcp_request
+from qaharness.transport.framing import FrameError, decode_frame, encode_frame
+
+TRANSPORTS = ("udp", "tcp")
+
+_RESP_NAMES = {mt.RESP_OK: "RESP_OK", mt.RESP_ERR: "RESP_ERR", mt.RESP_STATE: "RESP_STATE"}
+
+
+def parse_msg_type(value: str | int) -> tuple[str, int]:
+    """
+    "REQ_PING" / "ping" / 1 -> ("REQ_PING", 1)
+    """
+    if isinstance(value, int) or str(value).isdigit():
+        code = int(value)
+        for name in dir(mt):
+            if name.startswith("REQ_") and getattr(mt, name) == code:
+                return name, code
+        raise ValueError(f"unknown request type: {value!r}")
+    name = str(value).upper()
+    if not name.startswith("REQ_"):
+        name = "REQ_" + name
+    found = getattr(mt, name, None)
+    if not isinstance(found, int):
+        raise ValueError(f"unknown request type: {value!r}")
+    return name, found
+
+
+@dataclass(frozen=True)
+class LoadConfig:
+    """
+    rate:          target requests per second (offered load, not a cap)
+    duration_s:    schedule length; rate * duration_s requests are sent
+    max_in_flight: outstanding-request bound; requests past it wait for a
+                   slot and that wait counts toward their latency
+    """
+    transport: str
+    addr: tuple[str, int]
+    msg: str = "REQ_PING"
+    payload: bytes = b""
+    rate: float = 100.0
+    duration_s: float = 10.0
+    timeout_s: float = 1.0
+    max_in_flight: int = 1024
+
+    def __post_init__(self) -> None:
+        if self.transport not in TRANSPORTS:
+            raise ValueError(f"transport must be one of {TRANSPORTS}")
+        if self.rate <= 0 or self.duration_s <= 0:
+            raise ValueError("rate and duration_s must be > 0")
+        if self.timeout_s <= 0:
+            raise ValueError("timeout_s must be > 0")
+        if self.max_in_flight < 1:
+            raise ValueError("max_in_flight must be >= 1")
+        object.__setattr__(self, "msg", parse_msg_type(self.msg)[0])
+
+    @property
+    def msg_type(self) -> int:
+        return parse_msg_type(self.msg)[1]
+
+    @property
+    def scheduled(self) -> int:
+        return int(round(self.rate * self.duration_s))
+
+    @property
+    def nodeid(self) -> str:
+        return f"load::{self.transport}:{self.msg}@{self.rate:g}/s"
+
+    def as_tags(self) -> dict[str, Any]:
+        return {
+            "transport": self.transport,
+            "msg": self.msg,
+            "rate": self.rate,
+            "duration_s": self.duration_s,
+            "timeout_s": self.timeout_s,
+            "max_in_flight": self.max_in_flight,
+            "payload_len": len(self.payload),
+        }
+
+
+@dataclass
+class LoadReport:
+    """
+    latency: intended send time -> response (coordinated-omission corrected)
+    service: actual send time -> response
+    send_lag_max_ms: worst delay between a request's due time and its send
+    """
+    config: LoadConfig
+    scheduled: int = 0
+    sent: int = 0
+    ok: int = 0
+    errors: dict[str, int] = field(default_factory=dict)
+    responses: dict[str, int] = field(default_factory=dict)
+    elapsed_s: float = 0.0
+    send_lag_max_ms: float = 0.0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    service: LatencyHistogram = field(default_factory=LatencyHistogram)
+    workers: int = 1
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+    @property
+    def throughput(self) -> float:
+        """
+        successful responses per second of wall time
+        """
+        return self.ok / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    @property
+    def success_rate(self) -> float:
+        return self.ok / self.sent if self.sent else 0.0
+
+    def _error(self, kind: str) -> None:
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def merge(self, other: LoadReport) -> LoadReport:
+        """
+        fold another shard of the same run into this one; shards run
+        concurrently, so elapsed time and lag take the max, not the sum
+        """
+        self.scheduled += other.scheduled
+        self.sent += other.sent
+        self.ok += other.ok
+        for k, v in other.errors.items():
+            self.errors[k] = self.errors.get(k, 0) + v
+        for k, v in other.responses.items():
+            self.responses[k] = self.responses.get(k, 0) + v
+        self.elapsed_s = max(self.elapsed_s, other.elapsed_s)
+        self.send_lag_max_ms = max(self.send_lag_max_ms, other.send_lag_max_ms)
+        self.latency.merge(other.latency)
+        self.service.merge(other.service)
+        return self
+
+    def to_wire(self) -> dict[str, Any]:
+        """
+        picklable snapshot without the config (histograms as bytes)
+        """
+        return {
+            "scheduled": self.scheduled,
+            "sent": self.sent,
+            "ok": self.ok,
+            "errors": dict(self.errors),
+            "responses": dict(self.responses),
+            "elapsed_s": self.elapsed_s,
+            "send_lag_max_ms": self.send_lag_max_ms,
+            "latency": self.latency.to_bytes(),
+            "service": self.service.to_bytes(),
+        }
+
+    @classmethod
+    def from_wire(cls, config: LoadConfig, d: dict[str, Any]) -> LoadReport:
+        return cls(
+            config=config,
+            scheduled=d["scheduled"],
+            sent=d["sent"],
+            ok=d["ok"],
+            errors=dict(d["errors"]),
+            responses=dict(d["responses"]),
+            elapsed_s=d["elapsed_s"],
+            send_lag_max_ms=d["send_lag_max_ms"],
+            latency=LatencyHistogram.from_bytes(d["latency"]),
+            service=LatencyHistogram.from_bytes(d["service"]),
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "nodeid": self.config.nodeid,
+            "config": self.config.as_tags(),
+            "workers": self.workers,
+            "scheduled": self.scheduled,
+            "sent": self.sent,
+            "ok": self.ok,
+            "errors": dict(self.errors),
+            "responses": dict(self.responses),
+            "elapsed_s": self.elapsed_s,
+            "throughput": self.throughput,
+            "success_rate": self.success_rate,
+            "send_lag_max_ms": self.send_lag_max_ms,
+            "latency_ms": self.latency.summary(),
+            "service_ms": self.service.summary(),
+        }
+
+
+class _UdpLane(asyncio.DatagramProtocol):
+    """
+    one connected socket, one outstanding request; a lane that timed out is
+    closed rather than reused so a late reply can't answer the next request
+    """
+    def __init__(self) -> None:
+        self.transport: asyncio.DatagramTransport | None = None
+        self._waiter: asyncio.Future | None = None
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        w = self._waiter
+        if w is not None and not w.done():
+            w.set_result(data)
+
+    def error_received(self, exc: Exception) -> None:
+        w = self._waiter
+        if w is not None and not w.done():
+            w.set_exception(exc)
+
+    async def request(self, frame: bytes, timeout_s: float) -> bytes | None:
+        assert self.transport is not None
+        self._waiter = asyncio.get_running_loop().create_future()
+        try:
+            self.transport.sendto(frame)
+            return await asyncio.wait_for(self._waiter, timeout=timeout_s)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._waiter = None
+
+    def close(self) -> None:
+        if self.transport is not None:
+            self.transport.close()
+
+
+async def run_load_async(
+    cfg: LoadConfig,
+    *,
+    shard: tuple[int, int] = (0, 1),
+    start_at: float | None = None,
+    on_progress: Callable[[LoadReport], None] | None = None,
+    progress_interval_s: float = 1.0,
+) -> LoadReport:
+    """
+    shard=(k, n): send only requests i with i % n == k; n shards started at
+        the same `start_at` (epoch seconds) together follow the full schedule
+    on_progress: called with the live report every progress_interval_s
+    """
+    k, n = shard
+    if not 0 <= k < n:
+        raise ValueError("shard must be (k, n) with 0 <= k < n")
+    indices = range(k, cfg.scheduled, n)
+    report = LoadReport(config=cfg, scheduled=len(indices))
+    loop = asyncio.get_running_loop()
+    frame = encode_frame(cfg.msg_type, cfg.payload)
+    slots = asyncio.Semaphore(math.ceil(cfg.max_in_flight / n))
+    lanes: deque[_UdpLane] = deque()
+
+    async def _udp(timeout_s: float) -> tuple[bytes | None, float]:
+        lane = lanes.pop() if lanes else None
+        sent_at = loop.time()
+        if lane is None:
+            try:
+                _, lane = await loop.create_datagram_endpoint(_UdpLane, remote_addr=cfg.addr)
+            except OSError:
+                # e.g. out of file descriptors: this request fails, the run goes on
+                return None, sent_at
+            sent_at = loop.time()
+        try:
+            got = await lane.request(frame, timeout_s)
+        except OSError:
+            got = None
+        if got is None:
+            lane.close()
+        else:
+            lanes.append(lane)
+        return got, sent_at
+
+    async def _tcp(timeout_s: float) -> tuple[bytes | None, float]:
+        # the simulator answers one request per connection, so connect time is part of service time
+        sent_at = loop.time()
+        return await tcp_request(cfg.addr, frame, timeout_s), sent_at
+
+    send = _udp if cfg.transport == "udp" else _tcp
+
+    async def _one(intended: float) -> None:
+        async with slots:
+            report.sent += 1
+            got, sent_at = await send(cfg.timeout_s)
+        now = loop.time()
+        if got is None:
+            report._error("timeout")
+            return
+        try:
+            resp = decode_frame(got)
+        except FrameError:
+            report._error("bad_frame")
+            return
+        name = _RESP_NAMES.get(resp.msg_type, str(resp.msg_type))
+        report.responses[name] = report.responses.get(name, 0) + 1
+        if resp.msg_type == mt.RESP_ERR:
+            report._error("resp_err")
+            return
+        report.ok += 1
+        report.latency.record((now - intended) * 1000.0)
+        report.service.record((now - sent_at) * 1000.0)
+
+    tasks: set[asyncio.Task] = set()
+    interval = 1.0 / cfg.rate
+    t0 = loop.time()
+    if start_at is not None:
+        t0 += max(0.0, start_at - time.time())
+
+    async def _ticker(progress: Callable[[LoadReport], None]) -> None:
+        while True:
+            await asyncio.sleep(progress_interval_s)
+            report.elapsed_s = max(0.0, loop.time() - t0)
+            progress(report)
+
+    ticker = loop.create_task(_ticker(on_progress)) if on_progress is not None else None
+    try:
+        for i in indices:
+            intended = t0 + i * interval
+            delay = intended - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # when behind, every overdue request goes out now; none are skipped
+            report.send_lag_max_ms = max(report.send_lag_max_ms, (loop.time() - intended) * 1000.0)
+            task = loop.create_task(_one(intended))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        if ticker is not None:
+            ticker.cancel()
+        for t in tasks:
+            t.cancel()
+        for lane in lanes:
+            lane.close()
+
+    report.elapsed_s = max(0.0, loop.time() - t0)
+    return report
+
+
+def run_load(cfg: LoadConfig) -> LoadReport:
+    return asyncio.run(run_load_async(cfg))
+
+
+def store_report(store, report: LoadReport, *, run_id: str | None = None) -> str:
+    """
+    write one load run to a SqlStore as its own test_runs row -> run_id
+
+    The metric names match the pytest perf telemetry, so `qaharness trend`
+    and `qaharness regress` work on load runs unchanged.
+    """
+    cfg = report.config
+    run_id = run_id or str(uuid.uuid4())
+    store.start_run(
+        run_id=run_id,
+        started_at=datetime.now(timezone.utc).isoformat(),
+        git_sha=os.getenv("GITHUB_SHA") or os.getenv("CI_COMMIT_SHA"),
+        branch=os.getenv("GITHUB_REF_NAME") or os.getenv("CI_COMMIT_BRANCH"),
+        ci_job=os.getenv("GITHUB_JOB") or os.getenv("CI_JOB_NAME"),
+        os_name=platform.platform(),
+        python_version=platform.python_version(),
+    )
+
+    tags = cfg.as_tags()
+    metrics: list[tuple[str, float | int | None, str | None]] = [
+        ("load.target_rate", cfg.rate, "req/s"),
+        ("load.workers", report.workers, "count"),
+        ("load.requests_per_s", report.throughput, "req/s"),
+        ("load.sent", report.sent, "count"),
+        ("load.ok", report.ok, "count"),
+        ("load.errors", report.error_count, "count"),
+        ("load.send_lag_max_ms", report.send_lag_max_ms, "ms"),
+        ("results.success_rate", report.success_rate, "ratio"),
+    ]
+    metrics += [(f"load.errors.{k}", v, "count") for k, v in sorted(report.errors.items())]
+    for prefix, hist in (("latency", report.latency), ("service", report.service)):
+        if hist.count:
+            metrics += [
+                (f"{prefix}.p50", hist.percentile(50), "ms"),
+                (f"{prefix}.p95", hist.percentile(95), "ms"),
+                (f"{prefix}.p99", hist.percentile(99), "ms"),
+                (f"{prefix}.max", hist.max, "ms"),
+            ]
+    for name, value, unit in metrics:
+        store.record_metric(
+            run_id=run_id, nodeid=cfg.nodeid, metric_name=name, metric_value=value, unit=unit, tags=tags,
+        )
+    store.record_histogram(run_id=run_id, nodeid=cfg.nodeid, name="latency_ms", hist=report.latency)
+    store.record_histogram(run_id=run_id, nodeid=cfg.nodeid, name="service_ms", hist=report.service)
+    store.finish_run(
+        run_id=run_id,
+        finished_at=datetime.now(timezone.utc).isoformat(),
+        exit_status=0 if report.error_count == 0 else 1,
+    )
+    return run_id
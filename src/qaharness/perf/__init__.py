@@ -0,0 +1,13 @@
+from .engine import EnvelopeResult, run_envelope
+from .spec import EnvelopeSpec, FaultSpec, LoadShape, RetrySpec, Threshold, load_specs
+
+__all__ = [
+    "EnvelopeResult",
+    "EnvelopeSpec",
+    "FaultSpec",
+    "LoadShape",
+    "RetrySpec",
+    "Threshold",
+    "load_specs",
+    "run_envelope",
+]
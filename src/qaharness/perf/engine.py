@@ -0,0 +1,294 @@
+"""
+Runs an EnvelopeSpec against a live simulator.
+
+One code path for every scenario: apply setup + faults in one control batch,
+then draw samples with run_sequential until every threshold's confidence
+interval is decided (or the sample budget runs out). Each look's batch is
+spread over `load.concurrency` threads, each request on its own socket, so
+wall time for delay-dominated envelopes shrinks with concurrency. Results come
+back as one payload schema for metrics_recorder, whatever the scenario.
+"""
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+
+from qaharness.stats import LatencyHistogram, RunningStats, TDigest, bootstrap_ci, wilson_interval
+from qaharness.stats.inference import PASS
+from qaharness.stats.sequential import Check, SequentialResult, run_sequential
+from qaharness.transport.framing import FrameError
+from qaharness.transport.tcp import TcpClient, TcpEndpoint
+from qaharness.transport.timing import LatencyBreakdown
+from qaharness.transport.udp import UdpClient, UdpEndpoint
+from qaharness.utils.retry import with_retries
+
+from .spec import EnvelopeSpec, Threshold
+
+
+class _Stream(Protocol):
+    def sample(self, series: str, value: float) -> None: ...
+    def retry_event(self, *, request_name: str | None, attempt: int, sleep_s: float, error: str) -> None: ...
+
+
+def _client(spec: EnvelopeSpec, addr: tuple[str, int]):
+    host, port = addr
+    if spec.transport == "udp":
+        return UdpClient(UdpEndpoint(host, port), timeout_s=spec.load.timeout_s)
+    return TcpClient(TcpEndpoint(host, port), timeout_s=spec.load.timeout_s)
+
+
+def _failure_kind(exc: BaseException) -> str:
+    if isinstance(exc, TimeoutError):
+        return "timeouts"
+    if isinstance(exc, FrameError):
+        return "frame_errors"
+    if isinstance(exc, ConnectionError):
+        return "connection_errors"
+    return "errors"
+
+
+@dataclass
+class EnvelopeResult:
+    spec: EnvelopeSpec
+    seq: SequentialResult | None = None
+    successes: int = 0
+    failures: dict[str, int] = field(default_factory=dict)
+    unexpected: list[tuple[int, bytes]] = field(default_factory=list)
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    retries: RunningStats = field(default_factory=RunningStats)
+    retries_q: TDigest = field(default_factory=TDigest)
+    retry_counts: dict[int, int] = field(default_factory=dict)
+    retry_events: int = 0
+    stages: dict[str, LatencyHistogram] = field(default_factory=dict)
+    elapsed_s: float = 0.0
+
+    @property
+    def attempts(self) -> int:
+        return self.retries.count
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.attempts if self.attempts else 0.0
+
+    def interval(self, threshold: Threshold, confidence: float):
+        """
+        confidence interval for a threshold's metric over the samples so far
+        """
+        if threshold.metric == "success_rate":
+            return wilson_interval(self.successes, self.attempts, confidence=confidence) if self.attempts else None
+        if threshold.metric == "retries_per_request.mean":
+            # bootstrap over the per-request retry counts (few distinct values)
+            if not self.attempts:
+                return None
+            counts = [value for value, count in self.retry_counts.items() for _ in range(count)]
+            return bootstrap_ci(counts, "mean", confidence=confidence)
+        if not self.latency.count:
+            return None
+        if threshold.metric == "latency.mean":
+            return bootstrap_ci(self.latency, "mean", confidence=confidence)
+        p = threshold.percentile
+        if p is None:
+            raise ValueError(f"unsupported threshold metric: {threshold.metric!r}")
+        return bootstrap_ci(self.latency, p, confidence=confidence)
+
+    def _add(self, outcome: str, latency_ms: float, retries: int, breakdown: LatencyBreakdown | None = None) -> None:
+        if outcome == "ok":
+            self.successes += 1
+            self.latency.record(latency_ms)
+            if breakdown is not None:
+                for stage, ms in breakdown.stages().items():
+                    hist = self.stages.get(stage)
+                    if hist is None:
+                        hist = self.stages[stage] = LatencyHistogram()
+                    hist.record(ms)
+        elif outcome != "unexpected":
+            self.failures[outcome] = self.failures.get(outcome, 0) + 1
+        self.retries.add(retries)
+        self.retries_q.add(retries)
+        self.retry_counts[retries] = self.retry_counts.get(retries, 0) + 1
+        self.retry_events += retries
+
+    def payload(self) -> dict[str, Any]:
+        """
+        metrics_recorder payload; same keys for every envelope
+        """
+        spec = self.spec
+        seq = self.seq
+        lat = self.latency
+        latency_ms: dict[str, Any] = {
+            "count": lat.count,
+            "mean": lat.mean,
+            "min": lat.min,
+            "max": lat.max,
+            "p50": lat.percentile(50) if lat.count else None,
+            "p95": lat.percentile(95) if lat.count else None,
+            "p99": lat.percentile(99) if lat.count else None,
+        }
+        results: dict[str, Any] = {
+            "successes": self.successes,
+            "timeouts": self.failures.get("timeouts", 0),
+            "unexpected": len(self.unexpected),
+            **{k: v for k, v in self.failures.items() if k != "timeouts"},
+            "success_rate": self.success_rate,
+        }
+        # CI bounds land next to the value they bound: results.success_rate_ci_low, latency.p95_ci_high, ...
+        for t in spec.thresholds:
+            ci = seq.intervals.get(t.label) if seq else None
+            if ci is None or t.metric.startswith("retries_per_request"):
+                continue
+            block, key = (results, "success_rate") if t.metric == "success_rate" else (latency_ms, t.metric.split(".", 1)[1])
+            block[f"{key}_ci_low"] = ci.low
+            block[f"{key}_ci_high"] = ci.high
+        breakdown_ms = {
+            stage: {"mean": h.mean, "p50": h.percentile(50), "p95": h.percentile(95), "p99": h.percentile(99)}
+            for stage, h in self.stages.items()
+            if h.count
+        }
+        return {
+            "name": spec.name,
+            "transport": spec.transport,
+            "msg": spec.msg,
+            "faults": {
+                "drop_rate": spec.faults.drop_rate,
+                "delay_ms": spec.faults.delay_ms,
+                "corrupt_rate": spec.faults.corrupt_rate,
+            },
+            "load": {"concurrency": spec.load.concurrency, "rate": spec.load.rate, "timeout_s": spec.load.timeout_s},
+            "samples": self.attempts,
+            "elapsed_s": self.elapsed_s,
+            "results": results,
+            "latency_ms": latency_ms,
+            "breakdown_ms": breakdown_ms,
+            "histograms": {"latency_ms": lat, **{f"breakdown.{s}_ms": h for s, h in self.stages.items()}},
+            "retry": {
+                "policy": {
+                    "attempts": spec.retry.attempts,
+                    "initial_backoff_s": spec.retry.initial_backoff_s,
+                    "max_backoff_s": spec.retry.max_backoff_s,
+                    "multiplier": spec.retry.multiplier,
+                    "jitter_ratio": spec.retry.jitter_ratio,
+                },
+                "total_retry_events": self.retry_events,
+                "retries_per_request_mean": self.retries.mean if self.attempts else 0.0,
+                "retries_per_request_p95": self.retries_q.percentile(95) if self.attempts else 0,
+                "retries_per_request_max": self.retries.max if self.attempts else 0,
+            },
+            "thresholds": {f"{t.metric} {t.op}": t.value for t in spec.thresholds},
+            "sequential": seq.as_dict() if seq else None,
+        }
+
+    def assert_ok(self, *, inconclusive: str = PASS) -> None:
+        if self.unexpected:
+            rtype, payload = self.unexpected[0]
+            raise AssertionError(
+                f"{self.spec.name}: {len(self.unexpected)} unexpected responses, "
+                f"first: type={rtype} payload={payload!r} (want {self.spec.expect})"
+            )
+        if not self.latency.count and any(t.metric.startswith("latency.") for t in self.spec.thresholds):
+            raise AssertionError(f"{self.spec.name}: no successful responses recorded; cannot evaluate latency envelope")
+        if self.seq is not None:
+            self.seq.assert_ok(inconclusive=inconclusive)
+
+
+def run_envelope(
+    spec: EnvelopeSpec,
+    sim_api,
+    addr: tuple[str, int],
+    *,
+    stream: _Stream | None = None,
+    confidence: float = 0.95,
+) -> EnvelopeResult:
+    """
+    sim_api: SimApiClient (setup + faults go out as one control batch)
+    addr: (host, port) of the spec's transport
+    stream: optional perf_stream-like sink for raw samples and retry events
+    """
+    batch = sim_api.batch()
+    for op in spec.setup:
+        getattr(batch, op)()
+    batch.set_faults(
+        drop_rate=spec.faults.drop_rate,
+        delay_ms=spec.faults.delay_ms,
+        corrupt_rate=spec.faults.corrupt_rate,
+    ).send()
+
+    client = _client(spec, addr)
+    policy = spec.retry.policy()
+    msg_type, payload, expect_type = spec.msg_type, spec.payload, spec.expect_type
+    expect_payloads = {bytes(p, "utf-8") for p in spec.expect_payloads}
+    interval_s = 1.0 / spec.load.rate if spec.load.rate else 0.0
+
+    result = EnvelopeResult(spec)
+    lock = threading.Lock()
+    issued = 0
+    t_start = time.perf_counter()
+
+    def _one(index: int) -> None:
+        if interval_s:
+            delay = t_start + index * interval_s - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        retries = 0
+
+        def _on_retry(attempt: int, exc: BaseException, sleep_s: float) -> None:
+            nonlocal retries
+            retries += 1
+            if stream is not None:
+                with lock:
+                    stream.retry_event(request_name=spec.msg, attempt=attempt, sleep_s=sleep_s, error=type(exc).__name__)
+
+        t0 = time.perf_counter_ns()
+        # only read when outcome == "ok"
+        latency_ms = 0.0
+        breakdown: LatencyBreakdown | None = None
+        try:
+            if spec.breakdown:
+                resp = with_retries(lambda: client.request_timed(msg_type, payload), policy, on_retry=_on_retry)
+                rtype, body = resp.msg_type, resp.payload
+                breakdown = LatencyBreakdown.of(resp, t0)
+            else:
+                rtype, body = with_retries(lambda: client.request_once(msg_type, payload), policy, on_retry=_on_retry)
+            latency_ms = (time.perf_counter_ns() - t0) / 1e6
+            ok = rtype == expect_type and (not expect_payloads or body in expect_payloads)
+            outcome = "ok" if ok else "unexpected"
+        except (OSError, FrameError) as e:
+            outcome = _failure_kind(e)
+
+        with lock:
+            if outcome == "unexpected":
+                result.unexpected.append((rtype, body))
+            result._add(outcome, latency_ms, retries, breakdown)
+            if stream is not None:
+                if outcome == "ok":
+                    stream.sample("latency_ms", latency_ms)
+                    # one value per stage per request: the breakdown.* series stay index-aligned
+                    if breakdown is not None:
+                        for stage, ms in breakdown.stages().items():
+                            stream.sample(f"breakdown.{stage}_ms", ms)
+                stream.sample("retries_per_request", retries)
+
+    checks = [
+        Check(t.label, functools.partial(result.interval, t), t.value, at_most=t.op == "<=")
+        for t in spec.thresholds
+    ]
+
+    with ThreadPoolExecutor(max_workers=spec.load.concurrency, thread_name_prefix=f"envelope-{spec.name}") as pool:
+        def _sample(k: int) -> None:
+            nonlocal issued
+            start, issued = issued, issued + k
+            # list() re-raises anything unexpected from a worker
+            list(pool.map(_one, range(start, start + k)))
+
+        result.seq = run_sequential(
+            _sample,
+            checks,
+            min_samples=spec.min_samples,
+            max_samples=spec.max_samples,
+            confidence=confidence,
+        )
+    result.elapsed_s = time.perf_counter() - t_start
+    return result
@@ -0,0 +1,262 @@
+"""
+Declarative perf envelope specs.
+
+A spec is plain data (JSON): what to send, under which faults, with which
+retry policy and load shape, how many samples to draw and which thresholds
+must hold. Every field can be overridden from the environment as
+{env_prefix}_{KEY}, e.g. PERF_DROP_SAMPLES=400 or PERF_COMBINED_DELAY_MS=120;
+threshold keys are named by each threshold's `env` field.
+
+spec file: {"envelopes": [{...spec...}, ...]}
+"""
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Any, Mapping
+
+from qaharness.transport import msgtypes as mt
+from qaharness.transport.framing import FrameError
+from qaharness.utils.retry import RetryPolicy
+
+TRANSPORTS = ("udp", "tcp")
+OPS = ("<=", ">=")
+
+# metrics a threshold may reference; percentiles of latency_ms use "latency.pNN"
+RATE_METRICS = ("success_rate",)
+MEAN_METRICS = ("latency.mean", "retries_per_request.mean")
+
+_RETRY_EXCEPTIONS: dict[str, type[BaseException]] = {
+    "TimeoutError": TimeoutError,
+    "ConnectionError": ConnectionError,
+    "FrameError": FrameError,
+    "OSError": OSError,
+}
+
+_SETUP_OPS = ("reset", "configure", "start_stream", "stop_stream")
+
+
+def _msg_code(name: str) -> int:
+    code = getattr(mt, name, None)
+    if not isinstance(code, int):
+        raise ValueError(f"unknown message type: {name!r}")
+    return code
+
+
+@dataclass(frozen=True)
+class FaultSpec:
+    drop_rate: float = 0.0
+    delay_ms: int = 0
+    corrupt_rate: float = 0.0
+
+
+@dataclass(frozen=True)
+class RetrySpec:
+    attempts: int = 1
+    initial_backoff_s: float = 0.02
+    max_backoff_s: float = 0.10
+    multiplier: float = 2.0
+    jitter_ratio: float = 0.10
+    retry_on: tuple[str, ...] = ("TimeoutError",)
+
+    def __post_init__(self) -> None:
+        unknown = set(self.retry_on) - set(_RETRY_EXCEPTIONS)
+        if unknown:
+            raise ValueError(f"unknown retry_on exceptions: {sorted(unknown)}")
+
+    def policy(self) -> RetryPolicy:
+        return RetryPolicy(
+            attempts=self.attempts,
+            initial_backoff_s=self.initial_backoff_s,
+            max_backoff_s=self.max_backoff_s,
+            multiplier=self.multiplier,
+            jitter_ratio=self.jitter_ratio,
+            retry_exceptions=tuple(_RETRY_EXCEPTIONS[n] for n in self.retry_on),
+        )
+
+
+@dataclass(frozen=True)
+class LoadShape:
+    """
+    concurrency: requests in flight at once (each on its own socket)
+    rate: request starts per second across all workers; None = back-to-back
+    timeout_s: per-attempt response timeout
+    """
+    concurrency: int = 1
+    rate: float | None = None
+    timeout_s: float = 0.2
+
+    def __post_init__(self) -> None:
+        if self.concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        if self.rate is not None and self.rate <= 0:
+            raise ValueError("rate must be > 0")
+
+
+@dataclass(frozen=True)
+class Threshold:
+    """
+    metric: success_rate | latency.pNN | latency.mean | retries_per_request.mean
+    op: "<=" or ">="
+    env: override key, read as {env_prefix}_{env}
+    """
+    metric: str
+    op: str
+    value: float
+    env: str | None = None
+    note: str | None = None
+
+    def __post_init__(self) -> None:
+        if self.op not in OPS:
+            raise ValueError(f"op must be one of {OPS}")
+        if self.metric not in RATE_METRICS + MEAN_METRICS and self.percentile is None:
+            raise ValueError(f"unsupported threshold metric: {self.metric!r}")
+
+    @property
+    def percentile(self) -> float | None:
+        if self.metric.startswith("latency.p"):
+            try:
+                p = float(self.metric[len("latency.p"):])
+            except ValueError:
+                return None
+            return p if 0.0 < p <= 100.0 else None
+        return None
+
+    @property
+    def label(self) -> str:
+        text = f"{self.metric} {self.op} {self.value:g}"
+        return f"{text} ({self.note})" if self.note else text
+
+
+@dataclass(frozen=True)
+class EnvelopeSpec:
+    name: str
+    transport: str = "udp"
+    msg: str = "REQ_PING"
+    payload_hex: str = ""
+    expect: str = "RESP_OK"
+    expect_payloads: tuple[str, ...] = ()
+    setup: tuple[str, ...] = ("reset",)
+    faults: FaultSpec = field(default_factory=FaultSpec)
+    retry: RetrySpec = field(default_factory=RetrySpec)
+    load: LoadShape = field(default_factory=LoadShape)
+    min_samples: int = 20
+    max_samples: int = 160
+    thresholds: tuple[Threshold, ...] = ()
+    env_prefix: str | None = None
+    # timed requests: record a per-request setup/network/server/hold/retry breakdown
+    breakdown: bool = False
+
+    def __post_init__(self) -> None:
+        if self.transport not in TRANSPORTS:
+            raise ValueError(f"transport must be one of {TRANSPORTS}")
+        _msg_code(self.msg)
+        _msg_code(self.expect)
+        unknown = set(self.setup) - set(_SETUP_OPS)
+        if unknown:
+            raise ValueError(f"unknown setup ops: {sorted(unknown)}")
+        if not 1 <= self.min_samples <= self.max_samples:
+            raise ValueError("need 1 <= min_samples <= max_samples")
+        if not self.thresholds:
+            raise ValueError(f"envelope {self.name!r} has no thresholds")
+
+    @property
+    def msg_type(self) -> int:
+        return _msg_code(self.msg)
+
+    @property
+    def expect_type(self) -> int:
+        return _msg_code(self.expect)
+
+    @property
+    def payload(self) -> bytes:
+        return bytes.fromhex(self.payload_hex)
+
+    @classmethod
+    def from_dict(cls, d: Mapping[str, Any]) -> EnvelopeSpec:
+        d = dict(d)
+        if "faults" in d:
+            d["faults"] = FaultSpec(**d["faults"])
+        if "retry" in d:
+            r = dict(d["retry"])
+            if "retry_on" in r:
+                r["retry_on"] = tuple(r["retry_on"])
+            d["retry"] = RetrySpec(**r)
+        if "load" in d:
+            d["load"] = LoadShape(**d["load"])
+        d["thresholds"] = tuple(Threshold(**t) for t in d.get("thresholds", ()))
+        for key in ("setup", "expect_payloads"):
+            if key in d:
+                d[key] = tuple(d[key])
+        return cls(**d)
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    def with_env(self, env: Mapping[str, str] | None = None) -> EnvelopeSpec:
+        """
+        apply {env_prefix}_{KEY} overrides (no-op without env_prefix)
+        """
+        if not self.env_prefix:
+            return self
+        env = os.environ if env is None else env
+
+        def _get(key: str, cast):
+            raw = env.get(f"{self.env_prefix}_{key}")
+            return None if raw is None else cast(raw)
+
+        def _over(obj, mapping: dict[str, tuple[str, Any]]):
+            changes = {}
+            for attr, (key, cast) in mapping.items():
+                v = _get(key, cast)
+                if v is not None:
+                    changes[attr] = v
+            return replace(obj, **changes) if changes else obj
+
+        faults = _over(self.faults, {
+            "drop_rate": ("DROP_RATE", float),
+            "delay_ms": ("DELAY_MS", int),
+            "corrupt_rate": ("CORRUPT_RATE", float),
+        })
+        retry = _over(self.retry, {
+            "attempts": ("RETRY_ATTEMPTS", int),
+            "initial_backoff_s": ("RETRY_INITIAL_BACKOFF_S", float),
+            "max_backoff_s": ("RETRY_MAX_BACKOFF_S", float),
+            "multiplier": ("RETRY_MULTIPLIER", float),
+            "jitter_ratio": ("RETRY_JITTER_RATIO", float),
+        })
+        load = _over(self.load, {
+            "concurrency": ("CONCURRENCY", int),
+            "rate": ("REQUEST_RATE", float),
+            "timeout_s": ("TIMEOUT_S", float),
+        })
+        thresholds = tuple(
+            _over(t, {"value": (t.env, float)}) if t.env else t for t in self.thresholds
+        )
+        max_samples = _get("SAMPLES", int)
+        if max_samples is None:
+            max_samples = self.max_samples
+        min_samples = _get("MIN_SAMPLES", int)
+        if min_samples is None:
+            min_samples = self.min_samples
+        # a sample budget below the spec's floor lowers the floor with it
+        min_samples = min(min_samples, max_samples)
+        return replace(
+            self, faults=faults, retry=retry, load=load, thresholds=thresholds,
+            min_samples=min_samples, max_samples=max_samples,
+        )
+
+
+def load_specs(path: str | Path, *, env: Mapping[str, str] | None = None) -> list[EnvelopeSpec]:
+    """
+    read a spec file and apply environment overrides; names must be unique
+    """
+    doc = json.loads(Path(path).read_text(encoding="utf-8"))
+    specs = [EnvelopeSpec.from_dict(d).with_env(env) for d in doc.get("envelopes", [])]
+    names = [s.name for s in specs]
+    dupes = sorted({n for n in names if names.count(n) > 1})
+    if dupes:
+        raise ValueError(f"duplicate envelope names: {dupes}")
+    return specs
@@ -1,3 +1,4 @@
-from .sql_store import SqlStore, SqlStoreConfig
+from .shards import ShardedResults
+from .sql_store import RetentionPolicy, SqlStore, SqlStoreConfig
 
-__all__ = ["SqlStore", "SqlStoreConfig"]
\ No newline at end of file
+__all__ = ["RetentionPolicy", "ShardedResults", "SqlStore", "SqlStoreConfig"]
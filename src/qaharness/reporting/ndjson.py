@@ -0,0 +1,198 @@
+"""
+Append-only NDJSON artifacts: one JSON object per line, written as produced.
+
+A crash loses at most the records since the last flush; a torn final line
+is skipped by the reader. Readers stream line by line, so building a
+summary costs memory proportional to the summary, not to the file.
+
+session files (metrics_summary.ndjson) carry records tagged by "kind":
+    session_start {run_id, started_at, db_path}
+    test          {nodeid, outcome, duration_s[, worker]}
+    session_end   {finished_at, exitstatus}
+"""
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+
+class NdjsonWriter:
+    """
+    flush_every / flush_interval_s: push buffered lines to the OS every N
+    records or T seconds, whichever comes first (1 = flush every record)
+    fsync: also fsync on each flush (survives power loss, not just a crash)
+    """
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        append: bool = True,
+        flush_every: int = 64,
+        flush_interval_s: float = 1.0,
+        fsync: bool = False,
+    ):
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = open(self._path, "a" if append else "w", encoding="utf-8")
+        self._flush_every = max(1, flush_every)
+        self._flush_interval_s = flush_interval_s
+        self._fsync = fsync
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self.records = 0
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def __enter__(self) -> NdjsonWriter:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._f.closed:
+                return
+            self._f.write(line)
+            self.records += 1
+            self._pending += 1
+            if self._pending >= self._flush_every or time.monotonic() - self._last_flush >= self._flush_interval_s:
+                self._flush_locked()
+
+    def write_line(self, line: str) -> None:
+        """
+        append an already-encoded record (used when concatenating files)
+        """
+        with self._lock:
+            if self._f.closed:
+                return
+            self._f.write(line if line.endswith("\n") else line + "\n")
+            self.records += 1
+            self._pending += 1
+            if self._pending >= self._flush_every:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        self._f.flush()
+        if self._fsync:
+            os.fsync(self._f.fileno())
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._f.closed:
+                self._flush_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._f.closed:
+                self._flush_locked()
+                self._f.close()
+
+
+def iter_ndjson(path: str | Path) -> Iterator[dict[str, Any]]:
+    """
+    stream records from an NDJSON file; unparseable lines (a torn write
+    from a crashed session) are skipped
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def append_ndjson(src: str | Path, writer: NdjsonWriter) -> int:
+    """
+    stream every complete line of `src` into `writer`; -> lines copied
+    """
+    n = 0
+    with open(src, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                # torn tail
+                break
+            if line.strip():
+                writer.write_line(line)
+                n += 1
+    return n
+
+
+def summarize_session(path: str | Path, *, slowest: int = 10, max_failures: int = 200) -> dict[str, Any]:
+    """
+    one streaming pass over a session NDJSON file -> summary document
+
+    Keeps counts, total duration, the `slowest` tests and up to
+    `max_failures` failed nodeids; memory does not grow with test count.
+    A file without session_end (crashed session) yields "complete": False.
+    """
+    out: dict[str, Any] = {"complete": False, "tests_path": str(path)}
+    outcomes: dict[str, int] = {}
+    workers: set[str] = set()
+    failed: list[str] = []
+    slow: list[tuple[float, str]] = []
+    total = 0
+    duration = 0.0
+
+    for rec in iter_ndjson(path):
+        kind = rec.get("kind")
+        if kind == "test":
+            total += 1
+            outcome = rec.get("outcome", "unknown")
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            d = float(rec.get("duration_s") or 0.0)
+            duration += d
+            if rec.get("worker"):
+                workers.add(rec["worker"])
+            if outcome == "failed" and len(failed) < max_failures:
+                failed.append(rec["nodeid"])
+            if slowest > 0:
+                item = (d, rec["nodeid"])
+                if len(slow) < slowest:
+                    heapq.heappush(slow, item)
+                elif item > slow[0]:
+                    heapq.heapreplace(slow, item)
+        elif kind == "session_start":
+            out.update({k: v for k, v in rec.items() if k != "kind"})
+        elif kind == "session_end":
+            out.update({k: v for k, v in rec.items() if k != "kind"})
+            out["complete"] = True
+
+    out["tests_total"] = total
+    out["outcomes"] = outcomes
+    out["duration_s_total"] = duration
+    out["failed"] = failed
+    out["slowest"] = [{"nodeid": n, "duration_s": d} for d, n in sorted(slow, reverse=True)]
+    if workers:
+        out["workers"] = sorted(workers)
+    return out
+
+
+def read_metrics_artifact(path: str | Path) -> dict[str, Any]:
+    """
+    per-test metrics NDJSON (test_start / record* / test_end) -> the
+    {test_id, timestamp_epoch, duration_s, records} document
+    """
+    doc: dict[str, Any] = {"records": [], "duration_s": None}
+    for rec in iter_ndjson(path):
+        kind = rec.pop("kind", None)
+        if kind == "test_start":
+            doc.update(rec)
+        elif kind == "record":
+            doc["records"].append(rec["payload"])
+        elif kind == "test_end":
+            doc["duration_s"] = rec.get("duration_s")
+    return doc
@@ -0,0 +1,53 @@
+"""
+Compact encoding for raw per-request sample vectors (latencies, retry counts).
+
+Samples are stored as little-endian float64 bytes: 8 bytes/sample, so a
+million-sample run is 8 MB instead of a JSON list. Encoding only needs the
+stdlib; decoding returns NumPy arrays (install the `stats` extra).
+"""
+from __future__ import annotations
+
+import sys
+from array import array
+from typing import Any, Iterable
+
+SAMPLE_DTYPE = "<f8"
+
+
+def encode_samples(values: Iterable[float] | Any) -> tuple[int, bytes]:
+    """
+    -> (count, blob). Accepts any iterable of numbers or a NumPy array.
+    """
+    if hasattr(values, "dtype") and hasattr(values, "astype"):
+        arr = values.astype(SAMPLE_DTYPE, copy=False).ravel()
+        return int(arr.size), arr.tobytes()
+
+    buf = array("d", values)
+    if sys.byteorder != "little":
+        buf.byteswap()
+    return len(buf), buf.tobytes()
+
+
+def _numpy():
+    try:
+        import numpy as np
+    except ImportError as e:  # pragma: no cover - depends on environment
+        raise ImportError("loading raw samples requires numpy (pip install -e '.[stats]')") from e
+    return np
+
+
+def decode_samples(blob: bytes, dtype: str = SAMPLE_DTYPE):
+    """
+    zero-copy view of a stored sample blob as a read-only NumPy array
+    """
+    np = _numpy()
+    return np.frombuffer(blob, dtype=np.dtype(dtype))
+
+
+def concat_samples(blobs: list[tuple[bytes, str]]):
+    np = _numpy()
+    if not blobs:
+        return np.empty(0, dtype=SAMPLE_DTYPE)
+    if len(blobs) == 1:
+        return decode_samples(*blobs[0])
+    return np.concatenate([decode_samples(b, d) for b, d in blobs])
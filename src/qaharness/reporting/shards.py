@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from qaharness.stats.histogram import LatencyHistogram
+
+from .sql_store import RetentionPolicy, SqlStore, SqlStoreConfig, list_shards
+
+
+def _migrate(path: Path) -> None:
+    # schema upgrades and the rollup backfill only run on a writable open
+    try:
+        SqlStore(SqlStoreConfig(db_path=path, shard_by_month=False)).close()
+    except sqlite3.OperationalError:
+        # read-only file or directory: the read-only store computes what is missing
+        pass
+
+
+class ShardedResults:
+    """
+    Read side over every monthly shard of a results database (plus the
+    unsharded base file, if any). Exposes the same query methods as SqlStore,
+    so trend/regression code works unchanged on either.
+
+    Each query fans out to the shards and merges in Python; queries that
+    need one run stop at the first shard holding it, newest first. Shards are
+    opened read-only, after one writable open that migrates shards written
+    by older versions (falling back to computed rollups if that fails);
+    maintenance calls open each one writable in turn.
+    """
+    def __init__(self, base_path: str | Path):
+        self.base_path = Path(base_path)
+        paths = list_shards(self.base_path)
+        if not paths:
+            raise FileNotFoundError(f"no results database at {self.base_path} (or monthly shards of it)")
+        self.paths = paths
+        for p in paths:
+            _migrate(p)
+        self._stores = [SqlStore(SqlStoreConfig(db_path=p, shard_by_month=False, read_only=True)) for p in paths]
+
+    def __enter__(self) -> ShardedResults:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for s in self._stores:
+            s.close()
+
+    def latest_run_id(self, *, finished_only: bool = True) -> str | None:
+        for s in reversed(self._stores):
+            run_id = s.latest_run_id(finished_only=finished_only)
+            if run_id is not None:
+                return run_id
+        return None
+
+    def run_rollups(self, run_id: str, metric_name: str) -> list[dict[str, Any]]:
+        for s in reversed(self._stores):
+            rows = s.run_rollups(run_id, metric_name)
+            if rows:
+                return rows
+        return []
+
+    def metric_series(
+        self,
+        metric_name: str,
+        *,
+        nodeid: str | None = None,
+        last: int | None = None,
+        before: str | None = None,
+    ) -> dict[str, list[dict[str, Any]]]:
+        out: dict[str, list[dict[str, Any]]] = {}
+        for s in self._stores:
+            # per-shard last-N is a superset of the global last-N
+            for nid, points in s.metric_series(metric_name, nodeid=nodeid, last=last, before=before).items():
+                out.setdefault(nid, []).extend(points)
+        for nid, points in out.items():
+            points.sort(key=lambda p: p["started_at"])
+            if last is not None:
+                out[nid] = points[-last:]
+        return out
+
+    def load_histogram(
+        self,
+        *,
+        nodeid: str,
+        name: str,
+        run_ids: Iterable[str] | None = None,
+    ) -> LatencyHistogram | None:
+        ids = None if run_ids is None else list(run_ids)
+        merged: LatencyHistogram | None = None
+        for s in self._stores:
+            h = s.load_histogram(nodeid=nodeid, name=name, run_ids=ids)
+            if h is not None:
+                merged = h if merged is None else merged.merge(h)
+        return merged
+
+    def _writable(self) -> Iterator[SqlStore]:
+        for p in self.paths:
+            store = SqlStore(SqlStoreConfig(db_path=p, shard_by_month=False))
+            try:
+                yield store
+            finally:
+                store.close()
+
+    def apply_retention(self, policy: RetentionPolicy, *, now: datetime | None = None) -> list[dict[str, Any]]:
+        return [s.apply_retention(policy, now=now) for s in self._writable()]
+
+    def enable_incremental_vacuum(self) -> None:
+        for s in self._writable():
+            s.enable_incremental_vacuum()
@@ -1,12 +1,27 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import logging
 import os
+import queue
 import sqlite3
 import threading
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
+
+from qaharness.stats.histogram import LatencyHistogram
+
+from .samples import SAMPLE_DTYPE, concat_samples, encode_samples
+
+log = logging.getLogger(__name__)
+
+# HISTOGRAM columns round-trip LatencyHistogram objects through their compact binary form
+sqlite3.register_adapter(LatencyHistogram, LatencyHistogram.to_bytes)
+sqlite3.register_converter("HISTOGRAM", LatencyHistogram.from_bytes)
 
 def _default_db_path() -> Path:
     p = Path(os.getenv("QA_RESULTS_DB", "artifacts/results.db"))
@@ -14,34 +29,307 @@ def _default_db_path() -> Path:
     return p
 
 
+def _default_shard_by_month() -> bool:
+    return os.getenv("QA_RESULTS_SHARD_BY_MONTH", "0") == "1"
+
+
+def shard_path(base: Path, when: datetime | None = None) -> Path:
+    """
+    artifacts/results.db -> artifacts/results-2026-10.db
+    """
+    when = when or datetime.now(timezone.utc)
+    return base.with_name(f"{base.stem}-{when:%Y-%m}{base.suffix}")
+
+
+def list_shards(base: Path) -> list[Path]:
+    """
+    monthly shards of `base`, oldest first; an unsharded `base` file counts as the oldest
+    """
+    shards = sorted(base.parent.glob(f"{base.stem}-[0-9][0-9][0-9][0-9]-[0-9][0-9]{base.suffix}"))
+    return ([base] if base.exists() else []) + shards
+
+
 @dataclass(frozen=True)
 class SqlStoreConfig:
-    db_path: Path
+    """
+    async_writes: record_* calls enqueue rows for a background writer thread
+        instead of committing on the caller's thread
+    batch_rows / flush_interval_ms: the writer commits every N rows or T ms,
+        whichever comes first
+    queue_max: bound on queued rows; callers block when it is full (backpressure)
+    shard_by_month: write to one file per UTC month next to db_path
+        (results-2026-10.db); read across them with ShardedResults
+    read_only: open an existing file for queries only (mode=ro): no schema
+        setup, PRAGMAs or writer thread; record_* calls fail
+    """
+    db_path: Path = field(default_factory=_default_db_path)
+    async_writes: bool = False
+    batch_rows: int = 500
+    flush_interval_ms: float = 200.0
+    queue_max: int = 10_000
+    shard_by_month: bool = field(default_factory=_default_shard_by_month)
+    read_only: bool = False
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """
+    raw_days: keep raw perf_metrics / retry_events / perf_samples rows this
+        long; older runs are first rolled up per run and per day
+    run_rollup_days: keep per-run rollups this long (None = forever); older
+        history survives as perf_metric_daily rows only
+    vacuum_pages: free pages to release per call (0 = all)
+    """
+    raw_days: int = 30
+    run_rollup_days: int | None = None
+    vacuum_pages: int = 0
+
+    def __post_init__(self) -> None:
+        if self.raw_days < 0:
+            raise ValueError("raw_days must be >= 0")
+        if self.run_rollup_days is not None and self.run_rollup_days < self.raw_days:
+            raise ValueError("run_rollup_days must be >= raw_days")
+
+
+_RETRY_ROLLUP_SQL = """
+INSERT OR REPLACE INTO retry_event_rollups (
+    run_id, nodeid, request_name, exception_type, events, max_attempt, sleep_s_total
+)
+SELECT run_id, nodeid, COALESCE(request_name, ''), COALESCE(exception_type, ''),
+       COUNT(*), MAX(attempt_number), SUM(sleep_s)
+FROM retry_events
+WHERE run_id IN (SELECT run_id FROM temp._expired)
+GROUP BY run_id, nodeid, request_name, exception_type
+"""
+
+_DAILY_ROLLUP_SQL = """
+INSERT OR REPLACE INTO perf_metric_daily (
+    metric_name, nodeid, day, runs, n, value_mean, value_min, value_max
+)
+SELECT metric_name, nodeid, substr(started_at, 1, 10),
+       COUNT(*), SUM(n), AVG(value_mean), MIN(value_min), MAX(value_max)
+FROM perf_metric_rollups
+WHERE substr(started_at, 1, 10) IN (
+      SELECT DISTINCT substr(t.started_at, 1, 10)
+      FROM test_runs t JOIN temp._expired e ON e.run_id = t.run_id
+  )
+GROUP BY metric_name, nodeid, substr(started_at, 1, 10)
+"""
+
+
+# aggregates one run's perf_metrics into per-(metric, test) rollup rows
+_ROLLUP_SELECT_SQL = """
+SELECT m.metric_name, m.nodeid, m.run_id, t.started_at,
+       COUNT(m.metric_value) AS n, AVG(m.metric_value) AS value_mean,
+       MIN(m.metric_value) AS value_min, MAX(m.metric_value) AS value_max
+FROM perf_metrics m
+JOIN test_runs t ON t.run_id = m.run_id
+WHERE {where}
+GROUP BY m.metric_name, m.nodeid, m.run_id
+"""
+
+_ROLLUP_SQL = """
+INSERT OR REPLACE INTO perf_metric_rollups (
+    metric_name, nodeid, run_id, started_at, n, value_mean, value_min, value_max
+)""" + _ROLLUP_SELECT_SQL
+
+
+# per-run tables copied by merge_from; perf_metrics.tag_set_id is last so it can be remapped
+_MERGE_COLUMNS = {
+    "test_results": "run_id, nodeid, outcome, duration_s, error_type, error_message, created_at",
+    "perf_metrics": "run_id, nodeid, metric_name, metric_value, unit, tags_JSON, created_at, tag_set_id",
+    "retry_events": "run_id, nodeid, request_name, attempt_number, sleep_s, exception_type, created_at",
+    "perf_samples": "run_id, nodeid, series, unit, dtype, sample_count, data, created_at",
+    "perf_histograms": "run_id, nodeid, name, unit, total_count, hist, created_at",
+}
+
+
+def _freeze(value: Any) -> Any:
+    # hashable, order-insensitive form of a JSON-like value (the tag-set cache key)
+    if isinstance(value, dict):
+        return frozenset((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    # keep 1, 1.0 and True apart: they hash equal but encode differently
+    return (value.__class__, value)
+
+
+def _tag_digest(tags_json: str) -> bytes:
+    return hashlib.sha256(tags_json.encode("utf-8")).digest()[:16]
+
+
+def _canonical_tags(tags: Any) -> str:
+    return json.dumps(tags, sort_keys=True, separators=(",", ":"))
+
+
+class _Flush:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+# how often a blocked producer/flush re-checks that the writer thread is still alive
+_WRITER_POLL_S = 0.5
+
+
+class _BatchWriter(threading.Thread):
+    """
+    drains (sql, params) rows from a bounded queue and writes them with
+    executemany, one transaction per batch
+    """
+    def __init__(self, store: SqlStore, cfg: SqlStoreConfig):
+        super().__init__(name="sqlstore-writer", daemon=True)
+        self._store = store
+        self._batch_rows = max(1, cfg.batch_rows)
+        self._interval_s = max(0.001, cfg.flush_interval_ms / 1000.0)
+        self.queue: queue.Queue = queue.Queue(maxsize=max(1, cfg.queue_max))
+
+    def run(self) -> None:
+        pending: dict[str, list[tuple]] = {}
+        count = 0
+        deadline = time.monotonic() + self._interval_s
+
+        while True:
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, tuple):
+                sql, params = item
+                pending.setdefault(sql, []).append(params)
+                count += 1
+                if count < self._batch_rows and time.monotonic() < deadline:
+                    continue
+            elif item is None and time.monotonic() < deadline:
+                continue
+
+            # batch full, interval elapsed, flush requested, or stopping
+            if count:
+                try:
+                    self._store._write_batch(pending)
+                except Exception:
+                    # never let one batch kill the thread: producers and flush() would block forever
+                    log.exception("telemetry batch write failed; dropping %d rows", count)
+                    self._store.dropped_rows += count
+                pending, count = {}, 0
+            deadline = time.monotonic() + self._interval_s
+
+            if isinstance(item, _Flush):
+                item.done.set()
+            elif item is _STOP:
+                return
+
+    def put(self, item: Any) -> None:
+        """
+        enqueue, blocking while the queue is full; RuntimeError if the thread has died
+        """
+        while True:
+            if not self.is_alive():
+                raise RuntimeError("telemetry writer thread is not running")
+            try:
+                self.queue.put(item, timeout=_WRITER_POLL_S)
+                return
+            except queue.Full:
+                continue
+
+    def wait(self, marker: _Flush) -> None:
+        while not marker.done.wait(_WRITER_POLL_S):
+            if not self.is_alive():
+                raise RuntimeError("telemetry writer thread is not running")
+
 
 class SqlStore:
     """
     Tiny sqlite-backed telemetry store for test runs/results/perf metrics
     Thread-safe enough for local pytest usage via an internal lock
+
+    With SqlStoreConfig(async_writes=True), record_* only enqueue; a writer
+    thread batches them. start_run/finish_run/flush/close first drain the queue.
     """
     def __init__(self, config: SqlStoreConfig | None = None):
-        self._cfg = config or SqlStoreConfig(db_path=_default_db_path())
+        self._cfg = config or SqlStoreConfig()
+        self._db_path = self._cfg.db_path
+        if self._cfg.shard_by_month:
+            self._db_path = shard_path(self._db_path)
         self._lock = threading.Lock()
-        self._conn = sqlite3.connect(str(self._cfg.db_path), check_same_thread=False)
+        self._conn = sqlite3.connect(
+            f"{Path(self._db_path).resolve().as_uri()}?mode=ro" if self._cfg.read_only else str(self._db_path),
+            uri=self._cfg.read_only,
+            check_same_thread=False,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+        )
         self._conn.row_factory = sqlite3.Row
+        self.dropped_rows = 0
+        # frozen tag set -> tag_sets.id; ids are never reused, so entries never go stale
+        self._tag_ids: dict[Any, int] = {}
+        self._writer: _BatchWriter | None = None
+        if self._cfg.read_only:
+            self._read_only_fallbacks()
+            return
 
         with self._conn:
+            # only takes effect on a new file (before the first table); see apply_retention
+            self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
             self._conn.execute("PRAGMA journal_mode=WAL;")
+            # NORMAL is durable across app crashes in WAL mode and avoids an fsync per commit
+            self._conn.execute("PRAGMA synchronous=NORMAL;")
             self._conn.execute("PRAGMA foreign_keys=ON;")
         self._init_schema()
 
+        if self._cfg.async_writes:
+            self._writer = _BatchWriter(self, self._cfg)
+            self._writer.start()
+
     @property
     def db_path(self) -> Path:
-        return self._cfg.db_path
+        return self._db_path
 
     def close(self) -> None:
+        if self._writer is not None:
+            if self._writer.is_alive():
+                self._writer.put(_STOP)
+            self._writer.join()
+            self._writer = None
         with self._lock:
             self._conn.close()
 
+    def flush(self) -> None:
+        """
+        block until every queued row is committed (no-op in sync mode)
+        """
+        if self._writer is not None:
+            marker = _Flush()
+            self._writer.put(marker)
+            self._writer.wait(marker)
+
+    def _write(self, sql: str, params: tuple) -> None:
+        if self._writer is not None:
+            # blocks when the queue is full: backpressure instead of unbounded memory
+            self._writer.put((sql, params))
+            return
+        with self._lock, self._conn:
+            self._conn.execute(sql, params)
+
+    def _write_batch(self, pending: dict[str, list[tuple]]) -> None:
+        try:
+            with self._lock, self._conn:
+                for sql, rows in pending.items():
+                    self._conn.executemany(sql, rows)
+            return
+        except Exception:
+            log.exception("batched telemetry write failed; retrying row by row")
+
+        # salvage the good rows of a batch that contained a bad one
+        for sql, rows in pending.items():
+            for params in rows:
+                try:
+                    with self._lock, self._conn:
+                        self._conn.execute(sql, params)
+                except Exception:
+                    self.dropped_rows += 1
+
     def _init_schema(self) -> None:
         ddl = """
         CREATE TABLE IF NOT EXISTS test_runs (
@@ -80,18 +368,68 @@ class SqlStore:
             unit TEXT,
             tags_JSON TEXT,
             created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            tag_set_id INTEGER REFERENCES tag_sets(id),
             FOREIGN KEY (run_id) REFERENCES test_runs(run_id)
         );
 
+        -- content-addressed tag dictionaries; perf_metrics rows point here instead of
+        -- repeating the JSON (tags_JSON is only populated on rows from older versions)
+        CREATE TABLE IF NOT EXISTS tag_sets (
+            id INTEGER PRIMARY KEY,
+            hash BLOB NOT NULL UNIQUE,
+            tags_json TEXT NOT NULL
+        );
+
         CREATE INDEX IF NOT EXISTS idx_perf_metrics_run_id ON perf_metrics(run_id);
         CREATE INDEX IF NOT EXISTS idx_perf_metrics_nodeid ON perf_metrics(nodeid);
         CREATE INDEX IF NOT EXISTS idx_perf_metrics_name ON perf_metrics(metric_name);
+        CREATE INDEX IF NOT EXISTS idx_perf_metrics_metric_node_run ON perf_metrics(metric_name, nodeid, run_id);
+
+        -- one row per (metric, test, run), written at finish_run; trend queries read only this
+        CREATE TABLE IF NOT EXISTS perf_metric_rollups (
+            metric_name TEXT NOT NULL,
+            nodeid TEXT NOT NULL,
+            run_id TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            n INTEGER NOT NULL,
+            value_mean REAL,
+            value_min REAL,
+            value_max REAL,
+            PRIMARY KEY (metric_name, nodeid, run_id)
+        ) WITHOUT ROWID;
+
+        CREATE INDEX IF NOT EXISTS idx_perf_metric_rollups_series
+            ON perf_metric_rollups(metric_name, nodeid, started_at);
+
+        -- retention downsampling targets (see apply_retention)
+        CREATE TABLE IF NOT EXISTS perf_metric_daily (
+            metric_name TEXT NOT NULL,
+            nodeid TEXT NOT NULL,
+            day TEXT NOT NULL,
+            runs INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            value_mean REAL,
+            value_min REAL,
+            value_max REAL,
+            PRIMARY KEY (metric_name, nodeid, day)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS retry_event_rollups (
+            run_id TEXT NOT NULL,
+            nodeid TEXT NOT NULL,
+            request_name TEXT NOT NULL,
+            exception_type TEXT NOT NULL,
+            events INTEGER NOT NULL,
+            max_attempt INTEGER,
+            sleep_s_total REAL,
+            PRIMARY KEY (run_id, nodeid, request_name, exception_type)
+        ) WITHOUT ROWID;
 
         CREATE TABLE IF NOT EXISTS retry_events (
             id INTEGER PRIMARY KEY AUTOINCREMENT,   
             run_id TEXT NOT NULL,
             nodeid TEXT NOT NULL,
-            equest_name TEXT,
+            request_name TEXT,
             attempt_number INTEGER,
             sleep_s REAL,
             exception_type TEXT,
@@ -101,11 +439,95 @@ class SqlStore:
 
         CREATE INDEX IF NOT EXISTS idx_retry_events_run_id ON retry_events(run_id);
         CREATE INDEX IF NOT EXISTS idx_retry_events_nodeid ON retry_events(nodeid);
+
+        -- raw per-request vectors, one typed BLOB per (run, test, series) chunk
+        CREATE TABLE IF NOT EXISTS perf_samples (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT NOT NULL,
+            nodeid TEXT NOT NULL,
+            series TEXT NOT NULL,
+            unit TEXT,
+            dtype TEXT NOT NULL,
+            sample_count INTEGER NOT NULL,
+            data BLOB NOT NULL,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (run_id) REFERENCES test_runs(run_id)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_perf_samples_lookup ON perf_samples(nodeid, series, run_id);
+        CREATE INDEX IF NOT EXISTS idx_perf_samples_run_id ON perf_samples(run_id);
+
+        CREATE TABLE IF NOT EXISTS perf_histograms (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT NOT NULL,
+            nodeid TEXT NOT NULL,
+            name TEXT NOT NULL,
+            unit TEXT,
+            total_count INTEGER NOT NULL,
+            hist HISTOGRAM NOT NULL,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (run_id) REFERENCES test_runs(run_id)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_perf_histograms_lookup ON perf_histograms(nodeid, name, run_id);
         """
 
         with self._lock, self._conn:
             self._conn.executescript(ddl)
 
+            # early schemas had a typo'd column; inserts into it silently failed
+            cols = {r["name"] for r in self._conn.execute("PRAGMA table_info(retry_events)")}
+            if "equest_name" in cols and "request_name" not in cols:
+                self._conn.execute("ALTER TABLE retry_events RENAME COLUMN equest_name TO request_name")
+
+            cols = {r["name"] for r in self._conn.execute("PRAGMA table_info(perf_metrics)")}
+            if "tag_set_id" not in cols:
+                self._conn.execute("ALTER TABLE perf_metrics ADD COLUMN tag_set_id INTEGER REFERENCES tag_sets(id)")
+                self._migrate_inline_tags()
+            self._conn.execute("""
+                CREATE VIEW IF NOT EXISTS perf_metrics_tagged AS
+                SELECT m.id, m.run_id, m.nodeid, m.metric_name, m.metric_value, m.unit,
+                       COALESCE(t.tags_json, m.tags_JSON) AS tags_json, m.created_at
+                FROM perf_metrics m
+                LEFT JOIN tag_sets t ON t.id = m.tag_set_id
+            """)
+
+            # databases from before the rollup table: backfill finished runs once
+            if self._conn.execute("SELECT 1 FROM perf_metric_rollups LIMIT 1").fetchone() is None:
+                self._conn.execute(_ROLLUP_SQL.format(where="t.finished_at IS NOT NULL"))
+
+    def _read_only_fallbacks(self) -> None:
+        # a read-only file from before the rollup/histogram tables can't be migrated:
+        # stand in TEMP objects so the queries still run (rollups computed on the fly)
+        tables = {r[0] for r in self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if "perf_metric_rollups" not in tables:
+            self._conn.execute(
+                "CREATE TEMP VIEW perf_metric_rollups AS "
+                + _ROLLUP_SELECT_SQL.format(where="t.finished_at IS NOT NULL")
+            )
+        if "perf_histograms" not in tables:
+            self._conn.execute(
+                "CREATE TEMP TABLE perf_histograms (run_id TEXT, nodeid TEXT, name TEXT, hist HISTOGRAM)"
+            )
+
+    def _migrate_inline_tags(self) -> None:
+        # one-off: move per-row tags_JSON text into tag_sets (caller holds the lock)
+        c = self._conn
+        legacy = [r[0] for r in c.execute("SELECT DISTINCT tags_JSON FROM perf_metrics WHERE tags_JSON IS NOT NULL")]
+        for old in legacy:
+            try:
+                tags_json = _canonical_tags(json.loads(old))
+            except ValueError:
+                continue
+            digest = _tag_digest(tags_json)
+            c.execute("INSERT OR IGNORE INTO tag_sets (hash, tags_json) VALUES (?, ?)", (digest, tags_json))
+            tag_id = c.execute("SELECT id FROM tag_sets WHERE hash = ?", (digest,)).fetchone()[0]
+            c.execute(
+                "UPDATE perf_metrics SET tag_set_id = ?, tags_JSON = NULL WHERE tags_JSON = ?", (tag_id, old),
+            )
+        if legacy:
+            log.info("moved %d distinct inline tag sets into tag_sets", len(legacy))
+
     def start_run(
         self,
         *,
@@ -123,6 +545,8 @@ class SqlStore:
         ) VALUES (?, ?, ?, ?, ?, ?, ?)
         """
 
+        # synchronous: queued rows reference this run_id
+        self.flush()
         with self._lock, self._conn:
             self._conn.execute(
                 sql,
@@ -136,8 +560,182 @@ class SqlStore:
         WHERE run_id = ?
         """
 
+        self.flush()
         with self._lock, self._conn:
             self._conn.execute(sql, (finished_at, exit_status, run_id))
+            self._conn.execute(_ROLLUP_SQL.format(where="t.run_id = ?"), (run_id,))
+
+    def apply_retention(self, policy: RetentionPolicy, *, now: datetime | None = None) -> dict[str, Any]:
+        """
+        Downsample and drop raw rows of runs older than policy.raw_days, then
+        release free pages with an incremental vacuum. Cutoffs are aligned to
+        UTC midnight so a day is never half raw, half downsampled.
+        """
+        now = now or datetime.now(timezone.utc)
+        midnight = now.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        raw_cutoff = (midnight - timedelta(days=policy.raw_days)).isoformat()
+        rollup_cutoff = ""
+        if policy.run_rollup_days is not None:
+            rollup_cutoff = (midnight - timedelta(days=policy.run_rollup_days)).isoformat()
+
+        self.flush()
+        out: dict[str, Any] = {"db_path": str(self._db_path), "raw_cutoff": raw_cutoff}
+        with self._lock:
+            with self._conn:
+                c = self._conn
+                c.execute("DROP TABLE IF EXISTS temp._expired")
+                # runs past the cutoff that still have raw rows (earlier calls already handled the rest)
+                c.execute(
+                    """
+                    CREATE TEMP TABLE _expired AS
+                    SELECT run_id FROM test_runs t
+                    WHERE started_at < ?
+                      AND (EXISTS (SELECT 1 FROM perf_metrics m WHERE m.run_id = t.run_id)
+                           OR EXISTS (SELECT 1 FROM retry_events r WHERE r.run_id = t.run_id)
+                           OR EXISTS (SELECT 1 FROM perf_samples s WHERE s.run_id = t.run_id)
+                           OR EXISTS (SELECT 1 FROM perf_histograms h WHERE h.run_id = t.run_id))
+                    """,
+                    (raw_cutoff,),
+                )
+                out["expired_runs"] = c.execute("SELECT COUNT(*) FROM temp._expired").fetchone()[0]
+
+                # per-run aggregates first; runs whose raw rows are already gone produce no rows
+                c.execute(_ROLLUP_SQL.format(where="t.run_id IN (SELECT run_id FROM temp._expired)"))
+                c.execute(_RETRY_ROLLUP_SQL)
+                # only days touched by newly expired runs; older days are already final
+                c.execute(_DAILY_ROLLUP_SQL)
+
+                for table in ("perf_metrics", "retry_events", "perf_samples", "perf_histograms"):
+                    cur = c.execute(f"DELETE FROM {table} WHERE run_id IN (SELECT run_id FROM temp._expired)")
+                    out[f"{table}_deleted"] = cur.rowcount
+                if rollup_cutoff:
+                    cur = c.execute("DELETE FROM perf_metric_rollups WHERE started_at < ?", (rollup_cutoff,))
+                    out["perf_metric_rollups_deleted"] = cur.rowcount
+                c.execute("DROP TABLE temp._expired")
+
+            out["freed_pages"] = self._incremental_vacuum(policy.vacuum_pages)
+        return out
+
+    def _incremental_vacuum(self, pages: int) -> int | None:
+        c = self._conn
+        if c.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # file predates auto_vacuum=INCREMENTAL; enable_incremental_vacuum() converts it
+            return None
+        before = c.execute("PRAGMA freelist_count").fetchone()[0]
+        c.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+        c.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        return before - c.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def enable_incremental_vacuum(self) -> None:
+        """
+        one-off full VACUUM that switches an existing file to auto_vacuum=INCREMENTAL
+        """
+        self.flush()
+        with self._lock:
+            self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self._conn.execute("VACUUM")
+
+    def merge_from(self, paths: Iterable[Path], run_id: str) -> dict[str, int]:
+        """
+        Copy `run_id`'s rows from other SqlStore files (e.g. per-worker shards)
+        into this one, in a single transaction. Tag sets are re-keyed by hash,
+        since each file numbers its own tag_sets. The run row itself must
+        already exist here.
+        """
+        self.flush()
+        copied = dict.fromkeys(_MERGE_COLUMNS, 0)
+        with self._lock, self._conn:
+            for path in paths:
+                src = sqlite3.connect(str(path))
+                try:
+                    tag_map: dict[int, int] = {}
+                    for src_id, digest, tags_json in src.execute("SELECT id, hash, tags_json FROM tag_sets"):
+                        self._conn.execute(
+                            "INSERT OR IGNORE INTO tag_sets (hash, tags_json) VALUES (?, ?)", (digest, tags_json),
+                        )
+                        tag_map[src_id] = self._conn.execute(
+                            "SELECT id FROM tag_sets WHERE hash = ?", (digest,),
+                        ).fetchone()[0]
+
+                    for table, cols in _MERGE_COLUMNS.items():
+                        cursor = src.execute(f"SELECT {cols} FROM {table} WHERE run_id = ?", (run_id,))
+                        rows: Iterable[Any] = cursor
+                        if table == "perf_metrics":
+                            rows = ((*r[:-1], tag_map.get(r[-1])) for r in cursor)
+                        marks = ", ".join("?" * (cols.count(",") + 1))
+                        cur = self._conn.executemany(f"INSERT INTO {table} ({cols}) VALUES ({marks})", rows)
+                        copied[table] += max(cur.rowcount, 0)
+                finally:
+                    src.close()
+        return copied
+
+    def latest_run_id(self, *, finished_only: bool = True) -> str | None:
+        sql = "SELECT run_id FROM test_runs {where} ORDER BY started_at DESC LIMIT 1".format(
+            where="WHERE finished_at IS NOT NULL" if finished_only else "",
+        )
+        self.flush()
+        with self._lock:
+            row = self._conn.execute(sql).fetchone()
+        return row["run_id"] if row else None
+
+    def run_rollups(self, run_id: str, metric_name: str) -> list[dict[str, Any]]:
+        """
+        -> [{nodeid, run_id, started_at, n, value, min, max}] for one run
+        """
+        sql = """
+        SELECT nodeid, run_id, started_at, n, value_mean AS value, value_min AS min, value_max AS max
+        FROM perf_metric_rollups
+        WHERE metric_name = ? AND run_id = ?
+        ORDER BY nodeid
+        """
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(sql, (metric_name, run_id))]
+
+    def metric_series(
+        self,
+        metric_name: str,
+        *,
+        nodeid: str | None = None,
+        last: int | None = None,
+        before: str | None = None,
+    ) -> dict[str, list[dict[str, Any]]]:
+        """
+        -> {nodeid: [{run_id, started_at, n, value, min, max}, ...]} oldest first
+
+        last:   keep only the newest N runs per nodeid
+        before: only runs that started strictly before this ISO timestamp
+        """
+        where = ["metric_name = ?"]
+        params: list[Any] = [metric_name]
+        if nodeid is not None:
+            where.append("nodeid = ?")
+            params.append(nodeid)
+        if before is not None:
+            where.append("started_at < ?")
+            params.append(before)
+        outer = ""
+        if last is not None:
+            outer = "WHERE rn <= ?"
+            params.append(last)
+
+        sql = f"""
+        SELECT nodeid, run_id, started_at, n, value, min, max FROM (
+            SELECT nodeid, run_id, started_at, n,
+                   value_mean AS value, value_min AS min, value_max AS max,
+                   ROW_NUMBER() OVER (PARTITION BY nodeid ORDER BY started_at DESC) AS rn
+            FROM perf_metric_rollups
+            WHERE {" AND ".join(where)}
+        )
+        {outer}
+        ORDER BY nodeid, started_at
+        """
+
+        out: dict[str, list[dict[str, Any]]] = {}
+        with self._lock:
+            for r in self._conn.execute(sql, params):
+                row = dict(r)
+                out.setdefault(row.pop("nodeid"), []).append(row)
+        return out
 
     def record_test_result(
         self,
@@ -154,11 +752,7 @@ class SqlStore:
             run_id, nodeid, outcome, duration_s, error_type, error_message
         ) VALUES (?, ?, ?, ?, ?, ?)
         """
-        with self._lock, self._conn:
-            self._conn.execute(
-                sql,
-                (run_id, nodeid, outcome, duration_s, error_type, error_message),
-            )
+        self._write(sql, (run_id, nodeid, outcome, duration_s, error_type, error_message))
     
     def record_metric(
         self,
@@ -172,13 +766,34 @@ class SqlStore:
     ) -> None:
         sql = """
         INSERT INTO perf_metrics (
-            run_id, nodeid, metric_name, metric_value, unit, tags_json
+            run_id, nodeid, metric_name, metric_value, unit, tag_set_id
         ) VALUES (?, ?, ?, ?, ?, ?)
         """
-        tags_json = json.dumps(tags, sort_keys=True) if tags else None
         val = None if metric_value is None else float(metric_value)
+        self._write(sql, (run_id, nodeid, metric_name, val, unit, self.tag_set_id(tags)))
+
+    def tag_set_id(self, tags: dict[str, Any] | None) -> int | None:
+        """
+        -> id of the tag_sets row for `tags`, inserting it on first sight.
+        A cache hit costs one freeze + dict lookup: no JSON encoding, no SQL.
+        """
+        if not tags:
+            return None
+        key = _freeze(tags)
+        tag_id = self._tag_ids.get(key)
+        if tag_id is not None:
+            return tag_id
+
+        tags_json = _canonical_tags(tags)
+        digest = _tag_digest(tags_json)
+        # synchronous even in async mode: queued metric rows reference the id
         with self._lock, self._conn:
-            self._conn.execute(sql, (run_id, nodeid, metric_name, val, unit, tags_json))
+            self._conn.execute(
+                "INSERT OR IGNORE INTO tag_sets (hash, tags_json) VALUES (?, ?)", (digest, tags_json),
+            )
+            tag_id = self._conn.execute("SELECT id FROM tag_sets WHERE hash = ?", (digest,)).fetchone()[0]
+        self._tag_ids[key] = tag_id
+        return tag_id
 
     def record_retry_event(
         self,
@@ -195,8 +810,125 @@ class SqlStore:
             run_id, nodeid, request_name, attempt_number, sleep_s, exception_type
         ) VALUES (?, ?, ?, ?, ?, ?)
         """
-        
-        with self._lock, self._conn:
-            self._conn.execute(sql, (run_id, nodeid, request_name, attempt_number, sleep_s, exception_type),)
-    
 
+        self._write(sql, (run_id, nodeid, request_name, attempt_number, sleep_s, exception_type))
+
+    def record_samples(
+        self,
+        *,
+        run_id: str,
+        nodeid: str,
+        series: str,
+        values: Iterable[float] | Any,
+        unit: str | None = None,
+    ) -> int:
+        """
+        store a raw sample vector (list or NumPy array) as a float64 BLOB;
+        returns the sample count. Repeated calls for the same series append chunks.
+        """
+        count, blob = encode_samples(values)
+        sql = """
+        INSERT INTO perf_samples (
+            run_id, nodeid, series, unit, dtype, sample_count, data
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+        self._write(sql, (run_id, nodeid, series, unit, SAMPLE_DTYPE, count, blob))
+        return count
+
+    def load_samples(self, *, run_id: str, nodeid: str, series: str):
+        """
+        -> NumPy array of every chunk recorded for (run_id, nodeid, series), in insert order
+        """
+        self.flush()
+        sql = """
+        SELECT data, dtype FROM perf_samples
+        WHERE nodeid = ? AND series = ? AND run_id = ?
+        ORDER BY id
+        """
+        with self._lock:
+            rows = self._conn.execute(sql, (nodeid, series, run_id)).fetchall()
+        return concat_samples([(r["data"], r["dtype"]) for r in rows])
+
+    def load_breakdown(self, *, run_id: str, nodeid: str, prefix: str = "breakdown.") -> dict[str, Any]:
+        """
+        -> {series: NumPy array} for every `prefix*` series of (run_id, nodeid); the
+        per-stage latency series are written one value per request, so index i
+        across the arrays is request i
+        """
+        self.flush()
+        sql = """
+        SELECT DISTINCT series FROM perf_samples
+        WHERE nodeid = ? AND run_id = ? AND series LIKE ? ESCAPE '\\'
+        ORDER BY series
+        """
+        pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        with self._lock:
+            names = [r["series"] for r in self._conn.execute(sql, (nodeid, run_id, pattern))]
+        out = {name: self.load_samples(run_id=run_id, nodeid=nodeid, series=name) for name in names}
+        lengths = {len(v) for v in out.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"breakdown series are not aligned: {({k: len(v) for k, v in out.items()})}")
+        return out
+
+    def load_sample_history(self, *, nodeid: str, series: str) -> dict[str, Any]:
+        """
+        -> {run_id: NumPy array} for every run that recorded this series, oldest run first
+        """
+        self.flush()
+        sql = """
+        SELECT s.run_id, s.data, s.dtype FROM perf_samples s
+        JOIN test_runs r ON r.run_id = s.run_id
+        WHERE s.nodeid = ? AND s.series = ?
+        ORDER BY r.started_at, s.id
+        """
+        with self._lock:
+            rows = self._conn.execute(sql, (nodeid, series)).fetchall()
+        chunks: dict[str, list[tuple[bytes, str]]] = {}
+        for r in rows:
+            chunks.setdefault(r["run_id"], []).append((r["data"], r["dtype"]))
+        return {run_id: concat_samples(c) for run_id, c in chunks.items()}
+
+    def record_histogram(
+        self,
+        *,
+        run_id: str,
+        nodeid: str,
+        name: str,
+        hist: LatencyHistogram,
+        unit: str | None = "ms",
+    ) -> None:
+        sql = """
+        INSERT INTO perf_histograms (
+            run_id, nodeid, name, unit, total_count, hist
+        ) VALUES (?, ?, ?, ?, ?, ?)
+        """
+        # serialize now: the caller may keep recording into `hist` while the row is queued
+        self._write(sql, (run_id, nodeid, name, unit, hist.total, hist.to_bytes()))
+
+    def load_histogram(
+        self,
+        *,
+        nodeid: str,
+        name: str,
+        run_ids: Iterable[str] | None = None,
+    ) -> LatencyHistogram | None:
+        """
+        -> every stored histogram for (nodeid, name) merged into one, optionally
+        limited to `run_ids`; None if nothing was recorded
+        """
+        self.flush()
+        sql = "SELECT hist FROM perf_histograms WHERE nodeid = ? AND name = ?"
+        params: list[Any] = [nodeid, name]
+        if run_ids is not None:
+            ids = list(run_ids)
+            if not ids:
+                return None
+            sql += f" AND run_id IN ({', '.join('?' * len(ids))})"
+            params.extend(ids)
+
+        merged: LatencyHistogram | None = None
+        with self._lock:
+            for r in self._conn.execute(sql, params):
+                h = r["hist"]
+                merged = h if merged is None else merged.merge(h)
+        return merged
@@ -0,0 +1,153 @@
+"""
+Cross-run trend analysis over the perf_metric_rollups table.
+
+A run is flagged when a metric moves past its rolling baseline by more than
+k scaled MADs (median absolute deviation; robust to the odd noisy CI run) in
+the direction that is worse for that metric.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from statistics import median
+from typing import Any, Iterable, Sequence
+
+from .shards import ShardedResults
+from .sql_store import SqlStore
+
+# 1.4826 * MAD estimates sigma for normally distributed data
+MAD_SCALE = 1.4826
+
+DEFAULT_METRICS = ("latency.p95", "results.success_rate")
+
+
+def worse_direction(metric_name: str) -> int:
+    """
+    +1: higher is worse (latency, retries, timeouts); -1: lower is worse (rates)
+    """
+    leaf = metric_name.rsplit(".", 1)[-1]
+    if leaf in ("success_rate", "successes", "requests_per_s"):
+        return -1
+    return 1
+
+
+@dataclass(frozen=True)
+class Baseline:
+    median: float
+    mad: float
+    n: int
+
+    @property
+    def sigma(self) -> float:
+        return MAD_SCALE * self.mad
+
+
+def robust_baseline(values: Iterable[float | None]) -> Baseline | None:
+    vals = [float(v) for v in values if v is not None]
+    if not vals:
+        return None
+    med = median(vals)
+    return Baseline(median=med, mad=median(abs(v - med) for v in vals), n=len(vals))
+
+
+def rolling_baseline(values: Sequence[float | None], window: int) -> list[Baseline | None]:
+    """
+    baseline for each point from the `window` points before it (None while empty)
+    """
+    return [robust_baseline(values[max(0, i - window):i]) for i in range(len(values))]
+
+
+@dataclass(frozen=True)
+class RegressionFlag:
+    metric_name: str
+    nodeid: str
+    run_id: str
+    value: float
+    baseline: Baseline
+    band: float
+    direction: int
+
+    @property
+    def delta(self) -> float:
+        return self.value - self.baseline.median
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "metric_name": self.metric_name,
+            "nodeid": self.nodeid,
+            "run_id": self.run_id,
+            "value": self.value,
+            "baseline_median": self.baseline.median,
+            "baseline_mad": self.baseline.mad,
+            "baseline_runs": self.baseline.n,
+            "band": self.band,
+            "delta": self.delta,
+            "worse_when": "higher" if self.direction > 0 else "lower",
+        }
+
+
+def check_value(
+    value: float,
+    baseline: Baseline,
+    *,
+    direction: int,
+    k: float = 3.0,
+    min_rel_change: float = 0.05,
+) -> float | None:
+    """
+    -> the allowed band if `value` is a regression, else None
+
+    The band is k scaled MADs, floored at min_rel_change * |median| so a
+    perfectly flat history (MAD = 0) doesn't flag every 1% wobble.
+    """
+    band = max(k * baseline.sigma, min_rel_change * abs(baseline.median))
+    if (value - baseline.median) * direction > band:
+        return band
+    return None
+
+
+def detect_regressions(
+    store: SqlStore | ShardedResults,
+    run_id: str | None = None,
+    *,
+    metrics: Sequence[str] = DEFAULT_METRICS,
+    window: int = 20,
+    k: float = 3.0,
+    min_history: int = 5,
+    min_rel_change: float = 0.05,
+) -> list[RegressionFlag]:
+    """
+    compare every (metric, nodeid) of `run_id` (default: latest finished run)
+    against the `window` runs that started before it
+    """
+    run_id = run_id or store.latest_run_id()
+    if run_id is None:
+        return []
+
+    flags: list[RegressionFlag] = []
+    for metric_name in metrics:
+        current = store.run_rollups(run_id, metric_name)
+        if not current:
+            continue
+        history = store.metric_series(metric_name, last=window, before=current[0]["started_at"])
+        direction = worse_direction(metric_name)
+
+        for row in current:
+            if row["value"] is None:
+                continue
+            baseline = robust_baseline(p["value"] for p in history.get(row["nodeid"], []))
+            if baseline is None or baseline.n < min_history:
+                continue
+            band = check_value(
+                row["value"], baseline, direction=direction, k=k, min_rel_change=min_rel_change,
+            )
+            if band is not None:
+                flags.append(RegressionFlag(
+                    metric_name=metric_name,
+                    nodeid=row["nodeid"],
+                    run_id=run_id,
+                    value=row["value"],
+                    baseline=baseline,
+                    band=band,
+                    direction=direction,
+                ))
+    return flags
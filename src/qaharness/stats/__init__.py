@@ -0,0 +1,25 @@
+from .histogram import HistogramError, LatencyHistogram
+from .inference import (
+    Interval,
+    assert_at_least,
+    assert_at_most,
+    bootstrap_ci,
+    compare_ci,
+    compare_rates,
+    wilson_interval,
+)
+from .streaming import RunningStats, TDigest
+
+__all__ = [
+    "HistogramError",
+    "Interval",
+    "LatencyHistogram",
+    "RunningStats",
+    "TDigest",
+    "assert_at_least",
+    "assert_at_most",
+    "bootstrap_ci",
+    "compare_ci",
+    "compare_rates",
+    "wilson_interval",
+]
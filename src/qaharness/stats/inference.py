@@ -0,0 +1,315 @@
+"""
+Confidence intervals for envelope assertions (NumPy, vectorized).
+
+A p95 from 12-60 samples is noisy: comparing the point estimate against a
+fixed threshold fails healthy runs and passes regressed ones about equally
+often. These helpers decide on the interval instead:
+
+    pass          the whole interval is on the good side of the threshold
+    fail          the whole interval is on the bad side
+    inconclusive  the threshold is inside the interval (more samples needed)
+
+Percentile bootstrap resamples are drawn as multinomial counts over the
+distinct values (or histogram buckets), which is equivalent to resampling
+individual samples with replacement but costs O(resamples * distinct values):
+thousands of resamples take milliseconds, and a LatencyHistogram can be
+bootstrapped directly without keeping raw samples. Past `max_distinct`
+distinct values (large runs, where the bootstrap and the normal theory
+agree) the interval comes from order statistics for percentiles
+(ranks n*q -/+ z*sqrt(n*q*(1-q))) and from the standard error for the mean,
+so millions of samples cost one sort. Percentiles use the same nearest-rank
+definition as LatencyHistogram.percentile.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Any, Iterable
+
+from .histogram import LatencyHistogram
+
+PASS = "pass"
+FAIL = "fail"
+INCONCLUSIVE = "inconclusive"
+
+DEFAULT_RESAMPLES = 2000
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_MAX_DISTINCT = 1024
+
+# cap on one (resamples x distinct values) block so huge inputs don't allocate GBs
+_MAX_BLOCK = 4_000_000
+
+
+def _numpy():
+    try:
+        import numpy as np
+    except ImportError as e:  # pragma: no cover - depends on environment
+        raise ImportError("confidence intervals require numpy (pip install -e '.[stats]')") from e
+    return np
+
+
+@dataclass(frozen=True)
+class Interval:
+    estimate: float
+    low: float
+    high: float
+    confidence: float
+    n: int
+
+    def verdict_at_most(self, limit: float) -> str:
+        """
+        for "metric <= limit" (latency, retries)
+        """
+        if self.high <= limit:
+            return PASS
+        if self.low > limit:
+            return FAIL
+        return INCONCLUSIVE
+
+    def verdict_at_least(self, limit: float) -> str:
+        """
+        for "metric >= limit" (success rate, a delay that must be applied)
+        """
+        if self.low >= limit:
+            return PASS
+        if self.high < limit:
+            return FAIL
+        return INCONCLUSIVE
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "estimate": self.estimate,
+            "low": self.low,
+            "high": self.high,
+            "confidence": self.confidence,
+            "n": self.n,
+        }
+
+
+def _z(confidence: float) -> float:
+    if not 0.0 < confidence < 1.0:
+        raise ValueError("confidence must be in (0, 1)")
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(successes: int, n: int, *, confidence: float = DEFAULT_CONFIDENCE) -> Interval:
+    """
+    Wilson score interval for a success rate; well behaved at 0/n and n/n
+    where the normal approximation collapses to zero width
+    """
+    if n <= 0:
+        raise ValueError("n must be > 0")
+    if not 0 <= successes <= n:
+        raise ValueError("successes must be in [0, n]")
+    z = _z(confidence)
+    p = successes / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return Interval(estimate=p, low=max(0.0, centre - half), high=min(1.0, centre + half), confidence=confidence, n=n)
+
+
+def _distinct(data: Any):
+    """
+    samples or LatencyHistogram -> (sorted distinct values, counts) as arrays
+    """
+    np = _numpy()
+    if isinstance(data, LatencyHistogram):
+        pairs = data.buckets()
+        values = np.fromiter((v for v, _ in pairs), dtype=np.float64, count=len(pairs))
+        counts = np.fromiter((c for _, c in pairs), dtype=np.int64, count=len(pairs))
+        return values, counts
+    arr = np.asarray(data if hasattr(data, "dtype") else list(data), dtype=np.float64).ravel()
+    if arr.size and np.isnan(arr).any():
+        raise ValueError("samples contain NaN")
+    return np.unique(arr, return_counts=True)
+
+
+def _large_sample_ci(values, counts, stat: str | float, confidence: float) -> tuple[float, float]:
+    np = _numpy()
+    z = _z(confidence)
+    n = int(counts.sum())
+    if stat == "mean":
+        mean = float(values @ counts / n)
+        var = float(((values - mean) ** 2) @ counts / max(1, n - 1))
+        half = z * math.sqrt(var / n)
+        return mean - half, mean + half
+    q = float(stat) / 100.0
+    half = z * math.sqrt(n * q * (1 - q))
+    cum = np.cumsum(counts)
+    lo_rank = min(n, max(1, math.floor(n * q - half)))
+    hi_rank = min(n, max(1, math.ceil(n * q + half)))
+    lo, hi = np.searchsorted(cum, [lo_rank, hi_rank], side="left")
+    return float(values[lo]), float(values[hi])
+
+
+def _replicates_or_bounds(values, counts, stat, resamples, rng, confidence, max_distinct):
+    """
+    -> ("reps", array) for a bootstrap, or ("bounds", (low, high)) past max_distinct
+    """
+    if len(values) > max_distinct:
+        return "bounds", _large_sample_ci(values, counts, stat, confidence)
+    return "reps", _bootstrap_stats(values, counts, stat, resamples, rng)
+
+
+def _rank_index(cum, n: int, p: float):
+    np = _numpy()
+    want = max(1, math.ceil(p / 100.0 * n))
+    # first distinct value whose cumulative count reaches the nearest rank
+    return np.argmax(cum >= want, axis=-1)
+
+
+def _bootstrap_stats(values, counts, stat: str | float, resamples: int, rng):
+    """
+    -> array of `resamples` bootstrap replicates of the statistic; `stat` is
+    a percentile (0..100) or "mean"
+    """
+    np = _numpy()
+    n = int(counts.sum())
+    probs = counts / n
+    out = np.empty(resamples, dtype=np.float64)
+    block = max(1, _MAX_BLOCK // max(1, len(values)))
+    for start in range(0, resamples, block):
+        size = min(block, resamples - start)
+        draws = rng.multinomial(n, probs, size=size)
+        if stat == "mean":
+            out[start:start + size] = draws @ values / n
+        else:
+            idx = _rank_index(np.cumsum(draws, axis=1), n, float(stat))
+            out[start:start + size] = values[idx]
+    return out
+
+
+def _point(values, counts, stat: str | float) -> float:
+    np = _numpy()
+    n = int(counts.sum())
+    if stat == "mean":
+        return float(values @ counts / n)
+    return float(values[_rank_index(np.cumsum(counts), n, float(stat))])
+
+
+def _check_stat(stat: str | float) -> None:
+    if stat != "mean" and not (isinstance(stat, (int, float)) and 0.0 <= stat <= 100.0):
+        raise ValueError("stat must be a percentile in [0, 100] or 'mean'")
+
+
+def bootstrap_ci(
+    data: Iterable[float] | LatencyHistogram | Any,
+    stat: str | float = 95,
+    *,
+    confidence: float = DEFAULT_CONFIDENCE,
+    resamples: int = DEFAULT_RESAMPLES,
+    seed: int | None = 0,
+    max_distinct: int = DEFAULT_MAX_DISTINCT,
+) -> Interval:
+    """
+    percentile-bootstrap interval for a percentile (stat=0..100) or the mean
+
+    data: raw samples (list / NumPy array) or a LatencyHistogram
+    seed: fixed by default so a CI rerun on the same samples decides the same way
+    """
+    _check_stat(stat)
+    _z(confidence)
+    np = _numpy()
+    values, counts = _distinct(data)
+    n = int(counts.sum())
+    if n == 0:
+        raise ValueError("no samples")
+    kind, res = _replicates_or_bounds(
+        values, counts, stat, resamples, np.random.default_rng(seed), confidence, max_distinct,
+    )
+    if kind == "bounds":
+        low, high = res
+    else:
+        alpha = (1 - confidence) / 2
+        low, high = np.quantile(res, [alpha, 1 - alpha])
+    return Interval(estimate=_point(values, counts, stat), low=float(low), high=float(high), confidence=confidence, n=n)
+
+
+def compare_ci(
+    baseline: Any,
+    candidate: Any,
+    stat: str | float = 95,
+    *,
+    confidence: float = DEFAULT_CONFIDENCE,
+    resamples: int = DEFAULT_RESAMPLES,
+    seed: int | None = 0,
+    max_distinct: int = DEFAULT_MAX_DISTINCT,
+) -> Interval:
+    """
+    two-sample bootstrap interval for stat(candidate) - stat(baseline);
+    an interval entirely above 0 means the candidate is worse for latency
+    """
+    _check_stat(stat)
+    _z(confidence)
+    np = _numpy()
+    rng = np.random.default_rng(seed)
+    bv, bc = _distinct(baseline)
+    cv, cc = _distinct(candidate)
+    if not bc.sum() or not cc.sum():
+        raise ValueError("no samples")
+    est_b, est_c = _point(bv, bc, stat), _point(cv, cc, stat)
+    d = est_c - est_b
+    if max(len(bv), len(cv)) <= max_distinct:
+        diff = _bootstrap_stats(cv, cc, stat, resamples, rng) - _bootstrap_stats(bv, bc, stat, resamples, rng)
+        alpha = (1 - confidence) / 2
+        low, high = np.quantile(diff, [alpha, 1 - alpha])
+    else:
+        # combine the two one-sample intervals (same construction as compare_rates)
+        bl, bh = _large_sample_ci(bv, bc, stat, confidence)
+        cl, ch = _large_sample_ci(cv, cc, stat, confidence)
+        low = d - math.sqrt((est_c - cl) ** 2 + (bh - est_b) ** 2)
+        high = d + math.sqrt((ch - est_c) ** 2 + (est_b - bl) ** 2)
+    return Interval(
+        estimate=d,
+        low=float(low),
+        high=float(high),
+        confidence=confidence,
+        n=int(min(bc.sum(), cc.sum())),
+    )
+
+
+def compare_rates(
+    successes_a: int,
+    n_a: int,
+    successes_b: int,
+    n_b: int,
+    *,
+    confidence: float = DEFAULT_CONFIDENCE,
+) -> Interval:
+    """
+    Newcombe's hybrid score interval for rate_b - rate_a (from two Wilson intervals)
+    """
+    a = wilson_interval(successes_a, n_a, confidence=confidence)
+    b = wilson_interval(successes_b, n_b, confidence=confidence)
+    d = b.estimate - a.estimate
+    low = d - math.sqrt((b.estimate - b.low) ** 2 + (a.high - a.estimate) ** 2)
+    high = d + math.sqrt((b.high - b.estimate) ** 2 + (a.estimate - a.low) ** 2)
+    return Interval(estimate=d, low=low, high=high, confidence=confidence, n=min(n_a, n_b))
+
+
+def _fail(what: str, interval: Interval, op: str, limit: float, verdict: str) -> None:
+    raise AssertionError(
+        f"{what} {verdict}: {interval.estimate:g} "
+        f"({interval.confidence:.0%} CI [{interval.low:g}, {interval.high:g}], n={interval.n}) "
+        f"vs required {op} {limit:g}"
+    )
+
+
+def assert_at_most(interval: Interval, limit: float, *, what: str = "metric", inconclusive: str = PASS) -> str:
+    """
+    fail only when the interval says so; `inconclusive` picks what happens
+    when the limit falls inside the interval ("pass" or "fail") -> verdict
+    """
+    verdict = interval.verdict_at_most(limit)
+    if verdict == FAIL or (verdict == INCONCLUSIVE and inconclusive == FAIL):
+        _fail(what, interval, "<=", limit, verdict)
+    return verdict
+
+
+def assert_at_least(interval: Interval, limit: float, *, what: str = "metric", inconclusive: str = PASS) -> str:
+    verdict = interval.verdict_at_least(limit)
+    if verdict == FAIL or (verdict == INCONCLUSIVE and inconclusive == FAIL):
+        _fail(what, interval, ">=", limit, verdict)
+    return verdict
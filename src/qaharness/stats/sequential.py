@@ -0,0 +1,129 @@
+"""
+Sequential sampling: draw samples in growing batches until every checked
+metric's confidence interval is clearly on one side of its threshold.
+
+Sample sizes grow geometrically (min_samples, min_samples * growth, ...,
+max_samples), so a clear pass stops at the first look and a borderline
+case gets up to max_samples. Looking at the data repeatedly inflates the
+error rate, so each look uses confidence 1 - (1 - confidence) / looks
+(Bonferroni over the planned looks); geometric growth keeps the number of
+looks, and so the widening, small.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Sequence
+
+from .inference import FAIL, INCONCLUSIVE, PASS, Interval, assert_at_least, assert_at_most
+
+
+@dataclass(frozen=True)
+class Check:
+    """
+    interval: confidence -> Interval over the samples drawn so far (None
+        while there is nothing to measure yet, e.g. no successful responses)
+    at_most: True for "metric <= limit", False for "metric >= limit"
+    """
+    name: str
+    interval: Callable[[float], Interval | None]
+    limit: float
+    at_most: bool = True
+
+    def evaluate(self, confidence: float) -> tuple[str, Interval | None]:
+        ci = self.interval(confidence)
+        if ci is None:
+            return INCONCLUSIVE, None
+        return (ci.verdict_at_most(self.limit) if self.at_most else ci.verdict_at_least(self.limit)), ci
+
+
+@dataclass
+class SequentialResult:
+    samples: int = 0
+    looks: int = 0
+    look_confidence: float = 0.0
+    verdicts: dict[str, str] = field(default_factory=dict)
+    intervals: dict[str, Interval | None] = field(default_factory=dict)
+    checks: Sequence[Check] = ()
+
+    @property
+    def failed(self) -> bool:
+        return FAIL in self.verdicts.values()
+
+    @property
+    def decided(self) -> bool:
+        return self.failed or all(v == PASS for v in self.verdicts.values())
+
+    def assert_ok(self, *, inconclusive: str = PASS) -> None:
+        """
+        raise AssertionError for any failed check (and for undecided ones
+        with inconclusive="fail")
+        """
+        for check in self.checks:
+            ci = self.intervals.get(check.name)
+            if ci is None:
+                if inconclusive == FAIL:
+                    raise AssertionError(f"{check.name}: nothing measured after {self.samples} samples")
+                continue
+            what = f"{check.name} after {self.samples} samples"
+            if check.at_most:
+                assert_at_most(ci, check.limit, what=what, inconclusive=inconclusive)
+            else:
+                assert_at_least(ci, check.limit, what=what, inconclusive=inconclusive)
+
+    def as_dict(self) -> dict:
+        return {
+            "samples": self.samples,
+            "looks": self.looks,
+            "look_confidence": self.look_confidence,
+            "decided": self.decided,
+            "verdicts": dict(self.verdicts),
+            "intervals": {k: (v.as_dict() if v else None) for k, v in self.intervals.items()},
+        }
+
+
+def sample_schedule(min_samples: int, max_samples: int, growth: float = 2.0) -> list[int]:
+    """
+    cumulative sample counts at which the checks are evaluated
+    """
+    if min_samples < 1 or max_samples < min_samples:
+        raise ValueError("need 1 <= min_samples <= max_samples")
+    if growth <= 1.0:
+        raise ValueError("growth must be > 1")
+    sizes = [min_samples]
+    while sizes[-1] < max_samples:
+        sizes.append(min(max_samples, max(sizes[-1] + 1, math.ceil(sizes[-1] * growth))))
+    return sizes
+
+
+def run_sequential(
+    sample: Callable[[int], None],
+    checks: Sequence[Check],
+    *,
+    min_samples: int = 20,
+    max_samples: int = 320,
+    growth: float = 2.0,
+    confidence: float = 0.95,
+) -> SequentialResult:
+    """
+    sample(k): draw k more samples into the caller's accumulators (the
+    checks' interval callables read the same accumulators)
+
+    Stops at the first look where any check fails or all pass, or when
+    max_samples is reached.
+    """
+    if not checks:
+        raise ValueError("need at least one check")
+    sizes = sample_schedule(min_samples, max_samples, growth)
+    look_conf = 1.0 - (1.0 - confidence) / len(sizes)
+    result = SequentialResult(look_confidence=look_conf, checks=tuple(checks))
+
+    for size in sizes:
+        sample(size - result.samples)
+        result.samples = size
+        result.looks += 1
+        for check in checks:
+            result.verdicts[check.name], result.intervals[check.name] = check.evaluate(look_conf)
+        if result.decided:
+            break
+    return result
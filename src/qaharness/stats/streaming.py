@@ -0,0 +1,256 @@
+"""
+Online, mergeable estimators for unbounded sample streams.
+
+RunningStats keeps count / mean / variance (Welford) and min / max in O(1).
+TDigest keeps a bounded set of weighted centroids (merging t-digest, k1
+scale function): quantile error is smallest in the tails, where envelope
+thresholds live, and memory is O(compression) whatever the sample count.
+Both merge exactly enough to combine shards (workers, repeated runs).
+"""
+from __future__ import annotations
+
+import math
+from typing import Iterable
+
+DEFAULT_COMPRESSION = 100.0
+
+
+class RunningStats:
+    """
+    Welford's online mean/variance; merge() uses Chan et al.'s pairwise update
+    """
+    __slots__ = ("count", "mean", "_m2", "min", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        d = x - self.mean
+        self.mean += d / self.count
+        self._m2 += d * (x - self.mean)
+        if self.min is None or x < self.min:
+            self.min = x
+        if self.max is None or x > self.max:
+            self.max = x
+
+    def add_many(self, xs: Iterable[float]) -> None:
+        for x in xs:
+            self.add(x)
+
+    def merge(self, other: RunningStats) -> RunningStats:
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.mean, self._m2 = other.count, other.mean, other._m2
+            self.min, self.max = other.min, other.max
+            return self
+        n = self.count + other.count
+        d = other.mean - self.mean
+        self._m2 += other._m2 + d * d * self.count * other.count / n
+        self.mean += d * other.count / n
+        self.count = n
+        # both sides have samples, so both have a min and a max
+        assert self.min is not None and other.min is not None
+        assert self.max is not None and other.max is not None
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def total(self) -> float:
+        return self.mean * self.count
+
+    @property
+    def variance(self) -> float | None:
+        """
+        sample variance (n - 1); None below two samples
+        """
+        return self._m2 / (self.count - 1) if self.count > 1 else None
+
+    @property
+    def stdev(self) -> float | None:
+        v = self.variance
+        return math.sqrt(v) if v is not None else None
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean if self.count else None,
+            "stdev": self.stdev,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    def __repr__(self) -> str:
+        return f"RunningStats(count={self.count}, mean={self.mean:g})"
+
+
+class TDigest:
+    """
+    add(x) / percentile(p) / merge(other)
+
+    compression: centroid budget; ~compression centroids are kept after a
+        flush and the tails are resolved to single samples. 100 gives well
+        under 1% rank error at p95/p99.
+    Values are buffered and folded in every ~5 * compression adds, so
+    add() is an append in the common case.
+    """
+    __slots__ = ("compression", "_means", "_weights", "_bx", "_bw", "_buf_cap", "count", "min", "max")
+
+    def __init__(self, compression: float = DEFAULT_COMPRESSION):
+        if compression < 10:
+            raise ValueError("compression must be >= 10")
+        self.compression = float(compression)
+        self._means: list[float] = []
+        self._weights: list[float] = []
+        self._bx: list[float] = []
+        self._bw: list[float] = []
+        self._buf_cap = int(5 * compression)
+        self.count = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+
+    # --- recording ---
+
+    def add(self, x: float, weight: float = 1.0) -> None:
+        if weight <= 0:
+            raise ValueError("weight must be > 0")
+        if math.isnan(x):
+            raise ValueError("NaN sample")
+        self._bx.append(x)
+        self._bw.append(weight)
+        self.count += weight
+        if self.min is None or x < self.min:
+            self.min = x
+        if self.max is None or x > self.max:
+            self.max = x
+        if len(self._bx) >= self._buf_cap:
+            self._flush()
+
+    def add_many(self, xs: Iterable[float]) -> None:
+        for x in xs:
+            self.add(x)
+
+    def merge(self, other: TDigest) -> TDigest:
+        if not other.count:
+            return self
+        other._flush()
+        self._bx.extend(other._means)
+        self._bw.extend(other._weights)
+        self.count += other.count
+        assert other.min is not None and other.max is not None
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._flush()
+        return self
+
+    # --- compression ---
+
+    def _q_limit(self, q: float) -> float:
+        # k1 scale: k(q) = d/(2 pi) * asin(2q - 1); a centroid may span one unit of k
+        d = self.compression
+        k = d / (2 * math.pi) * math.asin(2 * q - 1) + 1.0
+        if k >= d / 4:
+            return 1.0
+        return (math.sin(k * 2 * math.pi / d) + 1) / 2
+
+    def _flush(self) -> None:
+        if not self._bx:
+            return
+        xs = self._means + self._bx
+        ws = self._weights + self._bw
+        self._bx = []
+        self._bw = []
+        order = sorted(range(len(xs)), key=xs.__getitem__)
+        total = self.count
+
+        means: list[float] = []
+        weights: list[float] = []
+        cur_m, cur_w = xs[order[0]], ws[order[0]]
+        q0 = 0.0
+        limit = self._q_limit(0.0) * total
+        for i in order[1:]:
+            x, w = xs[i], ws[i]
+            if q0 + cur_w + w <= limit:
+                cur_w += w
+                cur_m += (x - cur_m) * w / cur_w
+            else:
+                means.append(cur_m)
+                weights.append(cur_w)
+                q0 += cur_w
+                limit = self._q_limit(q0 / total) * total
+                cur_m, cur_w = x, w
+        means.append(cur_m)
+        weights.append(cur_w)
+        self._means, self._weights = means, weights
+
+    @property
+    def centroid_count(self) -> int:
+        self._flush()
+        return len(self._means)
+
+    # --- queries ---
+
+    def percentile(self, p: float) -> float:
+        """
+        estimated value at percentile p (0..100), interpolating between
+        centroid centres and pinned to the exact min / max at the ends
+        """
+        if not self.count:
+            raise ValueError("no values recorded")
+        if not 0.0 <= p <= 100.0:
+            raise ValueError("p must be in [0, 100]")
+        self._flush()
+        means, weights = self._means, self._weights
+        lo, hi = self.min, self.max
+        assert lo is not None and hi is not None
+        if len(means) == 1 or lo == hi:
+            return means[0] if lo == hi else lo + (hi - lo) * p / 100.0
+        target = p / 100.0 * self.count
+
+        # left tail: between min and the first centroid centre
+        first = weights[0] / 2
+        if target <= first:
+            if weights[0] <= 1:
+                return lo if target < first else means[0]
+            return lo + (means[0] - lo) * (target / first)
+
+        cum = 0.0
+        for i in range(len(means) - 1):
+            centre = cum + weights[i] / 2
+            nxt = cum + weights[i] + weights[i + 1] / 2
+            if target <= nxt:
+                frac = (target - centre) / (nxt - centre)
+                return means[i] + (means[i + 1] - means[i]) * frac
+            cum += weights[i]
+
+        # right tail: between the last centroid centre and max
+        last_w = weights[-1]
+        last_centre = self.count - last_w / 2
+        if last_w <= 1:
+            return means[-1] if target <= last_centre else hi
+        frac = (target - last_centre) / (last_w / 2)
+        return means[-1] + (hi - means[-1]) * min(1.0, frac)
+
+    def percentiles(self, ps: Iterable[float]) -> dict[float, float]:
+        return {p: self.percentile(p) for p in ps}
+
+    def summary(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+    def __repr__(self) -> str:
+        return f"TDigest(count={self.count:g}, compression={self.compression:g})"
@@ -0,0 +1,42 @@
+"""
+asyncio request helpers shared by replay and the load generator
+"""
+from __future__ import annotations
+
+import asyncio
+import struct
+
+from qaharness.transport.framing import trailer_size
+
+_HDR_FMT = "!2sBBH"
+_HDR_SIZE = struct.calcsize(_HDR_FMT)
+_CRC_SIZE = 4
+
+
+async def tcp_request(addr: tuple[str, int], frame: bytes, timeout_s: float) -> bytes | None:
+    """
+    one framed request on a fresh connection -> raw response frame, or None
+    on timeout / refused connection / close without answer (simulator drop)
+    """
+    async def _once() -> bytes | None:
+        reader, writer = await asyncio.open_connection(*addr)
+        try:
+            writer.write(frame)
+            await writer.drain()
+            hdr = await reader.readexactly(_HDR_SIZE)
+            _, ver, _, length = struct.unpack(_HDR_FMT, hdr)
+            return hdr + await reader.readexactly(length + trailer_size(ver) + _CRC_SIZE)
+        except asyncio.IncompleteReadError:
+            # simulator closes without answering on drop / frame error
+            return None
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    try:
+        return await asyncio.wait_for(_once(), timeout=timeout_s)
+    except (asyncio.TimeoutError, ConnectionError):
+        return None
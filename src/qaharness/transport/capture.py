@@ -0,0 +1,211 @@
+"""
+Append-only binary capture log for framed UDP/TCP traffic.
+
+file layout:
+    FILE HEADER: MAGIC(8) | START_WALL_NS(8)
+    RECORD*:     T_NS(8) | DIR(1) | TRANSPORT(1) | FLAGS(1) | RSVD(1) |
+                 PEER_IP(4) | PEER_PORT(2) | REQUEST_ID(4) | LEN(4) | FRAME(LEN)
+
+T_NS is monotonic nanoseconds since capture start. A request record and the
+response record it produced share REQUEST_ID. Little-endian throughout; the
+frames themselves keep their own network-order framing.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import socket
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+CAPTURE_MAGIC = b"QACAP\x00\x01\x00"
+
+_FILE_HDR = struct.Struct("<8sQ")
+_REC_HDR = struct.Struct("<qBBBx4sHII")
+
+# direction
+REQUEST = 0
+RESPONSE = 1
+
+# transport
+UDP = 0
+TCP = 1
+
+TRANSPORT_NAMES = {UDP: "udp", TCP: "tcp"}
+
+# flags
+FLAG_CORRUPTED = 0x01
+FLAG_DELAYED = 0x02
+
+_NO_PEER = b"\x00\x00\x00\x00"
+
+
+class CaptureError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class CaptureRecord:
+    t_ns: int
+    direction: int
+    transport: int
+    flags: int
+    peer: tuple[str, int]
+    request_id: int
+    frame: bytes | memoryview
+
+
+class CaptureWriter:
+    """
+    Buffered capture writer.
+
+    record() packs into an in-memory buffer; the buffer is written out once it
+    exceeds `buffer_bytes` or `flush_interval_s` has passed since the last
+    write, so the per-frame cost is one struct pack and two buffer appends.
+    Not thread-safe: the simulator only calls it from the event loop.
+    """
+    def __init__(self, path: str | Path, *, buffer_bytes: int = 256 * 1024, flush_interval_s: float = 1.0):
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = open(self._path, "wb")
+        self._buf = bytearray(_FILE_HDR.pack(CAPTURE_MAGIC, time.time_ns()))
+        self._buffer_bytes = buffer_bytes
+        self._flush_interval_ns = int(flush_interval_s * 1e9)
+        self._t0 = time.perf_counter_ns()
+        self._last_flush = self._t0
+        self._next_id = 0
+        self._peer_cache: dict[str, bytes] = {}
+        self.records = 0
+        self.bytes_written = 0
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def closed(self) -> bool:
+        return self._f.closed
+
+    def next_id(self) -> int:
+        self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+        return self._next_id
+
+    def _pack_ip(self, host: str) -> bytes:
+        ip = self._peer_cache.get(host)
+        if ip is None:
+            try:
+                ip = socket.inet_aton(host)
+            except OSError:
+                ip = _NO_PEER
+            self._peer_cache[host] = ip
+        return ip
+
+    def record(
+        self,
+        direction: int,
+        transport: int,
+        peer,
+        frame: bytes,
+        request_id: int,
+        flags: int = 0,
+    ) -> None:
+        if self._f.closed:
+            # late delayed send after capture was stopped
+            return
+        now = time.perf_counter_ns()
+        if peer:
+            ip, port = self._pack_ip(peer[0]), peer[1]
+        else:
+            ip, port = _NO_PEER, 0
+        buf = self._buf
+        buf += _REC_HDR.pack(now - self._t0, direction, transport, flags, ip, port, request_id, len(frame))
+        buf += frame
+        self.records += 1
+
+        if len(buf) >= self._buffer_bytes or now - self._last_flush >= self._flush_interval_ns:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buf and not self._f.closed:
+            self._f.write(self._buf)
+            self._f.flush()
+            self.bytes_written += len(self._buf)
+            self._buf = bytearray()
+        self._last_flush = time.perf_counter_ns()
+
+    def close(self) -> None:
+        if not self._f.closed:
+            self.flush()
+            self._f.close()
+
+    def stats(self) -> dict:
+        return {
+            "path": str(self._path),
+            "records": self.records,
+            "bytes": self.bytes_written + len(self._buf),
+        }
+
+
+class CaptureReader:
+    """
+    Memory-mapped capture reader. Frames are yielded as memoryview slices of
+    the mapping (no copy); call bytes() on them if they must outlive close().
+    A torn trailing record (writer killed mid-flush) ends iteration cleanly.
+    """
+    def __init__(self, path: str | Path):
+        self._path = Path(path)
+        self._f = open(self._path, "rb")
+        size = os.fstat(self._f.fileno()).st_size
+        if size < _FILE_HDR.size:
+            self._f.close()
+            raise CaptureError("capture file too short")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+
+        magic, start_wall_ns = _FILE_HDR.unpack_from(self._mm, 0)
+        if magic != CAPTURE_MAGIC:
+            self.close()
+            raise CaptureError("bad capture magic")
+        self.start_wall_ns = start_wall_ns
+
+    def __enter__(self) -> CaptureReader:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if not self._f.closed:
+            self._view.release()
+            try:
+                self._mm.close()
+            except BufferError:
+                # caller still holds frame views; the mapping is freed with them
+                pass
+            self._f.close()
+
+    def __iter__(self) -> Iterator[CaptureRecord]:
+        view = self._view
+        end = len(view)
+        off = _FILE_HDR.size
+        hdr_size = _REC_HDR.size
+        unpack_from = _REC_HDR.unpack_from
+
+        while off + hdr_size <= end:
+            t_ns, direction, transport, flags, ip, port, request_id, length = unpack_from(view, off)
+            start = off + hdr_size
+            if start + length > end:
+                break
+            yield CaptureRecord(
+                t_ns=t_ns,
+                direction=direction,
+                transport=transport,
+                flags=flags,
+                peer=(socket.inet_ntoa(ip), port),
+                request_id=request_id,
+                frame=view[start:start + length],
+            )
+            off = start + length
@@ -4,8 +4,12 @@ import struct
 import zlib
 from dataclasses import dataclass
 
+from qaharness.utils.profiling import hook
+
 MAGIC = b"QA"
 VERSION = 1
+# same header, plus a timestamp trailer between payload and CRC (see Timestamps)
+VERSION_TIMED = 2
 
 
 # header: MAGIC(2), VER(1), TYPE(1), LEN(2) => total 6 bytes
@@ -13,26 +17,73 @@ _HDR_FMT = "!2sBBH"
 _HDR_SIZE = struct.calcsize(_HDR_FMT)
 _CRC_FMT = "!I"
 _CRC_SIZE = struct.calcsize(_CRC_FMT)
+# trailer: RECV_NS(8), DISPATCH_NS(8), SEND_NS(8) => 24 bytes, covered by the CRC
+_TS_FMT = "!QQQ"
+_TS_SIZE = struct.calcsize(_TS_FMT)
 
 class FrameError(Exception):
     pass
 
+@dataclass(frozen=True)
+class Timestamps:
+    """
+    server-side monotonic stamps (ns) carried by VERSION_TIMED frames:
+    recv -- request read off the socket
+    dispatch -- response decided
+    send -- response handed to the socket (after any injected delay)
+
+    a client opts in by sending a timed request (REQUEST_TIMESTAMPS, all zero);
+    only differences between stamps are meaningful, never the absolute values
+    """
+    recv_ns: int = 0
+    dispatch_ns: int = 0
+    send_ns: int = 0
+
+    @property
+    def server_ms(self) -> float:
+        return (self.dispatch_ns - self.recv_ns) / 1e6
+
+    @property
+    def hold_ms(self) -> float:
+        return (self.send_ns - self.dispatch_ns) / 1e6
+
+    @property
+    def total_ms(self) -> float:
+        return (self.send_ns - self.recv_ns) / 1e6
+
+REQUEST_TIMESTAMPS = Timestamps()
+
 @dataclass(frozen=True)
 class Frame:
     msg_type: int
     payload: bytes
+    timestamps: Timestamps | None = None
+
+def trailer_size(version: int) -> int:
+    """
+    bytes between payload and CRC for a frame of this version
+    """
+    return _TS_SIZE if version == VERSION_TIMED else 0
 
-def encode_frame(msg_type: int, payload:bytes) -> bytes:
+@hook("framing.encode_frame")
+def encode_frame(msg_type: int, payload:bytes, timestamps: Timestamps | None = None) -> bytes:
     if not (0 <= msg_type <= 255):
         raise ValueError("msg_type must fit in a byte")
     if len(payload) > 65535:
         raise ValueError("payload too large")
     
-    header = struct.pack(_HDR_FMT, MAGIC, VERSION, msg_type, len(payload))
-    body = header + payload
+    if timestamps is None:
+        body = struct.pack(_HDR_FMT, MAGIC, VERSION, msg_type, len(payload)) + payload
+    else:
+        body = (
+            struct.pack(_HDR_FMT, MAGIC, VERSION_TIMED, msg_type, len(payload))
+            + payload
+            + struct.pack(_TS_FMT, timestamps.recv_ns, timestamps.dispatch_ns, timestamps.send_ns)
+        )
     crc = zlib.crc32(body) & 0xFFFFFFFF
     return body + struct.pack(_CRC_FMT, crc)
 
+@hook("framing.decode_frame")
 def decode_frame(packet: bytes) -> Frame:
     if len(packet) < _HDR_SIZE + _CRC_SIZE:
         raise FrameError("packet too short")
@@ -42,10 +93,11 @@ def decode_frame(packet: bytes) -> Frame:
 
     if magic != MAGIC:
         raise FrameError("bad magic")
-    if ver != VERSION:
+    if ver != VERSION and ver != VERSION_TIMED:
         raise FrameError("unsupported version")
     
-    expected_len = _HDR_SIZE + length + _CRC_SIZE
+    trailer = trailer_size(ver)
+    expected_len = _HDR_SIZE + length + trailer + _CRC_SIZE
     if len(packet) != expected_len:
         raise FrameError("invalid packet length")
         
@@ -56,4 +108,7 @@ def decode_frame(packet: bytes) -> Frame:
     if crc_calc != crc_recv:
         raise FrameError("crc mismatch")
     
-    return Frame(msg_type=msg_type, payload=payload)
\ No newline at end of file
+    timestamps = None
+    if trailer:
+        timestamps = Timestamps(*struct.unpack_from(_TS_FMT, packet, _HDR_SIZE + length))
+    return Frame(msg_type=msg_type, payload=payload, timestamps=timestamps)
\ No newline at end of file
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from qaharness.transport import capture as cap
+from qaharness.transport.aio import tcp_request
+from qaharness.transport.framing import VERSION_TIMED, FrameError, decode_frame
+
+
+@dataclass
+class ReplayReport:
+    """
+    matched:    response identical to the captured one (or both absent); timed
+                responses match on type and payload, their server stamps differ
+    mismatched: response differs from the capture
+    missing:    capture had a response, replay got none within timeout
+    unexpected: capture had no response (drop), replay got one
+    """
+    requests: int = 0
+    matched: int = 0
+    mismatched: int = 0
+    missing: int = 0
+    unexpected: int = 0
+    captured_span_s: float = 0.0
+    elapsed_s: float = 0.0
+    mismatches: list[dict] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.mismatched == 0 and self.missing == 0 and self.unexpected == 0
+
+    @property
+    def speedup(self) -> float | None:
+        if self.elapsed_s <= 0:
+            return None
+        return self.captured_span_s / self.elapsed_s
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "matched": self.matched,
+            "mismatched": self.mismatched,
+            "missing": self.missing,
+            "unexpected": self.unexpected,
+            "captured_span_s": self.captured_span_s,
+            "elapsed_s": self.elapsed_s,
+            "speedup": self.speedup,
+            "ok": self.ok,
+        }
+
+
+def _same_response(want: memoryview | bytes, got: bytes) -> bool:
+    if want == got:
+        return True
+    # VERSION_TIMED responses carry server clock stamps that never repeat across runs
+    if len(want) > 2 and len(got) > 2 and want[2] == got[2] == VERSION_TIMED:
+        try:
+            w, g = decode_frame(bytes(want)), decode_frame(got)
+        except FrameError:
+            return False
+        return (w.msg_type, w.payload) == (g.msg_type, g.payload)
+    return False
+
+
+class _UdpLane(asyncio.DatagramProtocol):
+    def __init__(self) -> None:
+        self.transport: asyncio.DatagramTransport | None = None
+        self.inbox: asyncio.Queue[bytes] = asyncio.Queue()
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.inbox.put_nowait(data)
+
+    async def request(self, frame: bytes, timeout_s: float) -> bytes | None:
+        assert self.transport is not None
+        # late responses from a previous timeout must not be matched to this request
+        while not self.inbox.empty():
+            self.inbox.get_nowait()
+        self.transport.sendto(frame)
+        try:
+            return await asyncio.wait_for(self.inbox.get(), timeout=timeout_s)
+        except asyncio.TimeoutError:
+            return None
+
+
+async def _replay(
+    reader: cap.CaptureReader,
+    *,
+    udp_addr: tuple[str, int] | None,
+    tcp_addr: tuple[str, int] | None,
+    speed: float,
+    window: int,
+    timeout_s: float,
+    check: bool,
+    max_mismatches: int,
+) -> ReplayReport:
+    report = ReplayReport()
+
+    # pass 1: index captured responses by request id (views into the mmap, no copies)
+    expected: dict[int, memoryview | bytes] = {}
+    first_ns = last_ns = None
+    for rec in reader:
+        if rec.direction == cap.RESPONSE:
+            expected[rec.request_id] = rec.frame
+            continue
+        if first_ns is None:
+            first_ns = rec.t_ns
+        last_ns = rec.t_ns
+    if first_ns is not None and last_ns is not None:
+        report.captured_span_s = (last_ns - first_ns) / 1e9
+
+    loop = asyncio.get_running_loop()
+    udp_lanes: asyncio.Queue[_UdpLane] = asyncio.Queue()
+    udp_transports = []
+    if udp_addr is not None:
+        for _ in range(window):
+            transport, lane = await loop.create_datagram_endpoint(_UdpLane, remote_addr=udp_addr)
+            udp_transports.append(transport)
+            udp_lanes.put_nowait(lane)
+    # one in-flight bound across both transports keeps window=1 strictly ordered
+    slots = asyncio.Semaphore(window)
+
+    def _check(rec: cap.CaptureRecord, got: bytes | None) -> None:
+        want = expected.get(rec.request_id)
+        if not check:
+            return
+        if want is None and got is None:
+            report.matched += 1
+            return
+        if want is None:
+            report.unexpected += 1
+            kind = "unexpected"
+        elif got is None:
+            report.missing += 1
+            kind = "missing"
+        elif _same_response(want, got):
+            report.matched += 1
+            return
+        else:
+            report.mismatched += 1
+            kind = "mismatched"
+        if len(report.mismatches) < max_mismatches:
+            report.mismatches.append({
+                "kind": kind,
+                "request_id": rec.request_id,
+                "transport": cap.TRANSPORT_NAMES.get(rec.transport, str(rec.transport)),
+                "t_s": rec.t_ns / 1e9,
+                "expected": bytes(want).hex() if want is not None else None,
+                "got": got.hex() if got is not None else None,
+            })
+
+    async def _run_udp(rec: cap.CaptureRecord, lane: _UdpLane) -> None:
+        try:
+            _check(rec, await lane.request(bytes(rec.frame), timeout_s))
+        finally:
+            udp_lanes.put_nowait(lane)
+            slots.release()
+
+    async def _run_tcp(rec: cap.CaptureRecord) -> None:
+        try:
+            assert tcp_addr is not None
+            _check(rec, await tcp_request(tcp_addr, bytes(rec.frame), timeout_s))
+        finally:
+            slots.release()
+
+    tasks: set[asyncio.Task] = set()
+    start = loop.time()
+    try:
+        # pass 2: stream requests in capture order; `window` bounds requests in flight
+        for rec in reader:
+            if rec.direction != cap.REQUEST:
+                continue
+            if rec.transport == cap.UDP and udp_addr is None:
+                continue
+            if rec.transport == cap.TCP and tcp_addr is None:
+                continue
+
+            if speed > 0 and first_ns is not None:
+                due = start + (rec.t_ns - first_ns) / 1e9 / speed
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            report.requests += 1
+            await slots.acquire()
+            if rec.transport == cap.UDP:
+                # a held slot guarantees a free lane
+                task = loop.create_task(_run_udp(rec, udp_lanes.get_nowait()))
+            else:
+                task = loop.create_task(_run_tcp(rec))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        for t in udp_transports:
+            t.close()
+        expected.clear()
+
+    report.elapsed_s = loop.time() - start
+    return report
+
+
+def replay_capture(
+    path: str | Path,
+    *,
+    udp_addr: tuple[str, int] | None,
+    tcp_addr: tuple[str, int] | None,
+    speed: float = 1.0,
+    window: int = 1,
+    timeout_s: float = 0.5,
+    check: bool = True,
+    max_mismatches: int = 20,
+) -> ReplayReport:
+    """
+    re-send the requests in a capture log and compare responses to the captured ones
+
+    speed: 1.0 = original pacing, N = N times faster, 0 = as fast as possible
+    window: requests in flight; 1 keeps strict capture order (needed when the
+        traffic drives state transitions), >1 pipelines across sockets
+    timeout_s: how long to wait for each response (also the cost of every
+        captured drop, since replay has to confirm no response arrives)
+    """
+    if speed < 0:
+        raise ValueError("speed must be >= 0 (0 = max)")
+    if window < 1:
+        raise ValueError("window must be >= 1")
+
+    with cap.CaptureReader(path) as reader:
+        report = asyncio.run(_replay(
+            reader,
+            udp_addr=udp_addr,
+            tcp_addr=tcp_addr,
+            speed=speed,
+            window=window,
+            timeout_s=timeout_s,
+            check=check,
+            max_mismatches=max_mismatches,
+        ))
+    return report
@@ -1,9 +1,12 @@
 from __future__ import annotations
 import socket
 import struct
+import time
 from dataclasses import dataclass
+from qaharness.utils.profiling import hook
 from qaharness.utils.retry import RetryPolicy, with_retries
-from qaharness.transport.framing import encode_frame, decode_frame
+from qaharness.transport.framing import REQUEST_TIMESTAMPS, encode_frame, decode_frame, trailer_size
+from qaharness.transport.timing import TimedResponse
 from qaharness.transport import msgtypes as mt
 
 _HDR_FMT = "!2sBBH"
@@ -29,6 +32,15 @@ class TcpClient:
             buf.extend(chunk)
         return bytes(buf)
     
+    def _recv_frame(self, sock: socket.socket) -> bytes:
+        # read header first to learn payload length (and whether a timestamp trailer follows)
+        hdr = self._recv_ext(sock, _HDR_SIZE)
+        magic, ver, rtype, length = struct.unpack(_HDR_FMT, hdr)
+
+        rest = self._recv_ext(sock, length + trailer_size(ver) + _CRC_SIZE)
+        return hdr + rest
+
+    @hook("client.tcp.request_once")
     def request_once(self, msg_type: int, payload:bytes = b"") -> tuple[int, bytes]:
         pkt = encode_frame(msg_type, payload)
 
@@ -36,17 +48,30 @@ class TcpClient:
             sock.settimeout(self._timeout_s)
             sock.connect((self._endpoint.host, self._endpoint.port))
             sock.sendall(pkt)
-
-            # read header first to learn payload length
-            hdr = self._recv_ext(sock, _HDR_SIZE)
-            magic, ver, rtype, length = struct.unpack(_HDR_FMT, hdr)
-
-            rest = self._recv_ext(sock, length + _CRC_SIZE)
-            full = hdr + rest
+            full = self._recv_frame(sock)
 
         frame = decode_frame(full)
 
         return frame.msg_type, frame.payload
+
+    @hook("client.tcp.request_timed")
+    def request_timed(self, msg_type: int, payload: bytes = b"") -> TimedResponse:
+        """
+        request_once, asking the simulator for server timestamps; connect time counts as setup
+        """
+        start_ns = time.perf_counter_ns()
+        pkt = encode_frame(msg_type, payload, REQUEST_TIMESTAMPS)
+
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self._timeout_s)
+            sock.connect((self._endpoint.host, self._endpoint.port))
+            send_ns = time.perf_counter_ns()
+            sock.sendall(pkt)
+            full = self._recv_frame(sock)
+            recv_ns = time.perf_counter_ns()
+
+        frame = decode_frame(full)
+        return TimedResponse(frame.msg_type, frame.payload, start_ns, send_ns, recv_ns, frame.timestamps)
     
     def request(self, msg_type: int, payload:bytes =b"", *, policy: RetryPolicy | None = None) -> tuple[int, bytes]:
         if policy is None:
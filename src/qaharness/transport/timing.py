@@ -0,0 +1,72 @@
+"""
+Per-request latency decomposition from client and server timestamps.
+
+A timed request (see framing.VERSION_TIMED) comes back with the simulator's
+recv/dispatch/send stamps; the client adds its own start/send/recv stamps.
+Each side only subtracts its own stamps, so the two clocks never need to agree:
+
+    setup    client start -> request on the socket (socket creation, TCP connect, encode)
+    network  client round trip minus server residence (wire + kernel socket buffers, both ways)
+    server   server recv -> response decided (decode + dispatch)
+    hold     response decided -> on the socket (injected delay, event-loop lag, encode)
+    retry    request start -> start of the attempt that succeeded (failed attempts + backoff)
+
+setup + network + server + hold + retry == total (network is clamped at 0)
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from qaharness.transport.framing import Timestamps
+
+STAGES = ("setup", "network", "server", "hold", "retry")
+
+
+@dataclass(frozen=True)
+class TimedResponse:
+    """
+    response to a timed request; client stamps are perf_counter_ns()
+    """
+    msg_type: int
+    payload: bytes
+    start_ns: int
+    send_ns: int
+    recv_ns: int
+    server: Timestamps | None
+
+    @property
+    def rtt_ms(self) -> float:
+        return (self.recv_ns - self.send_ns) / 1e6
+
+
+@dataclass(frozen=True)
+class LatencyBreakdown:
+    total_ms: float
+    setup_ms: float
+    network_ms: float
+    server_ms: float
+    hold_ms: float
+    retry_ms: float
+
+    @classmethod
+    def of(cls, resp: TimedResponse, request_start_ns: int | None = None) -> LatencyBreakdown:
+        """
+        request_start_ns: when the caller started the request (before any retries);
+        defaults to the start of this attempt
+        """
+        if resp.server is None:
+            raise ValueError("response carries no server timestamps (not a timed request?)")
+        start = resp.start_ns if request_start_ns is None else request_start_ns
+        # clamp: timer granularity can make the residence a hair longer than the round trip
+        network = max(0.0, resp.rtt_ms - resp.server.total_ms)
+        return cls(
+            total_ms=(resp.recv_ns - start) / 1e6,
+            setup_ms=(resp.send_ns - resp.start_ns) / 1e6,
+            network_ms=network,
+            server_ms=resp.server.server_ms,
+            hold_ms=resp.server.hold_ms,
+            retry_ms=(resp.start_ns - start) / 1e6,
+        )
+
+    def stages(self) -> dict[str, float]:
+        return {s: getattr(self, f"{s}_ms") for s in STAGES}
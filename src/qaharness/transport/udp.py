@@ -1,8 +1,11 @@
 from __future__ import annotations
 import socket
+import time
 from dataclasses import dataclass
+from qaharness.utils.profiling import hook
 from qaharness.utils.retry import RetryPolicy, with_retries
-from qaharness.transport.framing import encode_frame, decode_frame
+from qaharness.transport.framing import REQUEST_TIMESTAMPS, encode_frame, decode_frame
+from qaharness.transport.timing import TimedResponse
 from qaharness.transport import msgtypes as mt
 
 @dataclass(frozen=True)
@@ -15,6 +18,7 @@ class UdpClient:
         self._endpoint = endpoint
         self._timeout_s = timeout_s
 
+    @hook("client.udp.request_once")
     def request_once(self, msg_type: int, payload: bytes = b"", recv_buf: int = 4096) -> tuple[int, bytes]:
         pkt = encode_frame(msg_type, payload)
 
@@ -30,6 +34,27 @@ class UdpClient:
         frame = decode_frame(data)
         return frame.msg_type, frame.payload # tuple
 
+    @hook("client.udp.request_timed")
+    def request_timed(self, msg_type: int, payload: bytes = b"", recv_buf: int = 4096) -> TimedResponse:
+        """
+        request_once, asking the simulator for server timestamps and stamping the client side
+        """
+        start_ns = time.perf_counter_ns()
+        pkt = encode_frame(msg_type, payload, REQUEST_TIMESTAMPS)
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.settimeout(self._timeout_s)
+        try:
+            send_ns = time.perf_counter_ns()
+            sock.sendto(pkt, (self._endpoint.host, self._endpoint.port))
+            data, _ = sock.recvfrom(recv_buf)
+            recv_ns = time.perf_counter_ns()
+        finally:
+            sock.close()
+
+        frame = decode_frame(data)
+        return TimedResponse(frame.msg_type, frame.payload, start_ns, send_ns, recv_ns, frame.timestamps)
+
     def request(self, msg_type, payload: bytes = b"", *, policy: RetryPolicy | None = None) -> tuple[int, bytes]:
         if policy is None:
             return self.request_once(msg_type, payload)
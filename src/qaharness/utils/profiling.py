@@ -0,0 +1,335 @@
+"""
+Opt-in CPU profiling around the harness hot paths.
+
+Hot functions are wrapped with @hook("name"). While profiling is off a hooked
+call costs one global lookup and one extra call frame. start() turns on one
+process-wide Profiler:
+
+    sample         a background thread records the stack of every thread that is
+                   inside a hook each `interval_s` (cheap, statistical)
+    deterministic  every Python and C call made inside a hook is timed through
+                   sys.setprofile (exact, several times slower)
+
+Nested hooks (encode_frame inside a simulator handler) are attributed to the
+outermost one. stop() returns the profile as collapsed stacks, one
+"hook;frame;...;frame value" line per stack, the input format of flamegraph.pl,
+inferno and speedscope; value is a sample count or microseconds of self time.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+import types
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+MODES = ("sample", "deterministic")
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_ACTIVE: Profiler | None = None
+_START_LOCK = threading.Lock()
+
+# wrapper/driver frames never show up in stacks; their time goes to the caller
+_SKIP_CODES: set[types.CodeType] = set()
+_LABELS: dict[Any, str] = {}
+
+
+def _label(code: types.CodeType) -> str:
+    label = _LABELS.get(code)
+    if label is None:
+        name = getattr(code, "co_qualname", code.co_name)
+        label = f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+        _LABELS[code] = label
+    return label
+
+
+def _c_label(fn: Any) -> str:
+    label = _LABELS.get(fn)
+    if label is None:
+        # builtin functions carry their module; methods of builtin types a "type.method" qualname
+        module = getattr(fn, "__module__", None)
+        name = getattr(fn, "__qualname__", repr(fn))
+        label = f"{f'{module}.' if module else ''}{name} (builtin)".replace(";", ",")
+        try:
+            _LABELS[fn] = label
+        except TypeError:
+            pass
+    return label
+
+
+class _Region:
+    """
+    per-thread profiling state; only its own thread writes to it, except
+    `counts` in sample mode, which only the sampler thread writes
+    """
+    def __init__(self, profiler: Profiler):
+        self.profiler = profiler
+        self.depth = 0
+        self.name = ""
+        self.base: types.FrameType | None = None
+        self.counts: Counter[str] = Counter()
+        self.calls: Counter[str] = Counter()
+        # deterministic mode: [path, start_ns, child_ns] per open frame; counts are ns
+        self.stack: list[list] = []
+        self.prev_profile: Any = None
+
+    def trace(self, frame, event: str, arg) -> None:
+        now = time.perf_counter_ns()
+        stack = self.stack
+        if event[:2] == "c_" and frame.f_code in _SKIP_CODES:
+            # C calls made by the profiling machinery itself (coro.send, setprofile)
+            return
+        if event == "call":
+            code = frame.f_code
+            parent = stack[-1][0]
+            stack.append([parent if code in _SKIP_CODES else f"{parent};{_label(code)}", now, 0])
+        elif event == "c_call":
+            stack.append([f"{stack[-1][0]};{_c_label(arg)}", now, 0])
+        elif len(stack) > 1:
+            # return / c_return / c_exception; unmatched returns (frames that were
+            # already running when the hook was entered) leave the root alone
+            path, t0, child = stack.pop()
+            elapsed = now - t0
+            self.counts[path] += elapsed - child
+            stack[-1][2] += elapsed
+
+
+class Profiler:
+    def __init__(self, mode: str = "sample", *, interval_s: float = 0.001):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        if interval_s <= 0:
+            raise ValueError("interval_s must be > 0")
+        self.mode = mode
+        self.interval_s = interval_s
+        self.started_at = time.time()
+        self.stopped_at: float | None = None
+        self._regions: dict[int, _Region] = {}
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+        self._switch_interval: float | None = None
+        self.samples = 0
+
+    def _start(self) -> None:
+        if self.mode == "sample":
+            # the sampler needs the GIL to look at other threads; by default a busy
+            # thread only gives it up every 5 ms, which would cap the sample rate
+            self._switch_interval = sys.getswitchinterval()
+            if self.interval_s < self._switch_interval:
+                sys.setswitchinterval(self.interval_s)
+            self._sampler = threading.Thread(target=self._sample_loop, name="qa-profiler", daemon=True)
+            self._sampler.start()
+
+    def _region(self) -> _Region:
+        tid = threading.get_ident()
+        r = self._regions.get(tid)
+        if r is None:
+            r = self._regions[tid] = _Region(self)
+        return r
+
+    def _enter(self, name: str, count: bool = True) -> None:
+        r = self._region()
+        r.depth += 1
+        if r.depth > 1:
+            return
+        r.name = name
+        if count:
+            r.calls[name] += 1
+        if self.mode == "deterministic":
+            r.stack = [[name, time.perf_counter_ns(), 0]]
+            r.prev_profile = sys.getprofile()
+            sys.setprofile(r.trace)
+        else:
+            r.base = sys._getframe(1)
+
+    def _exit(self) -> None:
+        r = self._region()
+        r.depth -= 1
+        if r.depth > 0:
+            return
+        if self.mode == "deterministic":
+            sys.setprofile(r.prev_profile)
+            # frames still open here (this _exit) count as the hook's own time
+            path, t0, child = r.stack[0]
+            r.counts[path] += time.perf_counter_ns() - t0 - child
+            r.stack = []
+        else:
+            r.base = None
+
+    @types.coroutine
+    def _drive(self, name: str, coro):
+        """
+        run `coro` one step at a time, profiling only its own steps (not the
+        other tasks the event loop runs while it is suspended)
+        """
+        value, exc, first = None, None, True
+        try:
+            while True:
+                self._enter(name, count=first)
+                first = False
+                try:
+                    if exc is not None:
+                        yielded = coro.throw(exc)
+                    else:
+                        yielded = coro.send(value)
+                except StopIteration as e:
+                    return e.value
+                finally:
+                    self._exit()
+                try:
+                    value, exc = (yield yielded), None
+                except BaseException as e:
+                    value, exc = None, e
+        finally:
+            coro.close()
+
+    def _sample_loop(self) -> None:
+        frames_of = sys._current_frames
+        while not self._stop.wait(self.interval_s):
+            frames = frames_of()
+            for tid, r in list(self._regions.items()):
+                base = r.base
+                if base is None:
+                    continue
+                f = frames.get(tid)
+                labels = []
+                while f is not None and f is not base:
+                    if f.f_code not in _SKIP_CODES:
+                        labels.append(_label(f.f_code))
+                    f = f.f_back
+                if f is None:
+                    # left the hook between the two reads
+                    continue
+                labels.append(r.name)
+                r.counts[";".join(reversed(labels))] += 1
+                self.samples += 1
+
+    def stacks(self) -> Counter[str]:
+        """
+        collapsed stack -> samples (sample mode) or self time in us (deterministic)
+        """
+        out: Counter[str] = Counter()
+        for r in list(self._regions.values()):
+            out.update(dict(r.counts))
+        if self.mode == "deterministic":
+            out = Counter({stack: ns // 1000 for stack, ns in out.items()})
+        return +out
+
+    def calls(self) -> Counter[str]:
+        out: Counter[str] = Counter()
+        for r in list(self._regions.values()):
+            out.update(dict(r.calls))
+        return out
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {value}\n" for stack, value in sorted(self.stacks().items()))
+
+    def summary(self) -> dict:
+        stacks = self.stacks()
+        return {
+            "mode": self.mode,
+            "unit": "samples" if self.mode == "sample" else "us",
+            "interval_s": self.interval_s if self.mode == "sample" else None,
+            "duration_s": round((self.stopped_at or time.time()) - self.started_at, 6),
+            "stacks": len(stacks),
+            "total": sum(stacks.values()),
+            "calls": dict(self.calls()),
+        }
+
+    def write(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.folded(), encoding="utf-8")
+        return path
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=1.0)
+        if self._switch_interval is not None:
+            sys.setswitchinterval(self._switch_interval)
+            self._switch_interval = None
+        if self.stopped_at is None:
+            self.stopped_at = time.time()
+
+
+def active() -> Profiler | None:
+    return _ACTIVE
+
+
+def start(mode: str = "sample", *, interval_s: float = 0.001) -> Profiler:
+    """
+    turn on profiling for this process; RuntimeError if it is already on
+    """
+    global _ACTIVE
+    with _START_LOCK:
+        if _ACTIVE is not None:
+            raise RuntimeError(f"profiling already active ({_ACTIVE.mode})")
+        p = Profiler(mode, interval_s=interval_s)
+        p._start()
+        _ACTIVE = p
+    return p
+
+
+def stop(path: str | Path | None = None) -> dict | None:
+    """
+    turn profiling off; writes the collapsed stacks to `path` if given.
+    -> summary (plus "path"), or None if profiling was not active
+    """
+    global _ACTIVE
+    with _START_LOCK:
+        p, _ACTIVE = _ACTIVE, None
+    if p is None:
+        return None
+    p.close()
+    out = p.summary()
+    if path is not None:
+        out["path"] = str(p.write(path))
+    return out
+
+
+def hook(name: str) -> Callable[[F], F]:
+    """
+    profile calls of the decorated function (or coroutine function) as `name`
+    whenever profiling is active
+    """
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def coro_wrapper(*args, **kwargs):
+                p = _ACTIVE
+                if p is None:
+                    return await fn(*args, **kwargs)
+                return await p._drive(name, fn(*args, **kwargs))
+
+            _SKIP_CODES.add(coro_wrapper.__code__)
+            return coro_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            p = _ACTIVE
+            if p is None:
+                return fn(*args, **kwargs)
+            p._enter(name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                p._exit()
+
+        _SKIP_CODES.add(wrapper.__code__)
+        return wrapper
+    return decorate
+
+
+_SKIP_CODES.update({
+    Profiler._region.__code__,
+    Profiler._enter.__code__,
+    Profiler._exit.__code__,
+    Profiler._drive.__code__,
+})
@@ -1,30 +1,36 @@
+import dataclasses
 import os
 import subprocess
 import time
 import sys
-import socket
+import threading
 import json
 import platform
+import shutil
 import uuid
+from array import array
 
 from pathlib import Path
 from datetime import datetime, timezone
 
 import pytest
-import httpx
 
 from qaharness.config.settings import get_settings
 from qaharness.api.client import SimApiClient
 from qaharness.transport.udp import UdpClient, UdpEndpoint
 from qaharness.transport.tcp import TcpClient, TcpEndpoint
-from qaharness.reporting import SqlStore
+from qaharness.reporting import SqlStore, SqlStoreConfig
+from qaharness.reporting.ndjson import NdjsonWriter, append_ndjson, summarize_session
+from qaharness.utils import profiling
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 
 _QA_SQL_STORE = None
 _QA_RUN_ID = None
 _QA_SEEN_CALL_REPORTS = set()
-_QA_METRICS_SUMMARY = None
+_QA_METRICS_SUMMARY: NdjsonWriter | None = None
+_QA_WORKER_ID = None
+_QA_XDIST_CONTROLLER = False
 
 def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -65,6 +71,12 @@ def _flatten_metrics_record(record: dict) -> list[tuple[str, float | int | None,
             unit = "ms" if k not in ("count",) else None
             rows.append((f"latency.{k}", v, unit, base_tags))
 
+    # latency breakdown block: {stage: {stat: ms}} -> breakdown.<stage>.<stat>
+    for stage, stats in (record.get("breakdown_ms") or {}).items():
+        for k, v in (stats or {}).items():
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                rows.append((f"breakdown.{stage}.{k}", v, "ms", base_tags))
+
     # retry block (aggregate stats)
     retry = record.get("retry") or {}
     for k, v in retry.items():
@@ -75,11 +87,54 @@ def _flatten_metrics_record(record: dict) -> list[tuple[str, float | int | None,
             rows.append((f"retry.{k}", v, unit, base_tags))
     return rows
 
-def pytest_sessionstart(session):
-    global _QA_SQL_STORE, _QA_RUN_ID, _QA_SEEN_CALL_REPORTS, _QA_METRICS_SUMMARY
+def _xdist_worker_id(config) -> str | None:
+    workerinput = getattr(config, "workerinput", None)
+    return workerinput["workerid"] if workerinput else None
+
+def _is_xdist_controller(config) -> bool:
+    return (
+        _xdist_worker_id(config) is None
+        and bool(getattr(config.option, "numprocesses", None))
+        and getattr(config.option, "dist", "no") != "no"
+    )
+
+def _worker_store_dir(run_id: str) -> Path:
+    return Path("artifacts") / ".qa_workers" / run_id
+
+def pytest_configure(config):
+    # decided before xdist spawns workers, so every worker shard shares the run_id
+    workerinput = getattr(config, "workerinput", None)
+    config._qa_run_id = workerinput["qa_run_id"] if workerinput else str(uuid.uuid4())
 
-    store = SqlStore()
-    run_id = str(uuid.uuid4())
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    # xdist controller -> worker
+    node.workerinput["qa_run_id"] = node.config._qa_run_id
+
+def _summary_path() -> Path:
+    return Path("artifacts") / "metrics_summary.ndjson"
+
+def pytest_sessionstart(session):
+    global _QA_SQL_STORE, _QA_RUN_ID, _QA_SEEN_CALL_REPORTS, _QA_METRICS_SUMMARY, _QA_XDIST_CONTROLLER
+    global _QA_WORKER_ID
+
+    config = session.config
+    run_id = config._qa_run_id
+    worker_id = _xdist_worker_id(config)
+
+    # background batched writer: telemetry never commits on the test thread.
+    # xdist workers each write a private shard (no WAL lock contention); the
+    # controller merges them into results.db at session end
+    if worker_id is not None:
+        cfg = SqlStoreConfig(
+            db_path=_worker_store_dir(run_id) / f"{worker_id}.db",
+            async_writes=True,
+            shard_by_month=False,
+        )
+        cfg.db_path.parent.mkdir(parents=True, exist_ok=True)
+    else:
+        cfg = SqlStoreConfig(async_writes=True)
+    store = SqlStore(cfg)
 
     git_sha = os.getenv("GITHUB_SHA") or os.getenv("CI_COMMIT_SHA")
     branch = os.getenv("GITHUB_REF_NAME") or os.getenv("CI_COMMIT_BRANCH")
@@ -98,15 +153,24 @@ def pytest_sessionstart(session):
     _QA_SQL_STORE = store
     _QA_RUN_ID = run_id
     _QA_SEEN_CALL_REPORTS = set()
+    # the controller sees every worker's reports too; only the workers record them
+    _QA_XDIST_CONTROLLER = _is_xdist_controller(config)
+
+    _QA_WORKER_ID = worker_id
 
-    # optional summary json (nice alongside DB)
+    # per-test summary lines are appended as they happen (metrics_summary.ndjson),
+    # so a crashed session keeps everything up to the last flush
     Path("artifacts").mkdir(exist_ok=True)
-    session.config._qa_metrics_summary = {
-        "run_id": run_id,
-        "started_at": _utc_now_iso(),
-        "tests": [],
-        "db_path": str(store.db_path),
-    }
+    if worker_id is not None:
+        _QA_METRICS_SUMMARY = NdjsonWriter(_worker_store_dir(run_id) / f"{worker_id}.ndjson", append=False)
+    else:
+        _QA_METRICS_SUMMARY = NdjsonWriter(_summary_path(), append=False)
+        _QA_METRICS_SUMMARY.write({
+            "kind": "session_start",
+            "run_id": run_id,
+            "started_at": _utc_now_iso(),
+            "db_path": str(store.db_path),
+        })
 
 @pytest.hookimpl(tryfirst=True)
 def pytest_runtest_logreport(report):
@@ -123,7 +187,7 @@ def pytest_runtest_logreport(report):
     seen = _QA_SEEN_CALL_REPORTS
     summary = _QA_METRICS_SUMMARY
 
-    if store is None or run_id is None or seen is None or summary is None:
+    if store is None or run_id is None or seen is None or summary is None or _QA_XDIST_CONTROLLER:
         return
 
     # guard against duplicate processing
@@ -158,14 +222,30 @@ def pytest_runtest_logreport(report):
         error_message=error_message,
     )
 
-    # also append to JSON summary
-    summary["tests"].append(
-        {
-            "nodeid": report.nodeid,
-            "outcome": outcome,
-            "duration_s": getattr(report, "duration", None),
-        }
-    )
+    # also append to the NDJSON summary
+    entry = {
+        "kind": "test",
+        "nodeid": report.nodeid,
+        "outcome": outcome,
+        "duration_s": getattr(report, "duration", None),
+    }
+    if _QA_WORKER_ID is not None:
+        entry["worker"] = _QA_WORKER_ID
+    summary.write(entry)
+
+def _merge_worker_telemetry(store: SqlStore, run_id: str, summary: NdjsonWriter) -> None:
+    """
+    controller side: fold every worker shard into results.db (one transaction)
+    and stream their NDJSON summaries into metrics_summary.ndjson
+    """
+    worker_dir = _worker_store_dir(run_id)
+    if not worker_dir.is_dir():
+        return
+    store.merge_from(sorted(worker_dir.glob("*.db")), run_id)
+    for path in sorted(worker_dir.glob("*.ndjson")):
+        append_ndjson(path, summary)
+    if not os.getenv("QA_KEEP_WORKER_DBS"):
+        shutil.rmtree(worker_dir, ignore_errors=True)
 
 def pytest_sessionfinish(session, exitstatus):
     global _QA_SQL_STORE, _QA_RUN_ID, _QA_METRICS_SUMMARY
@@ -173,189 +253,234 @@ def pytest_sessionfinish(session, exitstatus):
     store = _QA_SQL_STORE
     run_id = _QA_RUN_ID
     summary = _QA_METRICS_SUMMARY
+    worker_id = _xdist_worker_id(session.config)
 
     if store is not None and run_id is not None:
         try:
+            if worker_id is None and summary is not None:
+                _merge_worker_telemetry(store, run_id, summary)
             store.finish_run(run_id=run_id, finished_at=_utc_now_iso(), exit_status=int(exitstatus))
         finally:
-            if summary is not None:
-                summary["finished_at"] = _utc_now_iso()
-                summary["existatus"] = int(exitstatus)
-                Path("artifacts").mkdir(exist_ok=True)
+            if summary is not None and worker_id is None:
+                summary.write({"kind": "session_end", "finished_at": _utc_now_iso(), "exitstatus": int(exitstatus)})
+                summary.close()
+                # the JSON summary is derived in one streaming pass; tests stay in the NDJSON file
                 (Path("artifacts") / "metrics_summary.json").write_text(
-                    json.dumps(summary, indent=2),
+                    json.dumps(summarize_session(summary.path), indent=2),
                     encoding="utf-8",
                 )
+            elif summary is not None:
+                summary.close()
             store.close()
 
-def _wait_for_udp_ready(host: str, port: int, timeout_s: float = 5.0) -> None:
-    deadline = time.time() + timeout_s
-    while time.time() < deadline:
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(0.5)
-            sock.sendto(b"__", (host, port))
-            return
-        except Exception:
-            time.sleep(0.2)
-        finally:
-            sock.close()
-    raise RuntimeError(f"UDP did not become ready on {host}:{port}")
+def _xdist_worker_index() -> int:
+    # PYTEST_XDIST_WORKER=gw3 -> 3; 0 outside xdist
+    worker = os.getenv("PYTEST_XDIST_WORKER", "")
+    return int(worker[2:]) if worker.startswith("gw") and worker[2:].isdigit() else 0
 
-def _free_port() -> int:
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.bind(("127.0.0.1", 0))
-        return s.getsockname()[1]
-    
-def _wait_for_http_ready(url: str, proc: subprocess.Popen, timeout_s: float = 15.0) -> None:
+def _worker_port(var: str) -> int:
+    """
+    fixed SIM_*_PORT values are shifted by the xdist worker index so each worker
+    gets its own; unset means ephemeral (0)
+    """
+    port = os.getenv(var)
+    return int(port) + _xdist_worker_index() if port else 0
+
+def _publish_endpoints(ep: dict, env=os.environ) -> None:
+    """
+    export bound endpoints where get_settings() looks for them
     """
-    Wait for the simulator to respond at url. If the process exits, surface logs.
+    http_host, http_port = ep["http"].rsplit("//", 1)[1].rsplit(":", 1)
+    env["SIM_HTTP"] = ep["http"]
+    env["SIM_HTTP_HOST"] = http_host
+    env["SIM_HTTP_PORT"] = http_port
+    env["SIM_UDP_HOST"] = ep["udp_host"]
+    env["SIM_UDP_PORT"] = str(ep["udp_port"])
+    env["SIM_TCP_HOST"] = ep["tcp_host"]
+    env["SIM_TCP_PORT"] = str(ep["tcp_port"])
+
+class _SimulatorProcess:
     """
-    deadline = time.time() + timeout_s
-    buffered = []
-
-    while time.time() < deadline:
-        # If process died, show output immediately
-        if proc.poll() is not None:
-            out = ""
-            if proc.stdout:
-                out = proc.stdout.read() or ""
+    `python -m services.device_sim.app.serve` in a child process. The child binds
+    its own ports and prints them once HTTP/UDP/TCP are all up, so there is no
+    free-port guessing (which races between xdist workers) and no readiness polling.
+    """
+    def __init__(self, *, http_port: int = 0, udp_port: int = 0, tcp_port: int = 0, timeout_s: float = 15.0):
+        cmd = [
+            sys.executable, "-m", "services.device_sim.app.serve",
+            "--host", "127.0.0.1",
+            "--http-port", str(http_port),
+            "--udp-port", str(udp_port),
+            "--tcp-port", str(tcp_port),
+        ]
+        popen_kwargs = {}
+        if os.name == "nt":
+            popen_kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            # start in a new session on Unix so teardown can kill the whole process group if needed
+            popen_kwargs["start_new_session"] = True
+
+        self.proc = subprocess.Popen(
+            cmd,
+            cwd=str(REPO_ROOT),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            **popen_kwargs,
+        )
+        self._output: list[str] = []
+        self._ready = threading.Event()
+        self.endpoints: dict | None = None
+        # one reader thread: parses the endpoints line, then keeps draining so the pipe never fills
+        threading.Thread(target=self._drain, name="simulator-stdout", daemon=True).start()
+
+        if not self._ready.wait(timeout_s) or self.endpoints is None:
+            self.stop()
             raise RuntimeError(
-                f"Simulator exited early (code={proc.returncode}).\n"
-                f"--- simulator output ---\n{out}"
+                f"Simulator did not report its endpoints within {timeout_s}s "
+                f"(code={self.proc.poll()}).\n--- simulator output ---\n{''.join(self._output[-80:])}"
             )
 
-        # Check HTTP
+    def _drain(self) -> None:
+        for line in self.proc.stdout:
+            if self.endpoints is None and line.startswith("{"):
+                try:
+                    self.endpoints = json.loads(line)
+                    self._ready.set()
+                    continue
+                except ValueError:
+                    pass
+            self._output.append(line)
+            if len(self._output) > 200:
+                del self._output[:100]
+        # process exited (or closed stdout) before reporting
+        self._ready.set()
+
+    def stop(self) -> None:
+        # Graceful terminate, then force kill if needed
+        self.proc.terminate()
         try:
-            r = httpx.get(url, timeout=1.0)
-            if r.status_code == 200:
-                return
+            self.proc.wait(timeout=5)
         except Exception:
-            pass
-
-        # Capture a little stdout for debugging, without blocking forever
-        if proc.stdout:
-            try:
-                line = proc.stdout.readline()
-                if line:
-                    buffered.append(line)
-                    if len(buffered) > 80:
-                        buffered = buffered[-80:]
-            except Exception:
-                pass
-
-        time.sleep(0.2)
-
-    raise RuntimeError(
-        f"Simulator did not become ready at {url} within {timeout_s}s.\n"
-        f"--- last simulator output ---\n{''.join(buffered)}"
+            self.proc.kill()
+
+def _embedded_simulator():
+    """
+    SIM_MODE=embedded: run the simulator on a background event-loop thread in the
+    pytest process, bound to ephemeral ports (unless SIM_*_PORT are set).
+    start() returns once UDP/TCP/HTTP are bound -- no readiness polling.
+    """
+    from services.device_sim.app.embedded import EmbeddedSimulator
+
+    sim = EmbeddedSimulator(
+        "127.0.0.1",
+        http_port=_worker_port("SIM_HTTP_PORT"),
+        udp_port=_worker_port("SIM_UDP_PORT"),
+        tcp_port=_worker_port("SIM_TCP_PORT"),
     )
+    ep = sim.start()
+    _publish_endpoints(dataclasses.asdict(ep))
+    try:
+        yield sim
+    finally:
+        sim.stop()
+
+def _daemon_simulator():
+    """
+    SIM_MODE=daemon: attach to a long-lived simulator registered under
+    artifacts/.simd (one per xdist worker), starting it only if none is running
+    or its sources changed. It outlives the session and exits on its own after
+    SIM_DAEMON_TTL_S idle seconds; state left by the previous session is cleared here.
+    """
+    from services.device_sim.app import daemon
+
+    path = daemon.registry_path(os.getenv("PYTEST_XDIST_WORKER", "main"))
+    info = daemon.ensure(path, ttl_s=float(os.getenv("SIM_DAEMON_TTL_S", daemon.DEFAULT_TTL_S)))
+    _publish_endpoints(info)
+
+    client = SimApiClient(info["http"])
+    try:
+        if client.capture_status().get("active"):
+            client.stop_capture()
+        if client.profile_status().get("active"):
+            client.stop_profile()
+        client.batch().stop_schedule().set_faults().reset().reset_metrics().send()
+    finally:
+        client.close()
+    yield None
 
 @pytest.fixture(scope="session", autouse=True)
 def simulator_process():
     """
-    Starts the simulator automatically for the test session (Windows-friendly).
-    Uses `py -m uvicorn ...` from repo root so `services.*` imports resolve.
+    Starts one simulator per pytest process for the session: with pytest-xdist
+    every worker gets its own instance (own MODEL, faults and ports), so workers
+    never see each other's state. The bound endpoints are exported through
+    SIM_HTTP / SIM_UDP_* / SIM_TCP_*, which get_settings() reads.
+
+    SIM_MODE=embedded runs it in-process instead (fast startup, see _embedded_simulator).
+    SIM_MODE=daemon reuses a simulator across sessions (see _daemon_simulator).
     """
+    mode = os.getenv("SIM_MODE", "subprocess")
+    if mode == "embedded":
+        yield from _embedded_simulator()
+        return
+    if mode == "daemon":
+        yield from _daemon_simulator()
+        return
 
-    # Keep a single source of truth for where tests expect the API
-    # If you want to change ports later, change it here and in settings defaults.
-    sim_host = "127.0.0.1"
-    sim_port = int(os.getenv("SIM_HTTP_PORT", _free_port()))
-    sim_http = os.getenv("SIM_HTTP", f"http://{sim_host}:{sim_port}")
-
-    #env = os.environ.copy()
-    #env["SIM_HTTP"] = sim_http
-    #env["SIM_HTTP_HOST"] = sim_host
-    #env["SIM_HTTP_PORT"] = str(sim_port)
-    #env["SIM_UDP_HOST"] = os.getenv("SIM_UDP_HOST", "127.0.0.1")
-    #env["SIM_UDP_PORT"] = os.getenv("SIM_UDP_PORT", str(_free_port()))
-
-    os.environ["SIM_HTTP"] = sim_http
-    os.environ["SIM_HTTP_HOST"] = sim_host
-    os.environ["SIM_HTTP_PORT"] = str(sim_port)
-    os.environ["SIM_UDP_HOST"] = os.getenv("SIM_UDP_HOST", "127.0.0.1")
-    os.environ["SIM_UDP_PORT"] = os.getenv("SIM_UDP_PORT", str(_free_port()))
-    os.environ["SIM_TCP_HOST" ] = os.getenv("SIM_TCP_HOST", "127.0.0.1")
-    os.environ["SIM_TCP_PORT"] = os.getenv("SIM_TCP_PORT", str(_free_port()))
-
-
-    env = os.environ.copy()
-    # Start uvicorn as a module, from repo root
-    cmd = [
-        sys.executable, "-m", "uvicorn",
-        "services.device_sim.app.main:app",
-        "--host", sim_host,
-        "--port", str(sim_port),
-        "--log-level", "info",
-    ]
-
-    #p = subprocess.Popen(
-    #    cmd,
-    #    cwd=str(REPO_ROOT),
-    #    env=env,
-    #    stdout=subprocess.PIPE,
-    #    stderr=subprocess.STDOUT,
-    #    text=True,
-    #    bufsize=1,
-    #    creationflags=subprocess.CREATE_NEW_PROCESS_GROUP,
-    #)
-
-    creationflags = 0
-    popen_kwargs = {}
-    
-    if os.name == "nt":
-        creationflags = subprocess.CREATE_NEW_PROCESS_GROUP
-        popen_kwargs["creationflags"] = creationflags
-    else:
-        # start in a new session on  Unis so teardown can kill the whole process group if needed
-        popen_kwargs["start_new_session"] = True
-    
-    p = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        **popen_kwargs,
+    sim = _SimulatorProcess(
+        http_port=_worker_port("SIM_HTTP_PORT"),
+        udp_port=_worker_port("SIM_UDP_PORT"),
+        tcp_port=_worker_port("SIM_TCP_PORT"),
     )
+    _publish_endpoints(sim.endpoints)
+    try:
+        yield sim.proc
+    finally:
+        sim.stop()
 
+def _wants_isolation(request) -> bool:
+    return request.node.get_closest_marker("isolated_simulator") is not None or os.getenv("SIM_ISOLATION") == "test"
+
+@pytest.fixture
+def _isolated_simulator(request, monkeypatch):
+    """
+    opt-in per-test simulator: @pytest.mark.isolated_simulator (or SIM_ISOLATION=test
+    for every test) starts a fresh subprocess on ephemeral ports for the test and
+    points SIM_* at it for the test's duration. Costs one simulator startup per test.
+    """
+    if not _wants_isolation(request):
+        yield None
+        return
+    sim = _SimulatorProcess()
+    env: dict[str, str] = {}
+    _publish_endpoints(sim.endpoints, env)
+    for k, v in env.items():
+        monkeypatch.setenv(k, v)
     try:
-        _wait_for_http_ready(
-            f"{sim_http}/health", 
-            p, 
-            timeout_s=15.0
-        )
-        _wait_for_udp_ready(
-            env["SIM_UDP_HOST"],
-            int(env["SIM_UDP_PORT"]),
-            timeout_s=5.0,
-        )
-        _wait_for_tcp_ready(
-            env["SIM_TCP_HOST"],
-            int(env["SIM_TCP_PORT"]),
-            timeout_s=5.0,
-        )
-        yield p
-    except Exception:
-        if p.stdout:
-            out = p.stdout.read()
-            if out:
-                print("\n--- simulator output (on failure) ---\n", out)
-        raise
+        yield sim
     finally:
-        # Graceful terminate, then force kill if needed
-        p.terminate()
-        try:
-            p.wait(timeout=5)
-        except Exception:
-            p.kill()
+        sim.stop()
 
 @pytest.fixture
-def settings():
+def settings(_isolated_simulator):
     return get_settings()
 
+@pytest.fixture(scope="session")
+def _sim_api_session(simulator_process):
+    # one keep-alive HTTP connection for the whole session instead of a new client per test
+    client = SimApiClient(get_settings().sim_http)
+    try:
+        yield client
+    finally:
+        client.close()
+
 @pytest.fixture
-def sim_api(settings):
+def sim_api(_sim_api_session, _isolated_simulator, settings):
+    if _isolated_simulator is None:
+        yield _sim_api_session
+        return
     client = SimApiClient(settings.sim_http)
     try:
         yield client
@@ -382,33 +507,129 @@ def reset_simulator(sim_api):
     """
     ensure each test starts from a clean state AND clean fault config
     """
-    # clear faults first 
-    sim_api.set_faults(delay_ms=0, drop_rate=0.0, corrupt_rate=0.0)
-
-    # reset state
-    sim_api.reset()
+    # stop any fault schedule, clear faults, then reset state -- one round-trip
+    sim_api.batch().stop_schedule().set_faults(delay_ms=0, drop_rate=0.0, corrupt_rate=0.0).reset().send()
     yield
 
+def _profile_options(request) -> dict | None:
+    marker = request.node.get_closest_marker("profile")
+    env_mode = os.getenv("QA_PROFILE")
+    if marker is None and not env_mode:
+        return None
+    kwargs = dict(marker.kwargs) if marker is not None else {}
+    if marker is not None and marker.args:
+        kwargs.setdefault("mode", marker.args[0])
+    return {
+        "mode": kwargs.get("mode") or env_mode or "sample",
+        "interval_ms": float(kwargs.get("interval_ms", os.getenv("QA_PROFILE_INTERVAL_MS", "1"))),
+    }
+
+@pytest.fixture(autouse=True)
+def cpu_profile(request):
+    """
+    opt-in CPU profile of the test's hot paths: @pytest.mark.profile(mode=..., interval_ms=...)
+    for one test, QA_PROFILE=sample|deterministic for every test. The client side is
+    profiled in-process and the simulator through /control/profile; collapsed stacks go to
+    artifacts/profiles/<run_id>/<test>.{client,sim}.folded plus a <test>.json summary.
+    Yields the in-process Profiler, or None when profiling is off.
+    """
+    opts = _profile_options(request)
+    if opts is None:
+        yield None
+        return
+    out_dir = (Path("artifacts") / "profiles" / (_QA_RUN_ID or "local")).resolve()
+    test_id = request.node.nodeid.replace("/", "_").replace("::", "__")
+    # an embedded simulator shares this process, so the in-process profiler covers it as well
+    in_process = os.getenv("SIM_MODE") == "embedded" and not _wants_isolation(request)
+    sim_api = None if in_process else request.getfixturevalue("sim_api")
+
+    local = profiling.start(opts["mode"], interval_s=opts["interval_ms"] / 1000.0)
+    if sim_api is not None:
+        sim_api.start_profile(opts["mode"], interval_ms=opts["interval_ms"], path=str(out_dir / f"{test_id}.sim.folded"))
+    try:
+        yield local
+    finally:
+        side = "process" if in_process else "client"
+        profiles = {side: profiling.stop(out_dir / f"{test_id}.{side}.folded")}
+        if sim_api is not None:
+            profiles["sim"] = sim_api.stop_profile()
+        (out_dir / f"{test_id}.json").write_text(
+            json.dumps({"run_id": _QA_RUN_ID, "nodeid": request.node.nodeid, "profiles": profiles}, indent=2),
+            encoding="utf-8",
+        )
+
 @ pytest.fixture
 def sim_tcp(settings):
     return TcpClient(TcpEndpoint(settings.sim_tcp_host, settings.sim_tcp_port))
 
-def _free_udp_port(host: str = "127.0.0.1") -> int:
-    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    s.bind((host, 0)) 
-    port = s.getsockname()[1]
-    s.close()
-    return port
 
-def _wait_for_tcp_ready(host: str, port: int, timeout_s: float = 5.0) -> None:
-    deadline = time.time() + timeout_s
-    while time.time() < deadline:
-        try:
-            with socket.create_connection((host, port), timeout=0.5):
-                return
-        except Exception:
-            time.sleep(0.2)
-    raise RuntimeError(f"TCP did not become ready on {host}:{port}")
+class _PerfStream:
+    """
+    streams per-request telemetry to SQLite as it is produced, so a test's
+    memory doesn't grow with its sample count:
+    -   sample(series, value) buffers `chunk` values, then appends one perf_samples chunk
+    -   retry_event(...) queues one retry_events row
+    """
+    def __init__(self, nodeid: str, chunk: int = 4096):
+        self._nodeid = nodeid
+        self._chunk = chunk
+        self._bufs: dict[str, array] = {}
+        self.counts: dict[str, int] = {}
+        self.retry_events = 0
+
+    def sample(self, series: str, value: float) -> None:
+        buf = self._bufs.get(series)
+        if buf is None:
+            buf = self._bufs[series] = array("d")
+        buf.append(value)
+        self.counts[series] = self.counts.get(series, 0) + 1
+        if len(buf) >= self._chunk:
+            self._flush_series(series)
+
+    def retry_event(self, *, request_name: str | None, attempt: int, sleep_s: float, error: str) -> None:
+        self.retry_events += 1
+        store, run_id = _QA_SQL_STORE, _QA_RUN_ID
+        if store is None or run_id is None:
+            return
+        store.record_retry_event(
+            run_id=run_id,
+            nodeid=self._nodeid,
+            request_name=request_name,
+            attempt_number=int(attempt),
+            sleep_s=float(sleep_s),
+            exception_type=error,
+        )
+
+    def _flush_series(self, series: str) -> None:
+        buf = self._bufs[series]
+        store, run_id = _QA_SQL_STORE, _QA_RUN_ID
+        if buf and store is not None and run_id is not None:
+            store.record_samples(
+                run_id=run_id,
+                nodeid=self._nodeid,
+                series=series,
+                values=buf,
+                unit="ms" if series.endswith("_ms") else None,
+            )
+        # record_samples encodes immediately, so the buffer can be reused
+        del buf[:]
+
+    def close(self) -> None:
+        for series in list(self._bufs):
+            self._flush_series(series)
+
+
+@pytest.fixture
+def perf_stream(request):
+    """
+    constant-memory sink for raw per-request samples and retry events
+    (the alternative to passing full lists to metrics_recorder)
+    """
+    stream = _PerfStream(request.node.nodeid)
+    try:
+        yield stream
+    finally:
+        stream.close()
 
 
 def _artifact_dir() -> Path:
@@ -420,21 +641,44 @@ def _artifact_dir() -> Path:
 def metrics_recorder(request):
     """
     records structured metrics for a test:
-    -   writes JSON artifacts to artifacts/metric/<test>.json
+    -   appends NDJSON artifacts to artifacts/metrics/<test>.ndjson as records arrive
     -   writes falttened numeric metrics into SQLite perf_metrics
+    -   writes payload["raw_samples"] ({series: list}) into SQLite perf_samples
+    -   writes payload["histograms"] ({name: LatencyHistogram}) into SQLite perf_histograms
 
     """
     global _QA_SQL_STORE, _QA_RUN_ID
 
     start = time.time()
-    records = []
+    test_id = request.node.nodeid.replace("/", "_").replace("::", "__")
+    # each record is on disk as soon as it is recorded, not held until teardown
+    artifact = NdjsonWriter(_metrics_artifact_dir() / f"{test_id}.ndjson", append=False, flush_every=1)
+    artifact.write({"kind": "test_start", "test_id": request.node.nodeid, "timestamp_epoch": start})
 
     def record(payload: dict):
-        records.append(payload)
+        # raw per-request vectors go to perf_samples as typed BLOBs, never into the JSON artifact
+        raw = payload.get("raw_samples") or {}
+        if raw:
+            payload = {**payload, "raw_samples": {series: len(vals) for series, vals in raw.items()}}
+        # LatencyHistograms go to perf_histograms; the artifact gets their summary
+        hists = payload.get("histograms") or {}
+        if hists:
+            payload = {**payload, "histograms": {name: h.summary() for name, h in hists.items()}}
+        artifact.write({"kind": "record", "payload": payload})
         
         store = _QA_SQL_STORE
         run_id = _QA_RUN_ID
         if store is not None and run_id is not None:
+            for series, vals in raw.items():
+                store.record_samples(
+                    run_id=run_id,
+                    nodeid=request.node.nodeid,
+                    series=series,
+                    values=vals,
+                    unit="ms" if series.endswith("_ms") else None,
+                )
+            for name, hist in hists.items():
+                store.record_histogram(run_id=run_id, nodeid=request.node.nodeid, name=name, hist=hist)
             for metric_name, metric_value, unit, tags in _flatten_metrics_record(payload):
                 store.record_metric(
                     run_id=run_id,
@@ -460,27 +704,9 @@ def metrics_recorder(request):
                 except Exception:
                     # don't let telemetry break tests
                     pass
-    yield record
-
-    # write on teardown (even if test failed, if fixture teardown runs)
-    test_id = request.node.nodeid.replace("/", "_").replace("::", "__")
-    out = {
-        "test_id": request.node.nodeid,
-        "timestamp_epoch": start,
-        "duration_s": time.time() - start,
-        "records": records,
-    }
+    try:
+        yield record
+    finally:
+        artifact.write({"kind": "test_end", "duration_s": time.time() - start})
+        artifact.close()
 
-    out_path = _metrics_artifact_dir() / f"{test_id}.json"
-    out_path.write_text(json.dumps(out, indent=2), encoding="utf-8")
-
-@pytest.hookimpl(hookwrapper=True)
-def pytest_runtest_call(item):
-    t0 = time.time()
-    outcome = yield
-    dt = time.time() - t0
-    item.config._qa_metrics_summary["tests"].append({
-        "nodeid": item.nodeid,
-        "duration_s": dt,
-        "status": "passed" if outcome.excinfo is None else "failed",
-    })
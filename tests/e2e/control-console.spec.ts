@@ -12,7 +12,7 @@ test('UI can reset, configure, and apply faults', async ({ page, request, baseUR
     /**
      * navigate directly to the UI contro console route
      * this page is expected to:
-     * - render the current device state (derived from /health)
+     * - render the current device state (pushed over the /events SSE stream)
      * - provide buttons that call control-plane nedpoints (/control/*)
      * - display raw JSON response for debugging / observability
      */
@@ -30,7 +30,7 @@ test('UI can reset, configure, and apply faults', async ({ page, request, baseUR
      * intended behavior:
      * - UI sends POST /control/configure
      * - simulator transitions to CONFIGURED
-     * - UI refreshed /health and updates the displayed state
+     * - the state change is pushed over /events and the UI updates the displayed state
      */
     await page.click('#configure');
     await expect(page.locator('#state')).toHaveText('CONFIGURED');
@@ -53,8 +53,8 @@ test('UI can reset, configure, and apply faults', async ({ page, request, baseUR
 
     /**
      * asser the UI reflects the applied faults
-     * this assumes the backend exposes a GET /control/faults endpoint and the UI 
-     * calls it to populate #faultsView
+     * the fault change is pushed over /events (state event includes faults)
+     * and the UI renders it into #faultsView
      * 
      * if you *don't* have GET /control/faults:
      * - remove this block, and instead assert #controlResult contains HTTP 200
@@ -0,0 +1,87 @@
+import pytest
+from qaharness.transport import capture as cap
+from qaharness.transport import msgtypes as mt
+from qaharness.transport.replay import replay_capture
+
+
+@pytest.mark.system
+def test_capture_then_replay_at_max_speed(sim_api, sim_udp, sim_tcp, settings, tmp_path):
+    path = tmp_path / "session.qacap"
+    sim_api.start_capture(str(path))
+
+    # IDLE -> BAD_STATE, then a few stateless requests over both transports
+    assert sim_udp.start()[0] == mt.RESP_ERR
+    for _ in range(5):
+        assert sim_udp.ping() == (mt.RESP_OK, b"PONG")
+        assert sim_tcp.status() == (mt.RESP_STATE, b"IDLE")
+
+    stats = sim_api.stop_capture()
+    assert stats["records"] == 22
+    assert sim_api.capture_status() == {"active": False}
+
+    with cap.CaptureReader(path) as r:
+        recs = list(r)
+        directions = [rec.direction for rec in recs]
+        transports = {rec.transport for rec in recs}
+        del recs
+    assert directions.count(cap.REQUEST) == directions.count(cap.RESPONSE) == 11
+    assert transports == {cap.UDP, cap.TCP}
+
+    # same starting state -> identical responses
+    sim_api.reset()
+    report = replay_capture(
+        path,
+        udp_addr=(settings.sim_udp_host, settings.sim_udp_port),
+        tcp_addr=(settings.sim_tcp_host, settings.sim_tcp_port),
+        speed=0,
+    )
+    assert report.requests == 11
+    assert report.ok, report.mismatches
+
+@pytest.mark.system
+def test_replay_flags_diverging_responses(sim_api, sim_udp, settings, tmp_path):
+    path = tmp_path / "diverge.qacap"
+    sim_api.start_capture(str(path))
+    sim_udp.status()
+    sim_api.stop_capture()
+
+    # state changed since capture -> STATUS payload differs
+    sim_api.configure()
+    report = replay_capture(
+        path,
+        udp_addr=(settings.sim_udp_host, settings.sim_udp_port),
+        tcp_addr=None,
+        speed=0,
+    )
+    assert report.mismatched == 1
+    assert report.mismatches[0]["kind"] == "mismatched"
+
+
+@pytest.mark.system
+def test_replay_matches_timed_responses_despite_new_stamps(sim_api, sim_udp, sim_tcp, settings, tmp_path):
+    path = tmp_path / "timed.qacap"
+    sim_api.start_capture(str(path))
+    for _ in range(3):
+        assert sim_udp.request_timed(mt.REQ_PING).payload == b"PONG"
+        assert sim_tcp.request_timed(mt.REQ_STATUS).payload == b"IDLE"
+    sim_api.stop_capture()
+
+    sim_api.reset()
+    report = replay_capture(
+        path,
+        udp_addr=(settings.sim_udp_host, settings.sim_udp_port),
+        tcp_addr=(settings.sim_tcp_host, settings.sim_tcp_port),
+        speed=0,
+    )
+    assert report.requests == 6
+    assert report.ok, report.mismatches
+
+    # the stamps are ignored, the payload is not
+    sim_api.configure()
+    report = replay_capture(
+        path,
+        udp_addr=None,
+        tcp_addr=(settings.sim_tcp_host, settings.sim_tcp_port),
+        speed=0,
+    )
+    assert (report.matched, report.mismatched) == (0, 3)
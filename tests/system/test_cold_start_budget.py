@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+@pytest.mark.system
+def test_simulator_cold_start_budget(metrics_recorder):
+    """
+    Fresh-interpreter import + time to first UDP response must stay within budget;
+    headless imports must not pull in the UI stack (Jinja2/StaticFiles).
+    """
+    import_budget_ms = float(os.getenv("SIM_IMPORT_BUDGET_MS", "1000"))
+    cold_start_budget_ms = float(os.getenv("SIM_COLD_START_BUDGET_MS", "2000"))
+
+    out = subprocess.run(
+        [sys.executable, "-m", "services.device_sim.app.coldstart"],
+        cwd=str(REPO_ROOT),
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+
+    metrics_recorder({
+        "name": "simulator_cold_start",
+        "latency_ms": {
+            "import": result["import_ms"],
+            "start": result["start_ms"],
+            "first_udp_response": result["first_udp_response_ms"],
+        },
+        "thresholds": {
+            "import_budget_ms": import_budget_ms,
+            "cold_start_budget_ms": cold_start_budget_ms,
+        },
+    })
+
+    assert result["first_response_ok"]
+    assert result["heavy_modules_at_import"] == [], (
+        f"UI modules imported eagerly: {result['heavy_modules_at_import']}"
+    )
+    assert result["import_ms"] <= import_budget_ms, (
+        f"simulator import took {result['import_ms']:.0f}ms (budget {import_budget_ms:.0f}ms)"
+    )
+    assert result["first_udp_response_ms"] <= cold_start_budget_ms, (
+        f"cold start to first UDP response took {result['first_udp_response_ms']:.0f}ms "
+        f"(budget {cold_start_budget_ms:.0f}ms)"
+    )
@@ -0,0 +1,37 @@
+import httpx
+import pytest
+from qaharness.transport import msgtypes as mt
+
+
+@pytest.mark.system
+def test_batch_applies_ops_in_order(sim_api, sim_udp):
+    before = sim_api.status()["reset_count"]
+
+    resp = (
+        sim_api.batch()
+        .set_faults(delay_ms=5, drop_rate=0.0, corrupt_rate=0.0)
+        .reset()
+        .configure()
+        .start_stream()
+        .send()
+    )
+    assert resp["applied"] == 4
+    assert resp["state"] == "STREAMING"
+    assert resp["reset_count"] == before + 1
+    assert resp["faults"]["delay_ms"] == 5
+
+    rtype, payload = sim_udp.status()
+    assert (rtype, payload) == (mt.RESP_STATE, b"STREAMING")
+
+@pytest.mark.system
+def test_batch_is_all_or_nothing(sim_api):
+    before = sim_api.status()
+
+    # start_stream from IDLE is an invalid transition -> whole batch rolls back
+    with pytest.raises(httpx.HTTPStatusError) as exc:
+        sim_api.batch().set_faults(drop_rate=0.9).reset().start_stream().send()
+
+    assert exc.value.response.status_code == 409
+    detail = exc.value.response.json()["detail"]
+    assert (detail["index"], detail["op"]) == (2, "start_stream")
+    assert sim_api.status() == before
@@ -0,0 +1,47 @@
+import pytest
+from qaharness.api.client import SimApiClient
+
+
+def _next_state(events, predicate, limit: int = 50) -> dict:
+    for _ in range(limit):
+        kind, data = next(events)
+        if kind == "state" and predicate(data):
+            return data
+    raise AssertionError("expected state event not received")
+
+@pytest.mark.system
+def test_event_stream_pushes_state_and_fault_changes(sim_api, settings):
+    # separate client: the stream holds its connection open
+    watcher = SimApiClient(settings.sim_http)
+    events = watcher.iter_events()
+    try:
+        initial = _next_state(events, lambda d: True)
+        assert initial["state"] == "IDLE"
+
+        sim_api.configure()
+        assert _next_state(events, lambda d: d["state"] == "CONFIGURED")["state"] == "CONFIGURED"
+
+        sim_api.set_faults(drop_rate=0.5, delay_ms=10, corrupt_rate=0.0)
+        data = _next_state(events, lambda d: d["faults"]["drop_rate"] == 0.5)
+        assert data["faults"]["delay_ms"] == 10
+    finally:
+        events.close()
+        watcher.close()
+
+@pytest.mark.system
+def test_event_stream_emits_aggregated_metrics(sim_api, sim_udp, settings):
+    sim_udp.ping()
+    watcher = SimApiClient(settings.sim_http)
+    events = watcher.iter_events()
+    try:
+        for _ in range(10):
+            kind, data = next(events)
+            if kind == "metrics":
+                break
+        else:
+            raise AssertionError("no metrics event received")
+        assert data["requests_total"] >= 1
+        assert "by_outcome" in data
+    finally:
+        events.close()
+        watcher.close()
@@ -3,8 +3,7 @@ from qaharness.transport import msgtypes as mt
 from qaharness.transport.framing import FrameError
 
 def _corrupt_is_detected(sim_api, data_client):
-    sim_api.configure()
-    sim_api.set_faults(corrupt_rate=1.0, drop_rate=0.0, delay_ms=0)
+    sim_api.batch().configure().set_faults(corrupt_rate=1.0, drop_rate=0.0, delay_ms=0).send()
 
     with pytest.raises(FrameError):
         data_client.request(mt.REQ_STATUS)
@@ -0,0 +1,58 @@
+import time
+
+import httpx
+import pytest
+from qaharness.transport import msgtypes as mt
+
+
+def _wait_for(pred, timeout_s: float = 3.0, interval_s: float = 0.02):
+    deadline = time.perf_counter() + timeout_s
+    while time.perf_counter() < deadline:
+        value = pred()
+        if value:
+            return value
+        time.sleep(interval_s)
+    raise AssertionError("condition not met before timeout")
+
+@pytest.mark.system
+def test_schedule_runs_faults_and_actions(sim_api, sim_udp):
+    sim_api.set_schedule([
+        {"at_ms": 0, "action": "configure"},
+        {"at_ms": 50, "ramp_ms": 150, "faults": {"delay_ms": 60}},
+        {"at_ms": 300, "faults": {"delay_ms": 0, "corrupt_rate": 0.0}},
+    ], name="spike", tick_ms=10)
+
+    # mid-ramp, the simulator has moved delay without any client calls
+    status = _wait_for(lambda: (s := sim_api.status())["faults"]["delay_ms"] > 0 and s)
+    assert status["schedule"]["name"] == "spike"
+    assert status["schedule"]["running"] is True
+    assert status["state"] == "CONFIGURED"
+
+    done = _wait_for(lambda: (s := sim_api.schedule_status())["finished"] and s)
+    assert done["steps_fired"] == done["steps_total"] == 3
+    assert done["errors"] == []
+    assert sim_api.status()["faults"]["delay_ms"] == 0
+    assert sim_udp.status() == (mt.RESP_STATE, b"CONFIGURED")
+
+@pytest.mark.system
+def test_looping_schedule_until_stopped(sim_api):
+    sim_api.set_schedule([
+        {"at_ms": 0, "faults": {"drop_rate": 0.5}},
+        {"at_ms": 40, "faults": {"drop_rate": 0.0}},
+        # rejected transitions are recorded, not fatal
+        {"at_ms": 60, "action": "stop_stream"},
+    ], loop=True, duration_ms=80)
+
+    progress = _wait_for(lambda: (s := sim_api.schedule_status())["iteration"] >= 2 and s)
+    assert progress["running"] is True
+    assert progress["errors"]
+
+    stopped = sim_api.stop_schedule()["schedule"]
+    assert stopped["running"] is False
+    assert stopped["finished"] is False
+
+@pytest.mark.system
+def test_invalid_schedule_rejected(sim_api):
+    with pytest.raises(httpx.HTTPStatusError) as exc:
+        sim_api.set_schedule([{"at_ms": 0, "ramp_ms": 10}])
+    assert exc.value.response.status_code == 422
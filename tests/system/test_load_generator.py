@@ -0,0 +1,42 @@
+import pytest
+
+from qaharness.load import LoadConfig, run_load, store_report
+from qaharness.reporting import SqlStore, SqlStoreConfig
+
+
+def _addr(settings, transport):
+    if transport == "udp":
+        return settings.sim_udp_host, settings.sim_udp_port
+    return settings.sim_tcp_host, settings.sim_tcp_port
+
+
+@pytest.mark.system
+@pytest.mark.parametrize("transport", ["udp", "tcp"])
+def test_constant_rate_load(settings, transport, tmp_path):
+    cfg = LoadConfig(transport=transport, addr=_addr(settings, transport), msg="REQ_STATUS", rate=200, duration_s=1.0)
+    report = run_load(cfg)
+
+    assert report.sent == 200
+    assert report.success_rate >= 0.99, report.as_dict()
+    assert report.responses.get("RESP_STATE", 0) == report.ok
+    # the schedule held: offered load wasn't throttled by the responses
+    assert report.elapsed_s < 2.0
+    assert report.latency.percentile(99) >= report.service.percentile(50)
+
+    store = SqlStore(SqlStoreConfig(db_path=tmp_path / "results.db"))
+    try:
+        run_id = store_report(store, report)
+        assert store.load_histogram(nodeid=cfg.nodeid, name="latency_ms", run_ids=[run_id]) == report.latency
+        assert store.run_rollups(run_id, "latency.p95")[0]["value"] == report.latency.percentile(95)
+    finally:
+        store.close()
+
+
+@pytest.mark.system
+def test_load_latency_includes_injected_delay(sim_api, settings):
+    sim_api.set_faults(delay_ms=30, drop_rate=0.0, corrupt_rate=0.0)
+    report = run_load(LoadConfig(transport="udp", addr=_addr(settings, "udp"), rate=100, duration_s=0.5))
+
+    assert report.ok == 50
+    assert report.latency.percentile(50) >= 30
+    assert report.latency.min >= report.service.min
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+from qaharness.transport import msgtypes as mt
+from qaharness.utils import profiling
+
+
+@pytest.mark.system
+def test_simulator_profile_through_control_api(sim_api, sim_udp, sim_tcp, tmp_path):
+    if profiling.active() is not None:
+        pytest.skip("profiling already active for this test (QA_PROFILE)")
+    path = tmp_path / "sim.folded"
+    started = sim_api.start_profile("deterministic", path=str(path))
+    assert started["status"] == "profiling"
+    assert sim_api.profile_status()["active"]
+    try:
+        for _ in range(5):
+            assert sim_udp.request_once(mt.REQ_PING)[0] == mt.RESP_OK
+            assert sim_tcp.request_once(mt.REQ_PING)[0] == mt.RESP_OK
+    finally:
+        summary = sim_api.stop_profile()
+
+    assert summary["path"] == str(path)
+    assert summary["calls"]["sim.udp.datagram_received"] >= 5
+    assert summary["calls"]["sim.tcp.handle_client"] >= 5
+    stacks = path.read_text().splitlines()
+    assert any(s.startswith("sim.udp.datagram_received;") and "encode_frame" in s for s in stacks)
+    assert any(s.startswith("sim.tcp.handle_client;") and "decode_frame" in s for s in stacks)
+    assert not sim_api.profile_status()["active"]
+
+@pytest.mark.system
+@pytest.mark.profile(mode="deterministic")
+def test_profile_marker_covers_client_hot_paths(cpu_profile, sim_udp, sim_tcp):
+    assert cpu_profile is profiling.active()
+    sim_udp.request_once(mt.REQ_PING)
+    sim_tcp.request_once(mt.REQ_PING)
+
+    calls = cpu_profile.calls()
+    assert calls["client.udp.request_once"] == 1
+    assert calls["client.tcp.request_once"] == 1
+    if os.getenv("SIM_MODE") == "embedded":
+        # same process: the simulator's handlers land in the same profile
+        assert calls["sim.udp.datagram_received"] == 1
@@ -0,0 +1,69 @@
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+from services.device_sim.app import daemon
+from qaharness.transport import msgtypes as mt
+from qaharness.transport.udp import UdpClient, UdpEndpoint
+
+
+@pytest.mark.system
+def test_daemon_is_reused_and_exits_when_idle(tmp_path):
+    path = daemon.registry_path("t", tmp_path)
+    first = daemon.ensure(path, ttl_s=1.5)
+    try:
+        # a second session discovers the same process instead of starting another
+        t0 = time.perf_counter()
+        again = daemon.ensure(path, ttl_s=1.5)
+        assert again["pid"] == first["pid"]
+        assert time.perf_counter() - t0 < 0.5
+
+        # data-plane traffic counts as activity and keeps it alive past the TTL
+        client = UdpClient(UdpEndpoint(first["udp_host"], first["udp_port"]), timeout_s=1.0)
+        for _ in range(5):
+            assert client.request_once(mt.REQ_PING)[0] == mt.RESP_OK
+            time.sleep(0.5)
+        assert daemon.discover(path) is not None
+
+        # then idles out and unregisters itself
+        deadline = time.monotonic() + 5.0
+        while path.exists() and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert not path.exists()
+        # the registry goes first so no session picks up a daemon that is shutting down
+        while daemon.healthy(first["http"]) and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert not daemon.healthy(first["http"])
+    finally:
+        daemon.stop(path)
+
+
+@pytest.mark.system
+def test_stale_registry_never_signals_a_recycled_pid(tmp_path):
+    # a registry left by a SIGKILLed daemon whose pid now belongs to another process
+    other = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    path = daemon.registry_path("stale", tmp_path)
+    stale = {
+        "pid": other.pid,
+        "proc_start": -1,
+        "http": f"http://127.0.0.1:{port}",
+        "fingerprint": "old",
+    }
+    try:
+        daemon.write_registry(path, stale)
+        assert daemon.stop(path) is False
+        assert not path.exists()
+
+        daemon.write_registry(path, stale)
+        assert daemon.discover(path) is None
+        assert not path.exists()
+
+        assert other.poll() is None
+    finally:
+        other.kill()
+        other.wait()
@@ -0,0 +1,24 @@
+import pytest
+from qaharness.transport import msgtypes as mt
+
+
+@pytest.mark.system
+@pytest.mark.isolated_simulator
+def test_isolated_simulator_has_its_own_state(sim_api, sim_udp, settings, _sim_api_session):
+    shared_before = _sim_api_session.status()
+
+    sim_api.batch().set_faults(delay_ms=0, drop_rate=0.0, corrupt_rate=0.0).configure().start_stream().send()
+    rtype, payload = sim_udp.status()
+    assert (rtype, payload) == (mt.RESP_STATE, b"STREAMING")
+
+    # the session simulator (other ports, other process) never saw any of it
+    assert sim_api.status()["state"] == "STREAMING"
+    assert _sim_api_session.status() == shared_before
+
+
+@pytest.mark.system
+def test_each_worker_publishes_its_own_endpoints(settings, simulator_process):
+    # simulator_process bound ephemeral ports and exported them; no two listeners share one
+    ports = {settings.sim_udp_port, settings.sim_tcp_port, int(settings.sim_http.rsplit(":", 1)[1])}
+    assert len(ports) == 3
+    assert 0 not in ports
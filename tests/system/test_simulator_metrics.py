@@ -0,0 +1,48 @@
+import pytest
+from qaharness.transport import msgtypes as mt
+from qaharness.transport.framing import FrameError
+
+
+def _count(snapshot: dict, transport: str, msg_type: str, outcome: str) -> int:
+    for row in snapshot["requests"]:
+        if (row["transport"], row["msg_type"], row["outcome"]) == (transport, msg_type, outcome):
+            return row["count"]
+    return 0
+
+@pytest.mark.system
+def test_metrics_count_outcomes_per_msg_type(sim_api, sim_udp, sim_tcp):
+    sim_api.reset_metrics()
+
+    assert sim_udp.ping() == (mt.RESP_OK, b"PONG")
+    assert sim_tcp.ping() == (mt.RESP_OK, b"PONG")
+
+    # START while IDLE -> BAD_STATE
+    rtype, _ = sim_udp.start()
+    assert rtype == mt.RESP_ERR
+
+    sim_api.set_faults(corrupt_rate=1.0, drop_rate=0.0, delay_ms=0)
+    with pytest.raises(FrameError):
+        sim_udp.status()
+
+    snap = sim_api.metrics()
+    assert _count(snap, "udp", "REQ_PING", "ok") == 1
+    assert _count(snap, "tcp", "REQ_PING", "ok") == 1
+    assert _count(snap, "udp", "REQ_START", "bad_state") == 1
+    assert _count(snap, "udp", "REQ_STATUS", "corrupted") == 1
+
+    hist = {(h["transport"], h["msg_type"]): h for h in snap["service_time_s"]}
+    assert hist[("udp", "REQ_PING")]["count"] == 1
+    assert hist[("udp", "REQ_PING")]["buckets"]["+Inf"] == 1
+    assert snap["pending_delayed_sends"] == 0
+
+@pytest.mark.system
+def test_metrics_prometheus_text(sim_api, sim_udp):
+    sim_api.reset_metrics()
+    sim_api.set_faults(drop_rate=1.0, delay_ms=0, corrupt_rate=0.0)
+    with pytest.raises(TimeoutError):
+        sim_udp.ping()
+
+    text = sim_api.metrics_text()
+    assert "# TYPE sim_requests_total counter" in text
+    assert 'sim_requests_total{transport="udp",msg_type="REQ_PING",outcome="dropped"} 1' in text
+    assert "sim_tcp_active_connections 0" in text
@@ -19,3 +19,8 @@ def test_udp_start_requires_configured(sim_api, sim_udp):
     rtype, payload = sim_udp.stop()
     assert rtype == mt.RESP_OK
     assert payload == b"STOPPED"
+
+def test_unknown_request_payload_per_transport(sim_udp, sim_tcp):
+    # wire-visible error payloads; the TCP spelling predates the shared dispatcher
+    assert sim_udp.request_once(0x7F) == (mt.RESP_ERR, b"UNKNOWN_REQ")
+    assert sim_tcp.request_once(0x7F) == (mt.RESP_ERR, b"UKNOWN_REQ")
@@ -0,0 +1,22 @@
+import pytest
+from qaharness.transport import msgtypes as mt
+from qaharness.transport.timing import LatencyBreakdown
+
+
+@pytest.mark.system
+@pytest.mark.parametrize("transport", ["udp", "tcp"])
+def test_injected_delay_shows_up_as_hold(request, sim_api, transport):
+    client = request.getfixturevalue(f"sim_{transport}")
+    sim_api.set_faults(delay_ms=40, drop_rate=0.0, corrupt_rate=0.0)
+
+    resp = client.request_timed(mt.REQ_PING)
+    assert resp.msg_type == mt.RESP_OK
+    b = LatencyBreakdown.of(resp)
+
+    # the delay is spent between dispatch and send on the server, not on the wire
+    assert 35.0 <= b.hold_ms <= b.total_ms
+    assert b.network_ms < 20.0
+    assert sum(b.stages().values()) == pytest.approx(b.total_ms, abs=0.01)
+
+    # untimed requests still get plain v1 responses
+    assert client.request_once(mt.REQ_PING)[0] == mt.RESP_OK
@@ -0,0 +1,88 @@
+import random
+import time
+
+import pytest
+
+from qaharness.stats import (
+    LatencyHistogram,
+    assert_at_least,
+    assert_at_most,
+    bootstrap_ci,
+    compare_ci,
+    compare_rates,
+    wilson_interval,
+)
+from qaharness.stats.inference import FAIL, INCONCLUSIVE, PASS
+
+np = pytest.importorskip("numpy")
+
+
+def test_wilson_matches_reference_values():
+    ci = wilson_interval(50, 100)
+    assert (ci.low, ci.high) == pytest.approx((0.4038, 0.5962), abs=1e-4)
+    # no zero-width interval at the edges
+    assert wilson_interval(10, 10).low == pytest.approx(0.7225, abs=1e-4)
+    assert wilson_interval(0, 10).high == pytest.approx(0.2775, abs=1e-4)
+    with pytest.raises(ValueError):
+        wilson_interval(3, 0)
+
+def test_bootstrap_percentile_is_fast_and_brackets_the_estimate():
+    rng = random.Random(5)
+    samples = [rng.lognormvariate(4.0, 0.3) for _ in range(60)]
+
+    t0 = time.perf_counter()
+    ci = bootstrap_ci(samples, 95, resamples=5000)
+    assert time.perf_counter() - t0 < 0.5
+
+    assert ci.n == 60
+    assert ci.low <= ci.estimate <= ci.high
+    assert ci.estimate == sorted(samples)[56]  # nearest rank: ceil(0.95 * 60) = 57th
+    # same seed -> same decision on a rerun
+    assert bootstrap_ci(samples, 95, resamples=5000) == ci
+
+def test_histogram_bootstrap_agrees_with_raw_samples():
+    rng = random.Random(9)
+    samples = [rng.uniform(50.0, 150.0) for _ in range(200)]
+    h = LatencyHistogram()
+    h.record_many(samples)
+
+    raw = bootstrap_ci(samples, 90)
+    hist = bootstrap_ci(h, 90)
+    assert hist.estimate == h.percentile(90)
+    # different random streams, so only Monte Carlo-close
+    assert (hist.low, hist.high) == pytest.approx((raw.low, raw.high), rel=0.03)
+
+def test_large_inputs_use_order_statistics():
+    values = np.random.default_rng(0).normal(100.0, 10.0, 500_000)
+    t0 = time.perf_counter()
+    ci = bootstrap_ci(values, 50)
+    assert time.perf_counter() - t0 < 2.0
+    assert ci.low < 100.0 < ci.high
+    assert ci.high - ci.low < 0.2
+
+    mean = bootstrap_ci(values, "mean")
+    assert mean.low < values.mean() < mean.high
+
+def test_two_sample_comparisons():
+    rng = np.random.default_rng(1)
+    base = rng.normal(100.0, 5.0, 80)
+    slower = compare_ci(base, rng.normal(112.0, 5.0, 80), 50)
+    assert slower.low > 0
+
+    same = compare_ci(base, rng.normal(100.0, 5.0, 80), 50)
+    assert same.low < 0 < same.high
+
+    worse = compare_rates(95, 100, 70, 100)
+    assert worse.high < 0
+
+def test_assertions_decide_on_the_bound():
+    ci = wilson_interval(45, 50)  # 0.90, CI ~[0.79, 0.96]
+    assert assert_at_least(ci, 0.70) == PASS
+    assert assert_at_least(ci, 0.85) == INCONCLUSIVE
+    with pytest.raises(AssertionError, match="inconclusive"):
+        assert_at_least(ci, 0.85, inconclusive=FAIL)
+    with pytest.raises(AssertionError, match=FAIL):
+        assert_at_least(ci, 0.99)
+    assert ci.verdict_at_most(0.5) == FAIL
+    with pytest.raises(AssertionError, match="p95"):
+        assert_at_most(ci, 0.5, what="p95")
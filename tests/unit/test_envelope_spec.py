@@ -0,0 +1,93 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from qaharness.perf import EnvelopeSpec, load_specs
+from qaharness.transport import msgtypes as mt
+from qaharness.utils.retry import RetryPolicy
+
+SPEC_FILE = Path(__file__).resolve().parents[1] / "system" / "perf_envelopes.json"
+
+
+def _spec(**over):
+    d = {
+        "name": "drop",
+        "env_prefix": "PERF_X",
+        "faults": {"drop_rate": 0.3},
+        "retry": {"attempts": 4},
+        "thresholds": [
+            {"metric": "success_rate", "op": ">=", "value": 0.85, "env": "MIN_SUCCESS_RATE"},
+            {"metric": "latency.p95", "op": "<=", "value": 750, "env": "P95_MAX_MS"},
+        ],
+    }
+    d.update(over)
+    return EnvelopeSpec.from_dict(d)
+
+
+def test_repo_spec_file_parses():
+    specs = load_specs(SPEC_FILE, env={})
+    assert [s.name for s in specs] == [
+        "delay_envelope_udp_ping",
+        "drop_envelope_with_retries_udp_ping",
+        "combined_drop_and_delay_envelope",
+    ]
+    # timed (v2) requests only where asked for; the others keep measuring v1 requests
+    assert [s.breakdown for s in specs] == [False, False, True]
+    combined = specs[2]
+    assert combined.msg_type == mt.REQ_STATUS and combined.expect_type == mt.RESP_STATE
+    assert (combined.faults.drop_rate, combined.faults.delay_ms) == (0.20, 80)
+    assert isinstance(combined.retry.policy(), RetryPolicy)
+    assert combined.retry.policy().retry_exceptions == (TimeoutError,)
+
+
+def test_env_overrides_every_layer():
+    spec = _spec().with_env({
+        "PERF_X_SAMPLES": "400",
+        "PERF_X_MIN_SAMPLES": "40",
+        "PERF_X_DROP_RATE": "0.5",
+        "PERF_X_DELAY_MS": "30",
+        "PERF_X_RETRY_ATTEMPTS": "6",
+        "PERF_X_CONCURRENCY": "8",
+        "PERF_X_MIN_SUCCESS_RATE": "0.7",
+        "OTHER_P95_MAX_MS": "1",
+    })
+    assert (spec.min_samples, spec.max_samples) == (40, 400)
+    assert (spec.faults.drop_rate, spec.faults.delay_ms) == (0.5, 30)
+    assert spec.retry.attempts == 6
+    assert spec.load.concurrency == 8
+    assert [t.value for t in spec.thresholds] == [0.7, 750]
+
+
+def test_sample_budget_below_the_floor_lowers_the_floor():
+    spec = _spec().with_env({"PERF_X_SAMPLES": "10"})
+    assert (spec.min_samples, spec.max_samples) == (10, 10)
+
+
+def test_no_prefix_means_no_overrides():
+    spec = _spec(env_prefix=None)
+    assert spec.with_env({"PERF_X_SAMPLES": "999"}) is spec
+
+
+@pytest.mark.parametrize("over", [
+    {"transport": "sctp"},
+    {"msg": "REQ_NOPE"},
+    {"setup": ["reboot"]},
+    {"thresholds": []},
+    {"thresholds": [{"metric": "latency.p95", "op": "<", "value": 1}]},
+    {"thresholds": [{"metric": "throughput", "op": "<=", "value": 1}]},
+    {"retry": {"retry_on": ["KeyError"]}},
+    {"load": {"concurrency": 0}},
+    {"min_samples": 50, "max_samples": 10},
+])
+def test_invalid_specs_are_rejected(over):
+    with pytest.raises(ValueError):
+        _spec(**over)
+
+
+def test_duplicate_names_rejected(tmp_path):
+    d = {"name": "a", "thresholds": [{"metric": "success_rate", "op": ">=", "value": 0.5}]}
+    path = tmp_path / "envelopes.json"
+    path.write_text(json.dumps({"envelopes": [d, d]}))
+    with pytest.raises(ValueError, match="duplicate"):
+        load_specs(path, env={})
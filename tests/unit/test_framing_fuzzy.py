@@ -131,3 +131,28 @@ def test_bad_version_rejected(msg_type: int, payload: bytes):
 
 
 
+
+
+""" timed frames (v2 trailer) """
+
+def test_timed_frame_roundtrip_and_v1_unchanged():
+    from qaharness.transport.framing import VERSION, VERSION_TIMED, Timestamps, trailer_size
+
+    stamps = Timestamps(recv_ns=1_000_000, dispatch_ns=1_250_000, send_ns=4_250_000)
+    pkt = encode_frame(0x81, b"OK", stamps)
+    assert pkt[2] == VERSION_TIMED
+    assert len(pkt) == len(encode_frame(0x81, b"OK")) + trailer_size(VERSION_TIMED)
+
+    f = decode_frame(pkt)
+    assert (f.msg_type, f.payload, f.timestamps) == (0x81, b"OK", stamps)
+    assert stamps.server_ms == 0.25 and stamps.hold_ms == 3.0
+
+    plain = encode_frame(0x81, b"OK")
+    assert plain[2] == VERSION and trailer_size(VERSION) == 0
+    assert decode_frame(plain).timestamps is None
+
+    # the trailer is covered by the CRC
+    bad = bytearray(pkt)
+    bad[-6] ^= 0x01
+    with pytest.raises(FrameError):
+        decode_frame(bytes(bad))
@@ -0,0 +1,35 @@
+import pytest
+
+from qaharness.transport.framing import Timestamps
+from qaharness.transport.timing import STAGES, LatencyBreakdown, TimedResponse
+
+MS = 1_000_000
+
+
+def _resp(server: Timestamps | None) -> TimedResponse:
+    # client: start 0, on the socket at 1 ms, response at 12 ms;
+    # server clock is unrelated to the client's
+    return TimedResponse(0x81, b"", start_ns=10 * MS, send_ns=11 * MS, recv_ns=22 * MS, server=server)
+
+
+def test_stages_add_up_to_total():
+    server = Timestamps(recv_ns=500 * MS, dispatch_ns=501 * MS, send_ns=509 * MS)
+    b = LatencyBreakdown.of(_resp(server), request_start_ns=4 * MS)
+
+    assert b.stages() == {"setup": 1.0, "network": 2.0, "server": 1.0, "hold": 8.0, "retry": 6.0}
+    assert list(b.stages()) == list(STAGES)
+    assert sum(b.stages().values()) == pytest.approx(b.total_ms) == 18.0
+
+
+def test_retry_defaults_to_zero_and_network_is_clamped():
+    # server residence reported a hair longer than the client round trip
+    server = Timestamps(recv_ns=0, dispatch_ns=1 * MS, send_ns=11 * MS + 5)
+    b = LatencyBreakdown.of(_resp(server))
+    assert b.retry_ms == 0.0
+    assert b.network_ms == 0.0
+    assert b.total_ms == 12.0
+
+
+def test_untimed_response_is_rejected():
+    with pytest.raises(ValueError, match="server timestamps"):
+        LatencyBreakdown.of(_resp(None))
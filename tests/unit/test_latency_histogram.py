@@ -0,0 +1,83 @@
+import random
+
+import pytest
+from hypothesis import given, settings, strategies as st
+
+from qaharness.reporting import SqlStore, SqlStoreConfig
+from qaharness.stats import HistogramError, LatencyHistogram
+
+
+def _exact_percentile(values, p):
+    vals = sorted(values)
+    return vals[max(0, -(-len(vals) * p // 100) - 1)]
+
+@settings(max_examples=50, deadline=None)
+@given(st.lists(st.floats(min_value=0.001, max_value=60_000.0), min_size=1, max_size=300),
+       st.sampled_from([50, 90, 95, 99, 100]))
+def test_percentile_within_precision(values, p):
+    h = LatencyHistogram(max_ms=60_000.0, significant_figures=3)
+    h.record_many(values)
+    # compare in the histogram's own integer-microsecond domain
+    want = _exact_percentile([round(v * 1000.0) / 1000.0 for v in values], p)
+    assert h.percentile(p) == pytest.approx(want, rel=1e-3, abs=0.001)
+
+def test_memory_is_fixed_by_layout_not_samples():
+    h = LatencyHistogram()
+    size = len(h.counts)
+    h.record_many(random.expovariate(1 / 50.0) for _ in range(20_000))
+    assert len(h.counts) == size
+    assert h.count == 20_000
+
+def test_merge_is_exact():
+    rng = random.Random(7)
+    parts = [[rng.uniform(0.1, 500.0) for _ in range(1000)] for _ in range(4)]
+
+    merged = LatencyHistogram()
+    for part in parts:
+        h = LatencyHistogram()
+        h.record_many(part)
+        merged.merge(h)
+
+    whole = LatencyHistogram()
+    whole.record_many(v for part in parts for v in part)
+    assert merged == whole
+    assert merged.percentile(99) == whole.percentile(99)
+
+def test_merge_rejects_different_layout():
+    with pytest.raises(HistogramError):
+        LatencyHistogram(significant_figures=2).merge(LatencyHistogram(significant_figures=3))
+
+def test_serialization_roundtrip_is_compact():
+    h = LatencyHistogram()
+    h.record_many(random.uniform(1.0, 200.0) for _ in range(50_000))
+    blob = h.to_bytes()
+    assert len(blob) < 64 * 1024
+    back = LatencyHistogram.from_bytes(blob)
+    assert back == h
+    assert back.summary() == h.summary()
+
+def test_values_above_range_saturate():
+    h = LatencyHistogram(max_ms=100.0)
+    h.record(250.0)
+    assert h.saturated == 1
+    assert h.max == 100.0
+
+def test_histogram_column_merges_across_runs(tmp_path):
+    store = SqlStore(SqlStoreConfig(db_path=tmp_path / "results.db", async_writes=True))
+    for run_id, lo in (("run-a", 1.0), ("run-b", 100.0)):
+        store.start_run(
+            run_id=run_id, started_at="2026-01-01T00:00:00+00:00", git_sha=None,
+            branch=None, ci_job=None, os_name="test", python_version="3.x",
+        )
+        h = LatencyHistogram()
+        h.record_many([lo, lo * 2])
+        store.record_histogram(run_id=run_id, nodeid="t::a", name="latency_ms", hist=h)
+        # later recording must not leak into the queued row
+        h.record(9999.0)
+
+    one = store.load_histogram(nodeid="t::a", name="latency_ms", run_ids=["run-a"])
+    assert (one.count, one.max) == (2, 2.0)
+    both = store.load_histogram(nodeid="t::a", name="latency_ms")
+    assert (both.count, both.min, both.max) == (4, 1.0, 200.0)
+    assert store.load_histogram(nodeid="t::b", name="latency_ms") is None
+    store.close()
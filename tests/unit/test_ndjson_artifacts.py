@@ -0,0 +1,66 @@
+from qaharness.reporting.ndjson import (
+    NdjsonWriter,
+    append_ndjson,
+    iter_ndjson,
+    read_metrics_artifact,
+    summarize_session,
+)
+
+
+def test_records_hit_disk_before_close(tmp_path):
+    path = tmp_path / "s.ndjson"
+    w = NdjsonWriter(path, flush_every=2, flush_interval_s=60)
+    w.write({"i": 1})
+    w.write({"i": 2})
+    # flushed after the 2nd record even though the writer is still open
+    assert [r["i"] for r in iter_ndjson(path)] == [1, 2]
+    w.close()
+
+def test_torn_tail_from_a_crash_is_skipped(tmp_path):
+    path = tmp_path / "s.ndjson"
+    with NdjsonWriter(path) as w:
+        w.write({"kind": "session_start", "run_id": "r"})
+        w.write({"kind": "test", "nodeid": "t::a", "outcome": "passed", "duration_s": 0.5})
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"kind": "test", "nodeid": "t::b", "outc')
+
+    summary = summarize_session(path)
+    assert summary["complete"] is False
+    assert summary["run_id"] == "r"
+    assert summary["tests_total"] == 1
+
+    merged = tmp_path / "merged.ndjson"
+    with NdjsonWriter(merged) as w:
+        assert append_ndjson(path, w) == 2
+
+def test_summary_is_built_in_one_pass(tmp_path):
+    path = tmp_path / "s.ndjson"
+    with NdjsonWriter(path) as w:
+        w.write({"kind": "session_start", "run_id": "r", "started_at": "t0"})
+        for i in range(1000):
+            outcome = "failed" if i % 100 == 0 else "passed"
+            w.write({"kind": "test", "nodeid": f"t::{i}", "outcome": outcome, "duration_s": i / 1000, "worker": f"gw{i % 4}"})
+        w.write({"kind": "session_end", "finished_at": "t1", "exitstatus": 1})
+
+    s = summarize_session(path, slowest=3, max_failures=5)
+    assert s["complete"] is True
+    assert s["exitstatus"] == 1
+    assert s["outcomes"] == {"failed": 10, "passed": 990}
+    assert len(s["failed"]) == 5
+    assert [t["nodeid"] for t in s["slowest"]] == ["t::999", "t::998", "t::997"]
+    assert s["workers"] == ["gw0", "gw1", "gw2", "gw3"]
+
+def test_metrics_artifact_reader(tmp_path):
+    path = tmp_path / "t.ndjson"
+    with NdjsonWriter(path, flush_every=1) as w:
+        w.write({"kind": "test_start", "test_id": "t::a", "timestamp_epoch": 1.0})
+        w.write({"kind": "record", "payload": {"name": "x", "latency_ms": {"p95": 3.0}}})
+        w.write({"kind": "test_end", "duration_s": 0.25})
+
+    doc = read_metrics_artifact(path)
+    assert doc == {
+        "test_id": "t::a",
+        "timestamp_epoch": 1.0,
+        "duration_s": 0.25,
+        "records": [{"name": "x", "latency_ms": {"p95": 3.0}}],
+    }
@@ -0,0 +1,122 @@
+import asyncio
+import errno
+import socket
+import threading
+import time
+
+import pytest
+
+from qaharness.load import LoadConfig, parse_msg_type, run_load, run_load_multiprocess, store_report
+from qaharness.reporting import SqlStore, SqlStoreConfig
+from qaharness.transport import msgtypes as mt
+from qaharness.transport.framing import decode_frame, encode_frame
+
+
+class _SerialUdpServer:
+    """
+    answers one datagram at a time after a fixed service time -- a server
+    that can't keep up with the offered rate
+    """
+    def __init__(self, service_s: float):
+        self.service_s = service_s
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.1)
+        self.addr = self.sock.getsockname()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                data, peer = self.sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            time.sleep(self.service_s)
+            req = decode_frame(data)
+            self.sock.sendto(encode_frame(mt.RESP_OK, req.payload), peer)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.sock.close()
+
+
+def test_parse_msg_type():
+    assert parse_msg_type("REQ_STATUS") == ("REQ_STATUS", mt.REQ_STATUS)
+    assert parse_msg_type("ping") == ("REQ_PING", mt.REQ_PING)
+    assert parse_msg_type(mt.REQ_STOP) == ("REQ_STOP", mt.REQ_STOP)
+    with pytest.raises(ValueError):
+        parse_msg_type("RESP_OK")
+    with pytest.raises(ValueError):
+        LoadConfig(transport="udp", addr=("127.0.0.1", 1), rate=0)
+
+
+def test_latency_counts_queueing_from_intended_send_time():
+    # 50 req/s offered, one-at-a-time client: each request waits for the previous one
+    with _SerialUdpServer(service_s=0.04) as srv:
+        report = run_load(LoadConfig(
+            transport="udp", addr=srv.addr, rate=50, duration_s=1.0, timeout_s=1.0, max_in_flight=1,
+        ))
+
+    assert report.sent == report.ok == 50
+    assert report.error_count == 0
+    # service time alone looks healthy ...
+    assert report.service.percentile(50) < 80
+    # ... but the backlog grows by ~20 ms per request: the last ones are ~1 s late
+    assert report.latency.percentile(99) > 500
+    assert report.latency.max > report.service.max * 5
+
+
+def test_timeouts_are_errors_not_latency(tmp_path):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    try:
+        report = run_load(LoadConfig(
+            transport="udp", addr=sock.getsockname(), rate=100, duration_s=0.2, timeout_s=0.05,
+        ))
+    finally:
+        sock.close()
+    assert report.sent == 20
+    assert report.ok == 0
+    assert report.errors == {"timeout": 20}
+    assert report.latency.count == 0
+
+    store = SqlStore(SqlStoreConfig(db_path=tmp_path / "results.db"))
+    try:
+        run_id = store_report(store, report)
+        rows = store.run_rollups(run_id, "results.success_rate")
+        assert [(r["nodeid"], r["value"]) for r in rows] == [("load::udp:REQ_PING@100/s", 0.0)]
+        assert store.run_rollups(run_id, "load.errors.timeout")[0]["value"] == 20
+    finally:
+        store.close()
+
+
+def test_socket_creation_failure_is_an_error_not_an_abort(monkeypatch):
+    async def _no_fds(self, *args, **kwargs):
+        raise OSError(errno.EMFILE, "Too many open files")
+
+    monkeypatch.setattr(asyncio.BaseEventLoop, "create_datagram_endpoint", _no_fds)
+    report = run_load(LoadConfig(transport="udp", addr=("127.0.0.1", 9), rate=100, duration_s=0.1))
+
+    assert report.sent == 10
+    assert report.ok == 0
+    assert report.errors == {"timeout": 10}
+
+
+def test_multiprocess_shards_merge_into_one_schedule():
+    with _SerialUdpServer(service_s=0.0) as srv:
+        cfg = LoadConfig(transport="udp", addr=srv.addr, rate=200, duration_s=0.5, timeout_s=1.0)
+        snapshots = []
+        report = run_load_multiprocess(cfg, workers=2, progress_interval_s=0.1, on_progress=snapshots.append)
+
+    assert report.workers == 2
+    assert report.scheduled == report.sent == report.ok == 100
+    assert report.latency.count == report.service.count == 100
+    assert snapshots and snapshots[-1].ok == 100
+    # the two shards interleave on one clock instead of each taking the full duration twice
+    assert report.elapsed_s < 1.5
@@ -0,0 +1,72 @@
+import pytest
+
+from qaharness.reporting import SqlStore, SqlStoreConfig
+from qaharness.reporting.samples import encode_samples
+
+np = pytest.importorskip("numpy")
+
+
+def _start(store: SqlStore, run_id: str, started_at: str) -> None:
+    store.start_run(
+        run_id=run_id,
+        started_at=started_at,
+        git_sha=None,
+        branch=None,
+        ci_job=None,
+        os_name="test",
+        python_version="3.x",
+    )
+
+def test_encoding_is_eight_bytes_per_sample():
+    count, blob = encode_samples(range(1000))
+    assert count == 1000
+    assert len(blob) == 8000
+    assert encode_samples(np.arange(1000, dtype=np.int32))[1] == blob
+
+@pytest.mark.parametrize("async_writes", [False, True])
+def test_samples_roundtrip_as_numpy(tmp_path, async_writes):
+    store = SqlStore(SqlStoreConfig(db_path=tmp_path / "results.db", async_writes=async_writes))
+    _start(store, "run-1", "2026-01-01T00:00:00+00:00")
+
+    lat = [1.5, 2.25, 130.0]
+    store.record_samples(run_id="run-1", nodeid="t::a", series="latency_ms", values=lat, unit="ms")
+    # a second chunk for the same series is appended
+    store.record_samples(run_id="run-1", nodeid="t::a", series="latency_ms", values=np.array([7.0]))
+    store.record_samples(run_id="run-1", nodeid="t::a", series="retries_per_request", values=[0, 2, 1])
+
+    got = store.load_samples(run_id="run-1", nodeid="t::a", series="latency_ms")
+    assert got.dtype == np.float64
+    np.testing.assert_array_equal(got, [1.5, 2.25, 130.0, 7.0])
+    np.testing.assert_array_equal(
+        store.load_samples(run_id="run-1", nodeid="t::a", series="retries_per_request"), [0, 2, 1]
+    )
+    assert store.load_samples(run_id="run-1", nodeid="t::b", series="latency_ms").size == 0
+    store.close()
+
+def test_sample_history_is_ordered_by_run_start(tmp_path):
+    store = SqlStore(SqlStoreConfig(db_path=tmp_path / "results.db"))
+    _start(store, "late", "2026-01-02T00:00:00+00:00")
+    _start(store, "early", "2026-01-01T00:00:00+00:00")
+    store.record_samples(run_id="late", nodeid="t::a", series="latency_ms", values=[2.0])
+    store.record_samples(run_id="early", nodeid="t::a", series="latency_ms", values=[1.0])
+
+    hist = store.load_sample_history(nodeid="t::a", series="latency_ms")
+    assert list(hist) == ["early", "late"]
+    assert hist["late"].tolist() == [2.0]
+    store.close()
+
+def test_breakdown_series_load_aligned(tmp_path):
+    store = SqlStore(SqlStoreConfig(db_path=tmp_path / "results.db"))
+    _start(store, "run-1", "2026-01-01T00:00:00+00:00")
+    store.record_samples(run_id="run-1", nodeid="t::a", series="latency_ms", values=[9.0, 4.0])
+    store.record_samples(run_id="run-1", nodeid="t::a", series="breakdown.hold_ms", values=[8.0, 3.0])
+    store.record_samples(run_id="run-1", nodeid="t::a", series="breakdown.network_ms", values=[1.0, 1.0])
+
+    got = store.load_breakdown(run_id="run-1", nodeid="t::a")
+    assert list(got) == ["breakdown.hold_ms", "breakdown.network_ms"]
+    assert got["breakdown.hold_ms"].tolist() == [8.0, 3.0]
+
+    store.record_samples(run_id="run-1", nodeid="t::a", series="breakdown.hold_ms", values=[5.0])
+    with pytest.raises(ValueError, match="not aligned"):
+        store.load_breakdown(run_id="run-1", nodeid="t::a")
+    store.close()
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from qaharness.cli import main
+from qaharness.reporting import SqlStore, SqlStoreConfig
+from qaharness.reporting.trends import detect_regressions, robust_baseline, rolling_baseline
+
+NODE = "tests/system/test_x.py::test_env"
+
+
+def _run(store: SqlStore, i: int, p95: float, success_rate: float) -> str:
+    run_id = f"run-{i:02d}"
+    store.start_run(
+        run_id=run_id,
+        started_at=f"2026-01-{i + 1:02d}T00:00:00+00:00",
+        git_sha=None,
+        branch=None,
+        ci_job=None,
+        os_name="test",
+        python_version="3.x",
+    )
+    store.record_metric(run_id=run_id, nodeid=NODE, metric_name="latency.p95", metric_value=p95, unit="ms")
+    store.record_metric(run_id=run_id, nodeid=NODE, metric_name="results.success_rate", metric_value=success_rate)
+    store.finish_run(run_id=run_id, finished_at=f"2026-01-{i + 1:02d}T00:01:00+00:00", exit_status=0)
+    return run_id
+
+@pytest.fixture
+def history(tmp_path):
+    db = tmp_path / "results.db"
+    store = SqlStore(SqlStoreConfig(db_path=db))
+    for i, p95 in enumerate([100, 102, 98, 101, 99, 103, 100, 97]):
+        _run(store, i, p95, 0.95)
+    yield store, db
+    store.close()
+
+def test_rollups_answer_series_queries(history):
+    store, _ = history
+    series = store.metric_series("latency.p95", last=3)
+    assert [p["run_id"] for p in series[NODE]] == ["run-05", "run-06", "run-07"]
+    assert series[NODE][-1]["value"] == 97
+
+def test_baseline_is_median_and_mad():
+    b = robust_baseline([1, 2, 3, 4, 100])
+    assert (b.median, b.mad, b.n) == (3, 1, 5)
+    assert rolling_baseline([5.0, 7.0, 9.0], window=2)[0] is None
+    assert rolling_baseline([5.0, 7.0, 9.0], window=2)[2].median == 6.0
+
+def test_stable_run_is_not_flagged(history):
+    store, _ = history
+    run_id = _run(store, 8, 101, 0.96)
+    assert detect_regressions(store, run_id) == []
+
+def test_drift_in_the_worse_direction_is_flagged(history):
+    store, _ = history
+    run_id = _run(store, 8, 140, 0.80)
+    flags = {f.metric_name: f for f in detect_regressions(store, run_id)}
+    assert set(flags) == {"latency.p95", "results.success_rate"}
+    assert flags["latency.p95"].baseline.median == 100
+    assert flags["results.success_rate"].direction == -1
+
+def test_improvement_is_not_flagged(history):
+    store, _ = history
+    run_id = _run(store, 8, 60, 1.0)
+    assert detect_regressions(store, run_id) == []
+
+def test_short_history_is_skipped(history):
+    store, _ = history
+    run_id = _run(store, 8, 140, 0.95)
+    assert detect_regressions(store, run_id, min_history=20) == []
+
+def test_regress_cli_exit_code(history, capsys):
+    store, db = history
+    _run(store, 8, 140, 0.95)
+    store.close()
+
+    assert main(["regress", "--db", str(db)]) == 1
+    out = json.loads(capsys.readouterr().out)
+    assert out["run_id"] == "run-08"
+    assert [f["metric_name"] for f in out["regressions"]] == ["latency.p95"]
+
+    assert main(["trend", "latency.p95", "--db", str(db), "--window", "4"]) == 0
+    points = json.loads(capsys.readouterr().out)["series"][NODE]
+    assert len(points) == 9
+    assert points[-1]["baseline_median"] == 99.5  # median of 99, 103, 100, 97
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import pytest
+
+from qaharness.utils import profiling
+
+
+@profiling.hook("t.inner")
+def _inner(n):
+    return sum(range(n))
+
+@profiling.hook("t.outer")
+def _outer(n):
+    return _inner(n) + 1
+
+@profiling.hook("t.spin")
+def _spin(seconds):
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        pass
+
+@profiling.hook("t.handler")
+async def _handler():
+    await asyncio.sleep(0.005)
+    return _inner(10)
+
+async def _busy_neighbour():
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < 0.02:
+        _neighbour_work()
+        await asyncio.sleep(0)
+
+def _neighbour_work():
+    return sum(range(100))
+
+@pytest.fixture(autouse=True)
+def _profiling_off():
+    # a QA_PROFILE run already has a session open around every test
+    if profiling.active() is not None:
+        pytest.skip("profiling already active for this test")
+    yield
+    profiling.stop()
+
+
+def test_hooks_are_transparent_when_off():
+    assert profiling.active() is None
+    assert _outer(10) == 46
+    assert _outer.__name__ == "_outer"
+    assert profiling.stop() is None
+
+def test_deterministic_profile_nests_under_outermost_hook(tmp_path):
+    p = profiling.start("deterministic")
+    assert _outer(1000) == 499501
+    _inner(10)
+    with pytest.raises(RuntimeError, match="already active"):
+        profiling.start()
+    summary = profiling.stop(tmp_path / "p.folded")
+
+    stacks = p.stacks()
+    assert summary["calls"] == {"t.outer": 1, "t.inner": 1}
+    assert any(s.startswith("t.outer;_outer (") and ";_inner (" in s and s.endswith("builtins.sum (builtin)") for s in stacks)
+    assert any(s.startswith("t.inner;_inner (") for s in stacks)
+    # wrapper frames never appear
+    assert not any("wrapper" in s for s in stacks)
+
+    lines = (tmp_path / "p.folded").read_text().splitlines()
+    assert len(lines) == summary["stacks"]
+    stack, value = lines[0].rsplit(" ", 1)
+    assert stacks[stack] == int(value)
+
+def test_coroutine_hook_profiles_only_its_own_steps():
+    async def main():
+        return await asyncio.gather(_handler(), _busy_neighbour())
+
+    p = profiling.start("deterministic")
+    assert asyncio.run(main())[0] == 45
+    profiling.stop()
+
+    stacks = p.stacks()
+    assert p.calls() == {"t.handler": 1}
+    assert any("_handler (" in s and ";_inner (" in s for s in stacks)
+    assert not any("_neighbour_work" in s for s in stacks)
+
+def test_sampling_profile_attributes_samples_to_hook():
+    p = profiling.start("sample", interval_s=0.001)
+    _spin(0.1)
+    summary = profiling.stop()
+
+    assert summary["unit"] == "samples"
+    assert summary["total"] >= 5
+    assert all(s.startswith("t.spin;_spin (") for s in p.stacks())
+
+def test_invalid_mode_is_rejected():
+    with pytest.raises(ValueError, match="mode"):
+        profiling.start("tracing")
+    assert profiling.active() is None
@@ -0,0 +1,157 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+from qaharness.reporting import RetentionPolicy, ShardedResults, SqlStore, SqlStoreConfig
+from qaharness.reporting.sql_store import shard_path
+from qaharness.stats.histogram import LatencyHistogram
+
+NODE = "t::a"
+NOW = datetime(2026, 3, 31, 12, 0, tzinfo=timezone.utc)
+
+
+def _run(store: SqlStore, run_id: str, started_at: str, p95: float) -> None:
+    store.start_run(
+        run_id=run_id, started_at=started_at, git_sha=None, branch=None,
+        ci_job=None, os_name="test", python_version="3.x",
+    )
+    store.record_metric(run_id=run_id, nodeid=NODE, metric_name="latency.p95", metric_value=p95, unit="ms")
+    store.record_retry_event(
+        run_id=run_id, nodeid=NODE, request_name="REQ_PING",
+        attempt_number=1, sleep_s=0.02, exception_type="TimeoutError",
+    )
+    store.record_samples(run_id=run_id, nodeid=NODE, series="latency_ms", values=[p95] * 100)
+    hist = LatencyHistogram()
+    hist.record(p95)
+    store.record_histogram(run_id=run_id, nodeid=NODE, name="latency_ms", hist=hist)
+    store.finish_run(run_id=run_id, finished_at=started_at, exit_status=0)
+
+def _rows(db, sql):
+    conn = sqlite3.connect(str(db))
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+def test_retention_downsamples_then_drops_raw_rows(tmp_path):
+    db = tmp_path / "results.db"
+    store = SqlStore(SqlStoreConfig(db_path=db))
+    _run(store, "old-1", "2026-01-10T01:00:00+00:00", 100.0)
+    _run(store, "old-2", "2026-01-10T05:00:00+00:00", 120.0)
+    _run(store, "new", "2026-03-30T01:00:00+00:00", 90.0)
+
+    out = store.apply_retention(RetentionPolicy(raw_days=30), now=NOW)
+    assert out["expired_runs"] == 2
+    assert out["perf_metrics_deleted"] == 2
+    assert out["perf_histograms_deleted"] == 2
+    assert out["freed_pages"] is not None
+
+    # a second pass has nothing left to do
+    assert store.apply_retention(RetentionPolicy(raw_days=30), now=NOW)["expired_runs"] == 0
+    store.close()
+
+    assert _rows(db, "SELECT DISTINCT run_id FROM perf_metrics") == [("new",)]
+    assert _rows(db, "SELECT DISTINCT run_id FROM perf_samples") == [("new",)]
+    assert _rows(db, "SELECT DISTINCT run_id FROM perf_histograms") == [("new",)]
+    assert _rows(db, "SELECT run_id, events FROM retry_event_rollups ORDER BY run_id") == [("old-1", 1), ("old-2", 1)]
+    assert _rows(db, "SELECT day, runs, value_mean, value_max FROM perf_metric_daily") == [
+        ("2026-01-10", 2, 110.0, 120.0),
+    ]
+    # per-run rollups survive, so trend queries still see the old runs
+    assert len(_rows(db, "SELECT * FROM perf_metric_rollups")) == 3
+
+def test_run_rollups_can_age_out_to_daily(tmp_path):
+    db = tmp_path / "results.db"
+    store = SqlStore(SqlStoreConfig(db_path=db))
+    _run(store, "old", "2025-06-01T00:00:00+00:00", 100.0)
+    store.apply_retention(RetentionPolicy(raw_days=30, run_rollup_days=90), now=NOW)
+    store.close()
+
+    assert _rows(db, "SELECT * FROM perf_metric_rollups") == []
+    assert _rows(db, "SELECT day, runs FROM perf_metric_daily") == [("2025-06-01", 1)]
+
+def test_monthly_shards_are_queried_as_one(tmp_path):
+    base = tmp_path / "results.db"
+    for month, p95s in ((1, [100, 101, 99]), (2, [100, 102, 98])):
+        path = shard_path(base, datetime(2026, month, 1, tzinfo=timezone.utc))
+        store = SqlStore(SqlStoreConfig(db_path=path))
+        for day, p95 in enumerate(p95s, start=1):
+            _run(store, f"m{month}-{day}", f"2026-{month:02d}-{day:02d}T00:00:00+00:00", p95)
+        store.close()
+
+    with ShardedResults(base) as results:
+        assert [p.name for p in results.paths] == ["results-2026-01.db", "results-2026-02.db"]
+        assert results.latest_run_id() == "m2-3"
+        series = results.metric_series("latency.p95", last=4)[NODE]
+        assert [p["run_id"] for p in series] == ["m1-3", "m2-1", "m2-2", "m2-3"]
+        assert results.run_rollups("m1-2", "latency.p95")[0]["value"] == 101
+        # the read path never writes to a shard
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            results._stores[0].record_metric(run_id="m1-1", nodeid=NODE, metric_name="x", metric_value=1.0)
+
+# results.db as written before tag sets, rollups, samples and histograms existed
+_BASELINE_DDL = """
+CREATE TABLE test_runs (
+    run_id TEXT PRIMARY KEY, started_at TEXT NOT NULL, finished_at TEXT, git_sha TEXT,
+    branch TEXT, ci_job TEXT, os_name TEXT, python_version TEXT, exit_status INTEGER
+);
+CREATE TABLE test_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, nodeid TEXT NOT NULL,
+    outcome TEXT NOT NULL, duration_s REAL, error_type TEXT, error_message TEXT,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE perf_metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, nodeid TEXT NOT NULL,
+    metric_name TEXT NOT NULL, metric_value REAL, unit TEXT, tags_JSON TEXT,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE retry_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, nodeid TEXT NOT NULL,
+    equest_name TEXT, attempt_number INTEGER, sleep_s REAL, exception_type TEXT,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO test_runs (run_id, started_at, finished_at) VALUES
+    ('old-1', '2026-01-01T00:00:00+00:00', '2026-01-01T00:01:00+00:00'),
+    ('old-2', '2026-01-02T00:00:00+00:00', '2026-01-02T00:01:00+00:00');
+INSERT INTO perf_metrics (run_id, nodeid, metric_name, metric_value, unit) VALUES
+    ('old-1', 't::a', 'latency.p95', 100, 'ms'),
+    ('old-2', 't::a', 'latency.p95', 110, 'ms');
+"""
+
+
+def _baseline_db(path):
+    conn = sqlite3.connect(str(path))
+    conn.executescript(_BASELINE_DDL)
+    conn.close()
+    return path
+
+
+def test_shards_from_older_versions_are_migrated_before_reading(tmp_path):
+    base = _baseline_db(tmp_path / "results.db")
+    with ShardedResults(base) as results:
+        assert [p["value"] for p in results.metric_series("latency.p95")[NODE]] == [100, 110]
+        assert results.run_rollups("old-2", "latency.p95")[0]["value"] == 110
+        assert results.load_histogram(nodeid=NODE, name="latency_ms") is None
+    assert _rows(base, "SELECT COUNT(*) FROM perf_metric_rollups") == [(2,)]
+
+
+def test_read_only_store_computes_rollups_it_cannot_migrate(tmp_path):
+    base = _baseline_db(tmp_path / "results.db")
+    store = SqlStore(SqlStoreConfig(db_path=base, read_only=True))
+    try:
+        assert [p["value"] for p in store.metric_series("latency.p95", last=1)[NODE]] == [110]
+        assert store.run_rollups("old-1", "latency.p95")[0]["n"] == 1
+        assert store.load_histogram(nodeid=NODE, name="latency_ms") is None
+    finally:
+        store.close()
+    # still the old schema: nothing was written
+    assert "perf_metric_rollups" not in {r[0] for r in _rows(base, "SELECT name FROM sqlite_master")}
+
+
+def test_shard_by_month_writes_to_current_month_file(tmp_path):
+    store = SqlStore(SqlStoreConfig(db_path=tmp_path / "results.db", shard_by_month=True))
+    store.close()
+    assert store.db_path == shard_path(tmp_path / "results.db")
+    assert store.db_path.exists()
+    assert not (tmp_path / "results.db").exists()
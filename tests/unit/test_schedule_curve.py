@@ -0,0 +1,45 @@
+import pytest
+
+from services.device_sim.app.core.schedule import Schedule, ScheduleStep
+
+BASE = {"delay_ms": 0, "drop_rate": 0.0, "corrupt_rate": 0.0}
+
+
+def test_step_and_ramp_curve():
+    sched = Schedule(steps=(
+        ScheduleStep(at_ms=100, ramp_ms=200, faults={"drop_rate": 0.4}),
+        ScheduleStep(at_ms=500, faults={"delay_ms": 150}),
+        ScheduleStep(at_ms=800, ramp_ms=100, faults={"drop_rate": 0.0}),
+    ))
+
+    assert sched.length_ms == 900
+    assert sched.faults_at(50, BASE) == BASE
+    assert sched.faults_at(200, BASE)["drop_rate"] == pytest.approx(0.2)
+    assert sched.faults_at(300, BASE)["drop_rate"] == pytest.approx(0.4)
+    assert sched.faults_at(499, BASE)["delay_ms"] == 0
+    assert sched.faults_at(500, BASE)["delay_ms"] == 150
+    # recovery ramp starts from the plateau
+    assert sched.faults_at(850, BASE)["drop_rate"] == pytest.approx(0.2)
+    assert sched.faults_at(900, BASE) == {"delay_ms": 150, "drop_rate": 0.0, "corrupt_rate": 0.0}
+
+def test_steps_sorted_and_ramp_detection():
+    sched = Schedule(steps=(
+        ScheduleStep(at_ms=300, faults={"corrupt_rate": 1.0}),
+        ScheduleStep(at_ms=0, ramp_ms=100, faults={"drop_rate": 1.0}),
+    ), duration_ms=1000, loop=True)
+
+    assert [s.at_ms for s in sched.steps] == [0, 300]
+    assert sched.ramp_active(50)
+    assert not sched.ramp_active(150)
+    assert sched.next_step_at(150) == 300
+    assert sched.next_step_at(300) is None
+
+@pytest.mark.parametrize("kwargs", [
+    {"at_ms": 0, "faults": {"bogus": 1.0}},
+    {"at_ms": 0, "action": "explode"},
+    {"at_ms": 0, "ramp_ms": 10},
+    {"at_ms": -1},
+])
+def test_invalid_steps_rejected(kwargs):
+    with pytest.raises(ValueError):
+        ScheduleStep(**kwargs)
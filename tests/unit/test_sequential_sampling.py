@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from qaharness.stats import bootstrap_ci, wilson_interval
+from qaharness.stats.inference import FAIL, INCONCLUSIVE, PASS
+from qaharness.stats.sequential import Check, run_sequential, sample_schedule
+
+
+class _Coin:
+    def __init__(self, p, seed=0):
+        self.p = p
+        self.rng = random.Random(seed)
+        self.n = 0
+        self.hits = 0
+
+    def sample(self, k):
+        for _ in range(k):
+            self.n += 1
+            self.hits += self.rng.random() < self.p
+
+    def check(self, limit):
+        return Check("rate", lambda c: wilson_interval(self.hits, self.n, confidence=c), limit, at_most=False)
+
+
+def test_schedule_grows_geometrically_to_the_budget():
+    assert sample_schedule(20, 320) == [20, 40, 80, 160, 320]
+    assert sample_schedule(20, 100) == [20, 40, 80, 100]
+    assert sample_schedule(5, 5) == [5]
+    with pytest.raises(ValueError):
+        sample_schedule(10, 5)
+
+def test_clear_pass_stops_at_first_look():
+    coin = _Coin(1.0)
+    res = run_sequential(coin.sample, [coin.check(0.5)], min_samples=20, max_samples=320)
+    assert res.samples == coin.n == 20
+    assert res.verdicts == {"rate": PASS}
+    res.assert_ok(inconclusive=FAIL)
+
+def test_borderline_case_gets_more_samples():
+    coin = _Coin(0.9, seed=4)
+    res = run_sequential(coin.sample, [coin.check(0.85)], min_samples=20, max_samples=320)
+    assert res.samples > 20
+    assert res.looks == len([s for s in sample_schedule(20, 320) if s <= res.samples])
+
+def test_clear_fail_stops_early_and_asserts():
+    coin = _Coin(0.2, seed=1)
+    res = run_sequential(coin.sample, [coin.check(0.9)], min_samples=20, max_samples=320)
+    assert res.samples == 20
+    assert res.failed
+    with pytest.raises(AssertionError, match="rate after 20 samples fail"):
+        res.assert_ok()
+
+def test_budget_exhausted_is_inconclusive_and_policy_decides():
+    rng = random.Random(2)
+    values = []
+    check = Check("p50", lambda c: bootstrap_ci(values, 50, confidence=c) if values else None, 100.0)
+    res = run_sequential(
+        lambda k: values.extend(rng.gauss(100.0, 10.0) for _ in range(k)),
+        [check], min_samples=10, max_samples=40,
+    )
+    assert res.samples == 40
+    assert res.verdicts == {"p50": INCONCLUSIVE}
+    assert res.look_confidence == pytest.approx(1 - 0.05 / 3)
+    res.assert_ok()
+    with pytest.raises(AssertionError):
+        res.assert_ok(inconclusive=FAIL)
@@ -0,0 +1,107 @@
+import sqlite3
+
+import pytest
+
+from qaharness.reporting import SqlStore, SqlStoreConfig
+
+
+def _start(store: SqlStore, run_id: str = "run-1") -> None:
+    store.start_run(
+        run_id=run_id,
+        started_at="2026-01-01T00:00:00+00:00",
+        git_sha=None,
+        branch=None,
+        ci_job=None,
+        os_name="test",
+        python_version="3.x",
+    )
+
+def _count(db_path, table: str) -> int:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+@pytest.mark.parametrize("async_writes", [False, True])
+def test_rows_land_in_both_modes(tmp_path, async_writes):
+    db = tmp_path / "results.db"
+    store = SqlStore(SqlStoreConfig(db_path=db, async_writes=async_writes, batch_rows=7))
+    _start(store)
+
+    for i in range(100):
+        store.record_metric(run_id="run-1", nodeid="t::a", metric_name="latency.p95", metric_value=i, unit="ms")
+    store.record_test_result(run_id="run-1", nodeid="t::a", outcome="passed", duration_s=0.1)
+    store.record_retry_event(
+        run_id="run-1", nodeid="t::a", request_name="REQ_PING",
+        attempt_number=1, sleep_s=0.02, exception_type="TimeoutError",
+    )
+    store.finish_run(run_id="run-1", finished_at="2026-01-01T00:00:01+00:00", exit_status=0)
+    store.close()
+
+    assert _count(db, "perf_metrics") == 100
+    assert _count(db, "test_results") == 1
+    assert _count(db, "retry_events") == 1
+    assert store.dropped_rows == 0
+
+def test_flush_makes_rows_visible_and_backpressure_bounds_queue(tmp_path):
+    db = tmp_path / "results.db"
+    # tiny queue + long interval: producers must block rather than grow memory
+    store = SqlStore(SqlStoreConfig(db_path=db, async_writes=True, queue_max=4, batch_rows=1000, flush_interval_ms=60_000))
+    _start(store)
+
+    for i in range(50):
+        store.record_metric(run_id="run-1", nodeid="t::b", metric_name="m", metric_value=i)
+    store.flush()
+    assert _count(db, "perf_metrics") == 50
+    store.close()
+
+def test_bad_row_does_not_sink_the_batch(tmp_path):
+    db = tmp_path / "results.db"
+    store = SqlStore(SqlStoreConfig(db_path=db, async_writes=True))
+    _start(store)
+
+    store.record_metric(run_id="run-1", nodeid="t::c", metric_name="ok1", metric_value=1)
+    # unknown run_id violates the foreign key
+    store.record_metric(run_id="missing", nodeid="t::c", metric_name="bad", metric_value=2)
+    store.record_metric(run_id="run-1", nodeid="t::c", metric_name="ok2", metric_value=3)
+    store.close()
+
+    assert _count(db, "perf_metrics") == 2
+    assert store.dropped_rows == 1
+
+def test_unexpected_error_does_not_stop_the_writer(tmp_path):
+    db = tmp_path / "results.db"
+    store = SqlStore(SqlStoreConfig(db_path=db, async_writes=True, batch_rows=1))
+    _start(store)
+
+    real = store._write_batch
+    calls = {"n": 0}
+    def flaky(pending):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise TypeError("unsupported tag value")
+        real(pending)
+    store._write_batch = flaky
+
+    store.record_metric(run_id="run-1", nodeid="t::d", metric_name="lost", metric_value=1)
+    store.record_metric(run_id="run-1", nodeid="t::d", metric_name="kept", metric_value=2)
+    store.flush()
+    store.close()
+
+    assert _count(db, "perf_metrics") == 1
+    assert store.dropped_rows == 1
+
+def test_flush_raises_instead_of_hanging_when_writer_is_gone(tmp_path):
+    store = SqlStore(SqlStoreConfig(db_path=tmp_path / "results.db", async_writes=True))
+    _start(store)
+    # a malformed queue item fails outside the per-batch guard and ends run()
+    store._writer.queue.put(("not a (sql, params) pair",))
+    store._writer.join(timeout=5)
+    assert not store._writer.is_alive()
+
+    with pytest.raises(RuntimeError, match="writer thread is not running"):
+        store.flush()
+    with pytest.raises(RuntimeError, match="writer thread is not running"):
+        store.record_metric(run_id="run-1", nodeid="t::d", metric_name="m", metric_value=1)
+    store.close()
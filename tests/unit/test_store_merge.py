@@ -0,0 +1,60 @@
+import sqlite3
+
+from qaharness.reporting import SqlStore, SqlStoreConfig
+from qaharness.stats import LatencyHistogram
+
+RUN = "run-1"
+
+
+def _open(path) -> SqlStore:
+    store = SqlStore(SqlStoreConfig(db_path=path, async_writes=True))
+    store.start_run(
+        run_id=RUN, started_at="2026-01-01T00:00:00+00:00", git_sha=None, branch=None,
+        ci_job=None, os_name="test", python_version="3.x",
+    )
+    return store
+
+def test_worker_shards_merge_into_one_run(tmp_path):
+    shards = []
+    for w in range(3):
+        path = tmp_path / f"gw{w}.db"
+        store = _open(path)
+        # a tag set only this worker has first shifts the tag ids between files
+        store.record_metric(run_id=RUN, nodeid=f"t::w{w}", metric_name="solo", metric_value=w, tags={"w": w})
+        for i in range(10):
+            store.record_metric(
+                run_id=RUN, nodeid=f"t::w{w}", metric_name="latency.p95", metric_value=i, tags={"name": "env"},
+            )
+        store.record_test_result(run_id=RUN, nodeid=f"t::w{w}", outcome="passed", duration_s=0.1)
+        store.record_retry_event(
+            run_id=RUN, nodeid=f"t::w{w}", request_name="REQ_PING",
+            attempt_number=1, sleep_s=0.02, exception_type="TimeoutError",
+        )
+        store.record_samples(run_id=RUN, nodeid=f"t::w{w}", series="latency_ms", values=[1.0, 2.0])
+        h = LatencyHistogram()
+        h.record(5.0)
+        store.record_histogram(run_id=RUN, nodeid="t::shared", name="latency_ms", hist=h)
+        store.finish_run(run_id=RUN, finished_at="2026-01-01T00:01:00+00:00", exit_status=0)
+        store.close()
+        shards.append(path)
+
+    main = _open(tmp_path / "results.db")
+    copied = main.merge_from(shards, RUN)
+    main.finish_run(run_id=RUN, finished_at="2026-01-01T00:01:00+00:00", exit_status=0)
+
+    assert copied == {
+        "test_results": 3, "perf_metrics": 33, "retry_events": 3, "perf_samples": 3, "perf_histograms": 3,
+    }
+    assert main.load_histogram(nodeid="t::shared", name="latency_ms").count == 3
+    assert main.metric_series("latency.p95")["t::w2"][0]["n"] == 10
+    main.close()
+
+    conn = sqlite3.connect(str(tmp_path / "results.db"))
+    try:
+        tagged = conn.execute(
+            "SELECT DISTINCT tags_json FROM perf_metrics_tagged WHERE metric_name = 'latency.p95'"
+        ).fetchall()
+        assert tagged == [('{"name":"env"}',)]
+        assert conn.execute("SELECT COUNT(*) FROM tag_sets").fetchone()[0] == 4
+    finally:
+        conn.close()
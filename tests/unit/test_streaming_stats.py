@@ -0,0 +1,71 @@
+import random
+import statistics
+from bisect import bisect_right
+
+import pytest
+from hypothesis import given, settings, strategies as st
+
+from qaharness.stats import RunningStats, TDigest
+
+
+def _rank(sorted_vals, x):
+    return bisect_right(sorted_vals, x) / len(sorted_vals) * 100.0
+
+@settings(max_examples=50, deadline=None)
+@given(st.lists(st.floats(min_value=-1e6, max_value=1e6), min_size=2, max_size=200), st.integers(0, 200))
+def test_running_stats_match_batch_and_merge(values, cut):
+    cut = min(cut, len(values))
+    whole = RunningStats()
+    whole.add_many(values)
+    left, right = RunningStats(), RunningStats()
+    left.add_many(values[:cut])
+    right.add_many(values[cut:])
+    merged = left.merge(right)
+
+    for s in (whole, merged):
+        assert s.count == len(values)
+        assert s.mean == pytest.approx(statistics.fmean(values), rel=1e-9, abs=1e-6)
+        assert s.variance == pytest.approx(statistics.variance(values), rel=1e-6, abs=1e-3)
+        assert (s.min, s.max) == (min(values), max(values))
+
+def test_tdigest_tail_accuracy_in_constant_memory():
+    rng = random.Random(3)
+    values = [rng.lognormvariate(3.0, 0.8) for _ in range(100_000)]
+    d = TDigest()
+    d.add_many(values)
+
+    assert d.count == len(values)
+    assert d.centroid_count <= d.compression
+    ranked = sorted(values)
+    for p in (50, 95, 99):
+        assert _rank(ranked, d.percentile(p)) == pytest.approx(p, abs=0.25)
+    assert (d.percentile(0), d.percentile(100)) == (min(values), max(values))
+
+def test_tdigest_merge_matches_single_stream():
+    rng = random.Random(11)
+    parts = [[rng.expovariate(1 / 40.0) for _ in range(20_000)] for _ in range(4)]
+    merged = TDigest()
+    for part in parts:
+        d = TDigest()
+        d.add_many(part)
+        merged.merge(d)
+
+    ranked = sorted(v for part in parts for v in part)
+    assert merged.count == len(ranked)
+    for p in (50, 95, 99):
+        assert _rank(ranked, merged.percentile(p)) == pytest.approx(p, abs=0.25)
+
+def test_tdigest_small_and_degenerate_inputs():
+    d = TDigest()
+    with pytest.raises(ValueError):
+        d.percentile(50)
+    d.add_many([0, 0, 0, 1, 2])
+    assert d.percentile(0) == 0
+    assert d.percentile(50) == 0
+    assert d.percentile(100) == 2
+
+    same = TDigest()
+    same.add_many([7.0] * 1000)
+    assert same.percentile(95) == 7.0
+    with pytest.raises(ValueError):
+        same.add(float("nan"))
@@ -0,0 +1,67 @@
+import json
+import sqlite3
+
+import pytest
+
+from qaharness.reporting import SqlStore, SqlStoreConfig
+
+TAGS = {"name": "env", "faults": {"drop_rate": 0.2, "delay_ms": 80}, "thresholds": None}
+
+
+def _rows(db, sql):
+    conn = sqlite3.connect(str(db))
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+@pytest.mark.parametrize("async_writes", [False, True])
+def test_rows_share_one_tag_set(tmp_path, async_writes):
+    db = tmp_path / "results.db"
+    store = SqlStore(SqlStoreConfig(db_path=db, async_writes=async_writes))
+    store.start_run(
+        run_id="r", started_at="2026-01-01T00:00:00+00:00", git_sha=None, branch=None,
+        ci_job=None, os_name="test", python_version="3.x",
+    )
+    for i in range(100):
+        store.record_metric(run_id="r", nodeid="t::a", metric_name=f"m{i % 5}", metric_value=i, tags=TAGS)
+    # same content, different key order and object: same id
+    reordered = {"thresholds": None, "faults": {"delay_ms": 80, "drop_rate": 0.2}, "name": "env"}
+    assert store.tag_set_id(reordered) == store.tag_set_id(TAGS)
+    store.record_metric(run_id="r", nodeid="t::a", metric_name="untagged", metric_value=1)
+    store.close()
+
+    assert _rows(db, "SELECT COUNT(*) FROM tag_sets") == [(1,)]
+    assert _rows(db, "SELECT COUNT(*) FROM perf_metrics WHERE tags_JSON IS NOT NULL") == [(0,)]
+    tagged = _rows(db, "SELECT DISTINCT tags_json FROM perf_metrics_tagged WHERE metric_name = 'm0'")
+    assert json.loads(tagged[0][0]) == TAGS
+    assert _rows(db, "SELECT tag_set_id FROM perf_metrics WHERE metric_name = 'untagged'") == [(None,)]
+
+def test_equal_hashing_values_stay_distinct(tmp_path):
+    store = SqlStore(SqlStoreConfig(db_path=tmp_path / "results.db"))
+    ids = {store.tag_set_id({"v": v}) for v in (1, 1.0, True)}
+    store.close()
+    assert len(ids) == 3
+
+def test_inline_tags_from_older_databases_are_migrated(tmp_path):
+    db = tmp_path / "results.db"
+    conn = sqlite3.connect(str(db))
+    conn.executescript("""
+        CREATE TABLE perf_metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, nodeid TEXT NOT NULL,
+            metric_name TEXT NOT NULL, metric_value REAL, unit TEXT, tags_JSON TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    conn.executemany(
+        "INSERT INTO perf_metrics (run_id, nodeid, metric_name, metric_value, tags_JSON) VALUES (?, ?, ?, ?, ?)",
+        [("r", "t::a", "m", float(i), json.dumps(TAGS, sort_keys=True)) for i in range(10)],
+    )
+    conn.commit()
+    conn.close()
+
+    store = SqlStore(SqlStoreConfig(db_path=db))
+    store.close()
+
+    assert _rows(db, "SELECT COUNT(*), COUNT(tag_set_id), COUNT(tags_JSON) FROM perf_metrics") == [(10, 10, 0)]
+    assert _rows(db, "SELECT COUNT(*) FROM tag_sets") == [(1,)]